@@ -9,10 +9,11 @@ from dotenv import load_dotenv
 # Fix macOS fork() issue
 os.environ['OBJC_DISABLE_INITIALIZE_FORK_SAFETY'] = 'YES'
 
-from .config import DEBUG, CORS_ORIGINS
+from .config import DEBUG, CORS_ORIGINS, SPECULATIVE_ATTEMPTS_MAX
 from .regions.registry import region_registry
 from .services.route_planner import RoutePlanner
-from .tasks.route_tasks import route_queue, generate_route_task
+from .tasks.route_tasks import route_queue, generate_route_task, load_route_geometry
+from .utils.polyline import encode_feature_collection
 
 # Load environment variables
 load_dotenv()
@@ -23,6 +24,19 @@ CORS(app, origins=CORS_ORIGINS)
 # Initialize services
 route_planner = RoutePlanner()
 
+# Accept header value that requests encoded polyline geometry (same as ?format=polyline)
+POLYLINE_MEDIA_TYPE = 'application/vnd.polyline+json'
+
+
+def _geometry_format() -> str:
+    """Negotiate the geometry format: 'polyline' via query parameter or Accept header, else 'geojson'."""
+    requested = request.args.get('format')
+    if requested in ('polyline', 'geojson'):
+        return requested
+    if request.accept_mimetypes.best_match(['application/json', POLYLINE_MEDIA_TYPE]) == POLYLINE_MEDIA_TYPE:
+        return 'polyline'
+    return 'geojson'
+
 
 @app.route('/api/regions', methods=['GET'])
 def get_regions():
@@ -80,6 +94,15 @@ def generate_route(region_id):
         num_days = data.get('num_days')
         max_tries = data.get('max_tries')
         good_enough_threshold = data.get('good_enough_threshold')
+        speculative_attempts = data.get('speculative_attempts')
+        if speculative_attempts is not None:
+            # Each attempt is a thread in the job, so the request may not ask for more than the maximum
+            try:
+                speculative_attempts = int(speculative_attempts)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'speculative_attempts must be an integer'}), 400
+            speculative_attempts = min(max(speculative_attempts, 1), SPECULATIVE_ATTEMPTS_MAX)
+        
         # Enqueue background job to avoid request timeouts
         job = route_queue.enqueue(
             generate_route_task,
@@ -87,6 +110,7 @@ def generate_route(region_id):
             num_days=num_days,
             max_tries=max_tries,
             good_enough_threshold=good_enough_threshold,
+            speculative_attempts=speculative_attempts,
             job_timeout=3600  # seconds
         )
         
@@ -113,9 +137,14 @@ def get_route_status(region_id, job_id):
             return jsonify({'status': 'not_found'}), 404
         
         if job.is_finished:
+            result = job.result
+            geometry_format = _geometry_format()
+            if geometry_format == 'polyline' and isinstance(result, dict) and result.get('geojson'):
+                result = dict(result, geojson=encode_feature_collection(result['geojson']))
             return jsonify({
                 'status': 'completed',
-                'result': job.result,
+                'result': result,
+                'format': geometry_format,
                 'region': region_id
             })
         elif job.is_failed:
@@ -133,6 +162,31 @@ def get_route_status(region_id, job_id):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/regions/<region_id>/routes/<job_id>/geometry', methods=['GET'])
+def get_route_geometry(region_id, job_id):
+    """Get the full-resolution leg geometry of a completed route."""
+    try:
+        # Validate region exists
+        if not region_registry.region_exists(region_id):
+            return jsonify({'error': 'Region not found'}), 404
+        
+        geometry = load_route_geometry(job_id)
+        if not geometry:
+            return jsonify({'status': 'not_found'}), 404
+        
+        geometry_format = _geometry_format()
+        if geometry_format == 'polyline':
+            geometry = encode_feature_collection(geometry)
+        
+        return jsonify({
+            'geometry': geometry,
+            'format': geometry_format,
+            'region': region_id
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
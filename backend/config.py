@@ -17,26 +17,105 @@ CACHE_DIR = DATA_DIR / "cache"
 # API Configuration
 GEOAPIFY_API_KEY = os.getenv("GEOAPIFY_API_KEY", "01c9293b314a49979b45d9e0a5570a3f")
 OVERPASS_API_URL = "https://overpass-api.de/api/interpreter"
+# One Overpass query per route leg instead of one per sampled point
+OVERPASS_BATCHED = os.getenv("OVERPASS_BATCHED", "true").lower() == "true"
+OVERPASS_TIMEOUT_S = int(os.getenv("OVERPASS_TIMEOUT_S", 30))
+# Overpass request limits (per host, per process); the public instance allows only a couple of slots per IP
+OVERPASS_MAX_CONCURRENCY = int(os.getenv("OVERPASS_MAX_CONCURRENCY", 2))
+OVERPASS_RATE_LIMIT_PER_SEC = float(os.getenv("OVERPASS_RATE_LIMIT_PER_SEC", 2))
+# Adaptive surface sampling along each leg: one sample per spacing, plus sharp bends, capped per leg
+SURFACE_SAMPLE_SPACING_M = float(os.getenv("SURFACE_SAMPLE_SPACING_M", 500))
+SURFACE_SAMPLE_BEND_DEG = float(os.getenv("SURFACE_SAMPLE_BEND_DEG", 45))
+SURFACE_SAMPLE_MAX = int(os.getenv("SURFACE_SAMPLE_MAX", 60))
+# Route legs whose surface data is looked up concurrently during GeoJSON export
+SURFACE_LOOKUP_WORKERS = int(os.getenv("SURFACE_LOOKUP_WORKERS", 4))
+
+# Outbound HTTP (shared keep-alive session)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", 0.5))
+# Longest Retry-After honoured; a 429/503 asking for more is returned to the caller rather than slept on
+HTTP_MAX_RETRY_AFTER_S = float(os.getenv("HTTP_MAX_RETRY_AFTER_S", 30))
+
+# Geoapify request limits (per process)
+GEOAPIFY_MAX_CONCURRENCY = int(os.getenv("GEOAPIFY_MAX_CONCURRENCY", 4))
+GEOAPIFY_RATE_LIMIT_PER_SEC = float(os.getenv("GEOAPIFY_RATE_LIMIT_PER_SEC", 5))
 
 # Redis Configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 
 # Cache Configuration
 CACHE_TTL_HOURS = 24
+# Stale-while-revalidate: expired region caches are still served for this long past their TTL
+# while a refresh runs in the background ("thread"), on the RQ queue ("rq"), or not at all ("off": callers block).
+# RQ jobs always use "rq" in place of "thread": their work-horse process exits when the job does
+CACHE_MAX_STALE_HOURS = float(os.getenv("CACHE_MAX_STALE_HOURS", 24 * 7))
+CACHE_REFRESH_MODE = os.getenv("CACHE_REFRESH_MODE", "thread").lower()
+# A region cache refresh is not re-triggered within this many seconds of the last one
+CACHE_REFRESH_RETRY_S = float(os.getenv("CACHE_REFRESH_RETRY_S", 300))
+# Parsed region cache files kept in memory per process (scenic points, feasible pairs, leg stores)
+CACHE_MEMORY_ENTRIES = int(os.getenv("CACHE_MEMORY_ENTRIES", 32))
+# One process fills an expired region cache while others wait (up to the timeout) or serve the stale copy
+CACHE_FILL_LOCK_TIMEOUT_S = float(os.getenv("CACHE_FILL_LOCK_TIMEOUT_S", 120))
+# Redis fill locks expire after this long, so a crashed filler cannot block others
+CACHE_FILL_LOCK_LEASE_S = float(os.getenv("CACHE_FILL_LOCK_LEASE_S", 600))
+# Encoding for region cache files: json, json.gz, msgpack (needs msgpack) or zstd (needs zstandard)
+CACHE_FILE_FORMAT = os.getenv("CACHE_FILE_FORMAT", "json").lower()
+# "redis" adds the RQ Redis instance as a shared tier behind the local cache files, so caches survive restarts
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "file").lower()
+CACHE_REDIS_PREFIX = os.getenv("CACHE_REDIS_PREFIX", "hiking-cache")
+# Redis for the cache tier; another instance or DB (e.g. redis://host:6379/1) keeps it apart from the RQ queue
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", REDIS_URL)
+# Route leg and surface cell entries bigger than this (after compression) stay out of Redis
+CACHE_REDIS_MAX_ENTRY_BYTES = int(os.getenv("CACHE_REDIS_MAX_ENTRY_BYTES", 256 * 1024))
+# Route leg and surface cell entries expire from Redis after this long; their local tiers keep their own TTL
+CACHE_REDIS_ENTRY_TTL_HOURS = float(os.getenv("CACHE_REDIS_ENTRY_TTL_HOURS", 24))
+# Redis values at least this large are zlib-compressed
+CACHE_REDIS_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_REDIS_COMPRESS_MIN_BYTES", 1024))
 
 # Route Generation Configuration
 DEFAULT_MAX_TRIES = 5
 DEFAULT_GOOD_ENOUGH_THRESHOLD = 0.1
+# Grid size (metres) used to match shared trail between consecutive legs
+OVERLAP_GRID_M = float(os.getenv("OVERLAP_GRID_M", 25))
+# Attempts run in parallel per job; 1 keeps the sequential behaviour
+DEFAULT_SPECULATIVE_ATTEMPTS = int(os.getenv("DEFAULT_SPECULATIVE_ATTEMPTS", 1))
+# Upper bound on parallel attempts a request may ask for (each is a thread in the job)
+SPECULATIVE_ATTEMPTS_MAX = int(os.getenv("SPECULATIVE_ATTEMPTS_MAX", 8))
 SCENIC_SEARCH_RADIUS_KM = 10
+# Candidate itineraries sampled and ranked by estimated overlap before any routing
+ITINERARY_CANDIDATE_POOL = int(os.getenv("ITINERARY_CANDIDATE_POOL", 50))
 
 # File paths
 REGIONS_DIR = BACKEND_DIR / "regions" / "definitions"
 WAYPOINTS_DIR = DATA_DIR / "waypoints"
+SURFACE_INDEX_DIR = Path(os.getenv("SURFACE_INDEX_DIR", str(DATA_DIR / "surface_index")))
 
 # Allow overriding cache root to a writable location in production (e.g., Render)
 CACHE_ROOT = Path(os.getenv("CACHE_ROOT", str(CACHE_DIR)))
 SCENIC_CACHE_DIR = CACHE_ROOT / "scenic_points"
 FEASIBLE_PAIRS_CACHE_DIR = CACHE_ROOT / "feasible_pairs"
+ROUTE_LEG_CACHE_DIR = CACHE_ROOT / "route_legs"
+LEG_STORE_DIR = CACHE_ROOT / "leg_store"
+SURFACE_CACHE_DIR = CACHE_ROOT / "surface_cells"
+CACHE_LOCK_DIR = CACHE_ROOT / "locks"
+
+# Route leg cache (Geoapify routing responses keyed by rounded coordinates + mode)
+ROUTE_LEG_CACHE_TTL_HOURS = float(os.getenv("ROUTE_LEG_CACHE_TTL_HOURS", 24 * 7))
+ROUTE_LEG_CACHE_MEMORY_ENTRIES = int(os.getenv("ROUTE_LEG_CACHE_MEMORY_ENTRIES", 512))
+ROUTE_LEG_CACHE_MAX_DISK_MB = int(os.getenv("ROUTE_LEG_CACHE_MAX_DISK_MB", 200))
+ROUTE_LEG_CACHE_PRECISION = 5  # decimal places (~1 m)
+
+# Surface cache (Overpass surface tags per grid cell, sized to the query's around:50)
+SURFACE_CACHE_TTL_HOURS = float(os.getenv("SURFACE_CACHE_TTL_HOURS", 24 * 30))
+SURFACE_CACHE_MEMORY_ENTRIES = int(os.getenv("SURFACE_CACHE_MEMORY_ENTRIES", 4096))
+SURFACE_CACHE_MAX_DISK_MB = int(os.getenv("SURFACE_CACHE_MAX_DISK_MB", 100))
+SURFACE_CACHE_CELL_M = float(os.getenv("SURFACE_CACHE_CELL_M", 50))
+
+# GeoJSON output: leg geometry is simplified to this tolerance (0 keeps full resolution);
+# the full-resolution geometry is kept in Redis for this long behind its own endpoint
+GEOJSON_SIMPLIFY_TOLERANCE_M = float(os.getenv("GEOJSON_SIMPLIFY_TOLERANCE_M", 10))
+ROUTE_GEOMETRY_TTL_S = int(os.getenv("ROUTE_GEOMETRY_TTL_S", 24 * 3600))
 
 # Flask Configuration
 FLASK_ENV = os.getenv("FLASK_ENV", "development")
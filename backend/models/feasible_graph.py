@@ -0,0 +1,141 @@
+"""
+Feasible-pair graph in compressed sparse row (CSR) form over integer waypoint IDs.
+"""
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ..utils.cache_codec import atomic_write
+
+
+class FeasibleGraph:
+    """
+    Directed feasible-pair graph as CSR arrays.
+    
+    Node i's one-day neighbours are neighbors[offsets[i]:offsets[i + 1]], with
+    matching distances, so neighbour lookup is an O(1) slice and filters over
+    a node's neighbours are single NumPy operations. keys maps integer IDs
+    back to waypoint keys.
+    """
+    
+    def __init__(
+        self,
+        keys: List[str],
+        offsets: np.ndarray,
+        neighbors: np.ndarray,
+        distances: np.ndarray,
+        valid_digest: str = ""
+    ):
+        self.keys = list(keys)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.neighbors = np.asarray(neighbors, dtype=np.int32)
+        self.distances = np.asarray(distances, dtype=np.float64)
+        # Fingerprint of the waypoint keys the graph was filtered against
+        self.valid_digest = valid_digest
+        # Set by load(): mtime of the pair file the saved graph was derived from
+        self.source_mtime: Optional[float] = None
+        self._index_by_key: Dict[str, int] = {key: i for i, key in enumerate(self.keys)}
+    
+    @staticmethod
+    def digest(valid_ids: Iterable[str]) -> str:
+        """Order-independent fingerprint of a set of waypoint keys."""
+        return hashlib.sha1("\n".join(sorted(set(valid_ids))).encode()).hexdigest()
+    
+    @classmethod
+    def from_pairs(cls, feasible_pairs: List[Dict], valid_ids: Iterable[str]) -> "FeasibleGraph":
+        """
+        Build the graph from feasible pair dicts, keeping only known waypoint IDs.
+        
+        Args:
+            feasible_pairs: Feasible pairs ({'from', 'to', 'distance'})
+            valid_ids: Waypoint IDs that can appear in an itinerary
+        
+        Returns:
+            FeasibleGraph whose nodes are the valid IDs in first-seen order
+        """
+        keys = list(dict.fromkeys(valid_ids))
+        index = {key: i for i, key in enumerate(keys)}
+        
+        edges = [
+            (index[pair['from']], index[pair['to']], pair['distance'])
+            for pair in feasible_pairs
+            if pair['from'] in index and pair['to'] in index and pair['from'] != pair['to']
+        ]
+        sources = np.array([a for a, _, _ in edges], dtype=np.int64)
+        targets = np.array([b for _, b, _ in edges], dtype=np.int32)
+        distances = np.array([d for _, _, d in edges], dtype=np.float64)
+        
+        # Stable sort by source keeps each node's neighbours in pair-file order
+        order = np.argsort(sources, kind='stable')
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=len(keys)))))
+        return cls(keys, offsets, targets[order], distances[order], cls.digest(keys))
+    
+    @classmethod
+    def from_adjacency(cls, adjacency: Dict[str, List[str]]) -> "FeasibleGraph":
+        """Build the graph from key adjacency lists (distances unknown, stored as NaN)."""
+        keys = list(adjacency)
+        for neighbors in adjacency.values():
+            keys.extend(n for n in neighbors if n not in adjacency)
+        pairs = [
+            {'from': start, 'to': end, 'distance': float('nan')}
+            for start, neighbors in adjacency.items()
+            for end in neighbors
+        ]
+        return cls.from_pairs(pairs, keys)
+    
+    @property
+    def num_nodes(self) -> int:
+        return len(self.keys)
+    
+    @property
+    def num_edges(self) -> int:
+        return len(self.neighbors)
+    
+    def index_of(self, key: str) -> Optional[int]:
+        """Integer ID of a waypoint key, or None if it is not a node."""
+        return self._index_by_key.get(key)
+    
+    def neighbors_of(self, i: int) -> np.ndarray:
+        """Integer IDs reachable from node i in one day (a view, not a copy)."""
+        return self.neighbors[self.offsets[i]:self.offsets[i + 1]]
+    
+    def distances_of(self, i: int) -> np.ndarray:
+        """Distances in km to neighbors_of(i)."""
+        return self.distances[self.offsets[i]:self.offsets[i + 1]]
+    
+    def to_adjacency(self) -> Dict[str, List[str]]:
+        """Key adjacency lists for nodes with at least one neighbour."""
+        return {
+            key: [self.keys[j] for j in self.neighbors_of(i)]
+            for i, key in enumerate(self.keys)
+            if self.offsets[i + 1] > self.offsets[i]
+        }
+    
+    def save(self, path: Path, source_mtime: Optional[float] = None) -> None:
+        """Save atomically as a compressed .npz, optionally recording the mtime of the file it was derived from."""
+        atomic_write(path, lambda f: np.savez_compressed(
+            f,
+            keys=np.array(self.keys, dtype=str),
+            offsets=self.offsets,
+            neighbors=self.neighbors,
+            distances=self.distances,
+            valid_digest=np.array(self.valid_digest),
+            source_mtime=np.array(np.nan if source_mtime is None else source_mtime)
+        ))
+    
+    @classmethod
+    def load(cls, path: Path) -> "FeasibleGraph":
+        """Load a graph saved with save(); its source_mtime is available as an attribute."""
+        with np.load(path, allow_pickle=False) as data:
+            graph = cls(
+                data['keys'].tolist(),
+                data['offsets'],
+                data['neighbors'],
+                data['distances'],
+                str(data['valid_digest'])
+            )
+            source_mtime = float(data['source_mtime'])
+        graph.source_mtime = None if np.isnan(source_mtime) else source_mtime
+        return graph
@@ -0,0 +1,29 @@
+"""
+Per-process snapshot of a region's route-planning data.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .region import Region
+from .feasible_graph import FeasibleGraph
+from .waypoint_store import WaypointStore
+
+
+@dataclass(frozen=True)
+class RegionDataset:
+    """
+    A region's waypoints, feasible-pair graph, scenic points and leg store, with lookup tables built once.
+    
+    Shared by every request and job in the process; nothing here may be
+    mutated. A new snapshot replaces it when its source files change.
+    """
+    region: Region
+    waypoints: WaypointStore
+    graph: FeasibleGraph
+    node_waypoints: Any  # np.ndarray: waypoint store ID of each graph node
+    scenic_points: List[Dict]
+    scenic_index: Any  # ScenicPointIndex
+    leg_store: Optional[Dict]
+    source_versions: Tuple[Any, ...]
+    loaded_at: float
+    stale_caches: Tuple[str, ...] = ()  # region caches loaded past their TTL, still to be refreshed
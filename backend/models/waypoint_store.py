@@ -0,0 +1,104 @@
+"""
+Compact, array-backed waypoint storage for route planning.
+"""
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+def waypoint_key(feature: Dict) -> Optional[str]:
+    """
+    Stable waypoint ID: an explicit id/osm_id/ref, else the name with rounded coordinates.
+    
+    Returns:
+        The key, or None if the feature has no usable coordinates
+    """
+    props = feature.get('properties', {})
+    coords = feature.get('geometry', {}).get('coordinates', [None, None])
+    if coords is None or len(coords) < 2 or coords[0] is None or coords[1] is None:
+        return None
+    lon, lat = coords[0], coords[1]
+    wp_id = props.get('id') or props.get('osm_id') or props.get('ref')
+    if not wp_id:
+        name = props.get('name', 'Unnamed')
+        wp_id = f"{name}:{round(lat, 5)},{round(lon, 5)}"
+    return str(wp_id)
+
+
+class WaypointRecord:
+    """Slim per-waypoint record; coordinates live in the store's arrays."""
+    
+    __slots__ = ("index", "key", "name")
+    
+    def __init__(self, index: int, key: str, name: str):
+        self.index = index
+        self.key = key
+        self.name = name
+    
+    def __repr__(self) -> str:
+        return f"WaypointRecord({self.index}, {self.key!r}, {self.name!r})"
+
+
+class WaypointStore:
+    """
+    Waypoints as parallel NumPy coordinate arrays plus interned keys and slim records.
+    
+    Only the fields route planning needs are kept, not the full Geoapify
+    features. Entries are indexed by integer position; exact duplicates
+    (same key and coordinates) are dropped, while distinct points sharing a
+    key are kept, and key lookups resolve to the last of them.
+    """
+    
+    def __init__(self, keys: List[str], names: List[str], lons: Iterable[float], lats: Iterable[float]):
+        self.keys = [sys.intern(key) for key in keys]
+        self.lons = np.asarray(lons, dtype=float)
+        self.lats = np.asarray(lats, dtype=float)
+        self.records = [WaypointRecord(i, key, name) for i, (key, name) in enumerate(zip(self.keys, names))]
+        self._index_by_key: Dict[str, int] = {key: i for i, key in enumerate(self.keys)}
+    
+    @classmethod
+    def from_features(cls, features: List[Dict]) -> "WaypointStore":
+        """Build a store from GeoJSON waypoint features."""
+        seen: Dict[Tuple[str, float, float], str] = {}
+        for feature in features:
+            key = waypoint_key(feature)
+            if not key:
+                continue
+            lon, lat = feature['geometry']['coordinates'][:2]
+            seen[(key, lat, lon)] = feature.get('properties', {}).get('name', key)
+        
+        return cls(
+            [key for key, _, _ in seen],
+            list(seen.values()),
+            [lon for _, _, lon in seen],
+            [lat for _, lat, _ in seen]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._index_by_key
+    
+    def index_of(self, key: str) -> Optional[int]:
+        """Integer ID for a key, or None if unknown."""
+        return self._index_by_key.get(key)
+    
+    def indices_of(self, keys: Iterable[str]) -> np.ndarray:
+        """Integer IDs for known keys, e.g. to map feasible-graph nodes onto the store."""
+        return np.array([self._index_by_key[key] for key in keys], dtype=np.int64)
+    
+    def coords_at(self, i: int) -> List[float]:
+        """[lon, lat] of a waypoint by integer ID (GeoJSON order)."""
+        return [float(self.lons[i]), float(self.lats[i])]
+    
+    def coords(self, key: str) -> List[float]:
+        """[lon, lat] of a waypoint by key (GeoJSON order)."""
+        i = self._index_by_key[key]
+        return [float(self.lons[i]), float(self.lats[i])]
+    
+    def name(self, key: str) -> str:
+        """Display name of a waypoint by key, falling back to the key itself."""
+        i = self._index_by_key.get(key)
+        return self.records[i].name if i is not None else key
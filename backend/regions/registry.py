@@ -2,8 +2,9 @@
 Region registry for loading and managing region configurations.
 """
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import json
+import threading
 
 from ..models.region import Region
 from ..config import REGIONS_DIR, WAYPOINTS_DIR
@@ -14,6 +15,9 @@ class RegionRegistry:
     
     def __init__(self):
         self._regions: Dict[str, Region] = {}
+        # Parsed waypoint files keyed by region, with the file mtime they were read at
+        self._waypoints: Dict[str, Tuple[float, List[Dict]]] = {}
+        self._waypoints_lock = threading.Lock()
         self._load_regions()
     
     def _load_regions(self):
@@ -57,11 +61,34 @@ class RegionRegistry:
         return waypoints_file
     
     def load_waypoints(self, region_id: str) -> List[Dict]:
-        """Load waypoints for a region."""
+        """
+        Load waypoints for a region.
+        
+        The parsed file is reused until its mtime changes, so callers share
+        one list and must treat it as read-only.
+        """
         waypoints_file = self.get_waypoints_file_path(region_id)
+        mtime = waypoints_file.stat().st_mtime
+        
+        with self._waypoints_lock:
+            cached = self._waypoints.get(region_id)
+            if cached and cached[0] == mtime:
+                return cached[1]
         
         with open(waypoints_file, 'r') as f:
-            return json.load(f)
+            waypoints = json.load(f)
+        
+        with self._waypoints_lock:
+            self._waypoints[region_id] = (mtime, waypoints)
+        return waypoints
+    
+    def reload_waypoints(self, region_id: Optional[str] = None) -> None:
+        """Forget parsed waypoints for one region (or all), forcing a re-read."""
+        with self._waypoints_lock:
+            if region_id is None:
+                self._waypoints.clear()
+            else:
+                self._waypoints.pop(region_id, None)
     
     def to_api_format(self) -> List[Dict]:
         """Convert regions to API format for frontend."""
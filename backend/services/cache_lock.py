@@ -0,0 +1,147 @@
+"""
+Single-flight locks for filling shared cache entries.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import redis
+
+from .redis_cache import RedisCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are serialised
+    fcntl = None
+
+_process_locks: Dict[str, threading.Lock] = {}
+_process_locks_guard = threading.Lock()
+
+# How often a waiter re-tries a held file lock
+_POLL_INTERVAL_S = 0.1
+
+
+def _process_lock(name: str) -> threading.Lock:
+    with _process_locks_guard:
+        lock = _process_locks.get(name)
+        if lock is None:
+            lock = _process_locks[name] = threading.Lock()
+        return lock
+
+
+class FillLock:
+    """
+    Lock held by the single filler of a cache entry, across threads and processes.
+
+    Threads in this process serialise on an in-process lock. Other processes
+    are excluded by a Redis lock when a Redis cache tier is configured (so web
+    and worker hosts share it), otherwise by an fcntl lock on a file in
+    lock_dir. Entering yields whether the lock was acquired within timeout;
+    callers that did not get it should re-check the cache, serve a stale value,
+    or fill anyway rather than fail.
+
+    Usage:
+        with FillLock("feasible_pairs:lake_district", lock_dir, timeout=120) as acquired:
+            ...
+    """
+
+    def __init__(
+        self,
+        name: str,
+        lock_dir: Path,
+        timeout: Optional[float] = None,
+        redis_cache: Optional[RedisCache] = None,
+        lease_seconds: float = 600
+    ):
+        """
+        Args:
+            name: Key being filled (e.g. "feasible_pairs:lake_district")
+            lock_dir: Directory for lock files when Redis is not used
+            timeout: Seconds to wait for the lock (0 = don't wait, None = forever)
+            redis_cache: Redis tier whose connection holds the lock, if any
+            lease_seconds: Redis lock expiry, so a crashed filler cannot block others forever
+        """
+        self.name = name
+        self.lock_dir = Path(lock_dir)
+        self.timeout = timeout
+        self.redis_cache = redis_cache
+        self.lease_seconds = lease_seconds
+
+        self.acquired = False
+        self._process_lock = _process_lock(name)
+        self._redis_lock = None
+        self._file = None
+
+    def _deadline(self) -> Optional[float]:
+        return None if self.timeout is None else time.monotonic() + self.timeout
+
+    def __enter__(self) -> bool:
+        deadline = self._deadline()
+        if self.timeout == 0:
+            got_process_lock = self._process_lock.acquire(blocking=False)
+        else:
+            got_process_lock = self._process_lock.acquire(timeout=-1 if self.timeout is None else self.timeout)
+        if not got_process_lock:
+            return False
+
+        try:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self.redis_cache is not None:
+                self.acquired = self._acquire_redis(remaining)
+            else:
+                self.acquired = self._acquire_file(deadline)
+        finally:
+            if not self.acquired:
+                self._process_lock.release()
+        return self.acquired
+
+    def _acquire_redis(self, remaining: Optional[float]) -> bool:
+        self._redis_lock = self.redis_cache.conn.lock(
+            self.redis_cache._key(f"lock:{self.name}"),
+            timeout=self.lease_seconds,
+            blocking=remaining != 0,
+            blocking_timeout=remaining
+        )
+        try:
+            return bool(self._redis_lock.acquire())
+        except redis.RedisError as e:
+            # Without Redis there is nothing shared to coordinate on; the process lock still holds
+            print(f"[LOG] Error taking Redis fill lock {self.name}: {e}")
+            self._redis_lock = None
+            return True
+
+    def _acquire_file(self, deadline: Optional[float]) -> bool:
+        if fcntl is None:
+            return True
+
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.lock_dir / f"{self.name.replace(':', '.')}.lock", 'a')
+        while True:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    self._file.close()
+                    self._file = None
+                    return False
+                time.sleep(_POLL_INTERVAL_S)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if not self.acquired:
+            return
+        self.acquired = False
+
+        if self._redis_lock is not None:
+            try:
+                self._redis_lock.release()
+            except redis.RedisError as e:
+                # Typically the lease expired during a long fill
+                print(f"[LOG] Error releasing Redis fill lock {self.name}: {e}")
+            self._redis_lock = None
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._process_lock.release()
@@ -1,89 +1,415 @@
 """
 Region-aware caching service.
 """
-import json
 import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
-from ..config import CACHE_TTL_HOURS, SCENIC_CACHE_DIR, FEASIBLE_PAIRS_CACHE_DIR
+from ..models.feasible_graph import FeasibleGraph
+from ..utils.cache_codec import FORMAT_SUFFIXES, read_file, write_file
+from .cache_lock import FillLock
+from .redis_cache import RedisCache, get_redis_cache
+from ..config import (
+    CACHE_TTL_HOURS, CACHE_MAX_STALE_HOURS, CACHE_MEMORY_ENTRIES, CACHE_FILE_FORMAT, CACHE_FILL_LOCK_TIMEOUT_S, CACHE_FILL_LOCK_LEASE_S,
+    SCENIC_CACHE_DIR, FEASIBLE_PAIRS_CACHE_DIR, LEG_STORE_DIR, CACHE_LOCK_DIR
+)
 
 
 class CacheService:
-    """Service for managing region-specific caches."""
+    """
+    Service for managing region-specific caches.
     
-    def __init__(self, ttl_hours: int = None):
+    Reads go through an in-process LRU tier in front of the JSON files. Each
+    memory entry remembers the mtime and size of the file it was parsed from
+    and expires with it, so a re-prepared file is picked up on the next read.
+    Values returned from the memory tier are shared and must not be mutated.
+    
+    With CACHE_BACKEND=redis, Redis is a shared tier behind the files: writes
+    go to both, and a missing local file (e.g. after a deploy on an ephemeral
+    filesystem) is hydrated from Redis instead of being recomputed. Redis keeps
+    entries through the max-stale window too, so a restarted host can still
+    serve an expired copy while it is refreshed.
+    
+    Files are written atomically in CACHE_FILE_FORMAT (json, json.gz, msgpack
+    or zstd, each with its own suffix); reads accept any of the formats.
+    """
+    
+    def __init__(
+        self,
+        ttl_hours: int = None,
+        max_memory_entries: int = None,
+        redis_cache: Optional[RedisCache] = None,
+        file_format: str = None,
+        max_stale_hours: float = None
+    ):
         self.ttl_hours = ttl_hours or CACHE_TTL_HOURS
+        # How long past its TTL an entry may still be served on request (stale-while-revalidate)
+        self.max_stale_hours = CACHE_MAX_STALE_HOURS if max_stale_hours is None else max_stale_hours
+        self.file_format = file_format or CACHE_FILE_FORMAT
+        if self.file_format not in FORMAT_SUFFIXES:
+            raise ValueError(f"Unknown cache file format {self.file_format!r}; expected one of {', '.join(FORMAT_SUFFIXES)}")
+        self.max_memory_entries = max_memory_entries or CACHE_MEMORY_ENTRIES
         self.scenic_cache_dir = SCENIC_CACHE_DIR
         self.feasible_pairs_cache_dir = FEASIBLE_PAIRS_CACHE_DIR
+        self.leg_store_dir = LEG_STORE_DIR
+        self.lock_dir = CACHE_LOCK_DIR
+        self.redis_cache = redis_cache if redis_cache is not None else get_redis_cache()
+        
+        # path -> ((mtime_ns, size), expires_at, value), least recently used first
+        self._memory: "OrderedDict[Path, Tuple[Tuple[int, int], float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.file_hits = 0
+        self.remote_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
         
         # Ensure cache directories exist
         self.scenic_cache_dir.mkdir(parents=True, exist_ok=True)
         self.feasible_pairs_cache_dir.mkdir(parents=True, exist_ok=True)
     
-    def _is_cache_valid(self, cache_file: Path) -> bool:
-        """Check if cache file is still valid based on TTL."""
+    def _is_cache_valid(self, cache_file: Path, allow_stale: bool = False) -> bool:
+        """Check if cache file is still valid based on TTL (plus the max-stale window if allow_stale)."""
         if not cache_file.exists():
             return False
         
+        max_age_hours = self.ttl_hours + (self.max_stale_hours if allow_stale else 0)
         file_age = datetime.now() - datetime.fromtimestamp(cache_file.stat().st_mtime)
-        return file_age < timedelta(hours=self.ttl_hours)
+        return file_age < timedelta(hours=max_age_hours)
+    
+    def _cache_dir(self, kind: str) -> Path:
+        return {
+            "scenic_points": self.scenic_cache_dir,
+            "feasible_pairs": self.feasible_pairs_cache_dir,
+            "leg_store": self.leg_store_dir
+        }[kind]
     
-    def get_scenic_points(self, region_id: str) -> Optional[List[Dict]]:
-        """Get cached scenic points for a region."""
-        cache_file = self.scenic_cache_dir / f"{region_id}.json"
+    def _cache_file(self, kind: str, region_id: str) -> Path:
+        """
+        Local file for one kind of region cache ("scenic_points", "feasible_pairs" or "leg_store").
         
-        if not self._is_cache_valid(cache_file):
-            return None
+        Returns the existing file in whichever format it was written, preferring
+        the configured format, or the path a write in the configured format would use.
+        """
+        directory = self._cache_dir(kind)
+        preferred = FORMAT_SUFFIXES[self.file_format]
+        for suffix in [preferred, *(s for s in FORMAT_SUFFIXES.values() if s != preferred)]:
+            cache_file = directory / f"{region_id}{suffix}"
+            if cache_file.exists():
+                return cache_file
+        return directory / f"{region_id}{preferred}"
+    
+    @staticmethod
+    def _region_of(cache_file: Path) -> Optional[str]:
+        """Region ID of a cache file in any format, or None for unrelated files."""
+        for suffix in FORMAT_SUFFIXES.values():
+            if cache_file.name.endswith(suffix):
+                return cache_file.name[:-len(suffix)]
+        return None
+    
+    @staticmethod
+    def _cache_files(directory: Path) -> List[Path]:
+        """Every region cache file in a directory, in any format."""
+        return [path for suffix in FORMAT_SUFFIXES.values() for path in directory.glob(f"*{suffix}")]
+    
+    @staticmethod
+    def _remote_key(kind: str, region_id: str) -> str:
+        return f"region:{region_id}:{kind}"
+    
+    def _read_entry(self, kind: str, region_id: str, use_ttl: bool = True, allow_stale: bool = False) -> Optional[Any]:
+        """
+        Read a region cache through the memory tier, then the file, then Redis.
+        
+        Args:
+            kind: Cache kind ("scenic_points", "feasible_pairs" or "leg_store")
+            region_id: Region the data belongs to
+            use_ttl: Whether the data expires after the cache TTL
+            allow_stale: Return a local file up to max_stale_hours past its TTL rather than None
+        
+        Returns:
+            Parsed value, or None if it is missing, expired or unreadable
+        """
+        cache_file = self._cache_file(kind, region_id)
+        try:
+            stat = cache_file.stat()
+        except OSError:
+            stat = None
+        
+        expires_at = float('inf')
+        if stat is not None and use_ttl:
+            expires_at = stat.st_mtime + self.ttl_hours * 3600
+        now = time.time()
+        stale = stat is not None and expires_at <= now
+        too_stale = stale and (not allow_stale or expires_at + self.max_stale_hours * 3600 <= now)
+        if stat is None or too_stale:
+            if stat is None:
+                with self._lock:
+                    self._memory.pop(cache_file, None)
+            value = self._read_remote(kind, region_id, use_ttl, allow_stale)
+            if value is None:
+                with self._lock:
+                    self.misses += 1
+            return value
+        
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._memory.get(cache_file)
+            if entry is not None and entry[0] == signature:
+                self._memory.move_to_end(cache_file)
+                if stale:
+                    self.stale_hits += 1
+                else:
+                    self.memory_hits += 1
+                return entry[2]
         
         try:
-            with open(cache_file, 'r') as f:
-                return json.load(f)
+            value = read_file(cache_file)
         except Exception as e:
-            print(f"[LOG] Error loading scenic cache for {region_id}: {e}")
+            print(f"[LOG] Error loading {kind} cache for {region_id}: {e}")
+            with self._lock:
+                self.misses += 1
             return None
+        
+        with self._lock:
+            self._remember(cache_file, signature, expires_at, value)
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.file_hits += 1
+        return value
     
-    def set_scenic_points(self, region_id: str, scenic_points: List[Dict]) -> None:
-        """Cache scenic points for a region."""
-        cache_file = self.scenic_cache_dir / f"{region_id}.json"
+    def _read_remote(self, kind: str, region_id: str, use_ttl: bool, allow_stale: bool = False) -> Optional[Any]:
+        """
+        Fetch a region cache from Redis and hydrate the local file from it.
+        
+        The hydrated file keeps the original write time, so it expires when
+        the Redis copy does and source versions stay comparable across hosts.
+        With allow_stale, entries up to max_stale_hours past their TTL are
+        accepted as well.
+        """
+        if self.redis_cache is None:
+            return None
+        
+        entry = self.redis_cache.get_entry(self._remote_key(kind, region_id))
+        if entry is None:
+            return None
+        value, written_at = entry
+        expires_at = written_at + self.ttl_hours * 3600 if use_ttl else float('inf')
+        stale = expires_at <= time.time()
+        if stale and (not allow_stale or expires_at + self.max_stale_hours * 3600 <= time.time()):
+            return None
         
         try:
-            with open(cache_file, 'w') as f:
-                json.dump(scenic_points, f, indent=2)
+            cache_file = self._write_file(kind, region_id, value)
+            os.utime(cache_file, (written_at, written_at))
+            stat = cache_file.stat()
         except Exception as e:
-            print(f"[LOG] Error saving scenic cache for {region_id}: {e}")
+            print(f"[LOG] Error hydrating {kind} cache for {region_id} from Redis: {e}")
+        else:
+            with self._lock:
+                self._remember(cache_file, (stat.st_mtime_ns, stat.st_size), expires_at, value)
+        
+        with self._lock:
+            self.remote_hits += 1
+            if stale:
+                self.stale_hits += 1
+        return value
     
-    def get_feasible_pairs(self, region_id: str) -> Optional[List[Dict]]:
-        """Get cached feasible pairs for a region."""
-        cache_file = self.feasible_pairs_cache_dir / f"{region_id}.json"
+    def _write_file(self, kind: str, region_id: str, value: Any) -> Path:
+        """
+        Atomically write a region cache file in the configured format.
         
-        if not self._is_cache_valid(cache_file):
-            return None
+        Copies in other formats are removed so readers never see a stale one.
+        
+        Returns:
+            Path written
+        """
+        directory = self._cache_dir(kind)
+        cache_file = directory / f"{region_id}{FORMAT_SUFFIXES[self.file_format]}"
+        directory.mkdir(parents=True, exist_ok=True)
+        write_file(cache_file, value, self.file_format)
         
+        for suffix in FORMAT_SUFFIXES.values():
+            other = directory / f"{region_id}{suffix}"
+            if other != cache_file:
+                with self._lock:
+                    self._memory.pop(other, None)
+                try:
+                    other.unlink()
+                except FileNotFoundError:
+                    pass
+        return cache_file
+    
+    def _write_entry(self, kind: str, region_id: str, value: Any, use_ttl: bool = True) -> None:
+        """Write a region cache file, keeping the memory tier and Redis in step with it."""
+        written_at = None
         try:
-            with open(cache_file, 'r') as f:
-                return json.load(f)
+            cache_file = self._write_file(kind, region_id, value)
+            stat = cache_file.stat()
         except Exception as e:
-            print(f"[LOG] Error loading feasible pairs cache for {region_id}: {e}")
-            return None
+            print(f"[LOG] Error saving {kind} cache for {region_id}: {e}")
+            self._forget(self._cache_dir(kind), region_id)
+        else:
+            written_at = stat.st_mtime
+            expires_at = written_at + self.ttl_hours * 3600 if use_ttl else float('inf')
+            with self._lock:
+                self._remember(cache_file, (stat.st_mtime_ns, stat.st_size), expires_at, value)
+        
+        if self.redis_cache is not None:
+            self.redis_cache.set(
+                self._remote_key(kind, region_id),
+                value,
+                # Kept through the max-stale window so restarted hosts can serve it while refreshing
+                ttl_seconds=(self.ttl_hours + self.max_stale_hours) * 3600 if use_ttl else None,
+                written_at=written_at
+            )
+    
+    def _remember(self, cache_file: Path, signature: Tuple[int, int], expires_at: float, value: Any) -> None:
+        """Store a memory-tier entry, evicting the least recently used. Caller holds the lock."""
+        self._memory[cache_file] = (signature, expires_at, value)
+        self._memory.move_to_end(cache_file)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+    
+    def _forget(self, directory: Path, region_id: Optional[str] = None) -> None:
+        """Drop memory-tier entries for files in a directory (optionally one region's)."""
+        with self._lock:
+            for path in list(self._memory):
+                if path.parent == directory and (region_id is None or self._region_of(path) == region_id):
+                    del self._memory[path]
+    
+    def is_fresh(self, kind: str, region_id: str) -> bool:
+        """Whether a region cache file exists and is within its TTL, without reading it."""
+        return self._is_cache_valid(self._cache_file(kind, region_id))
+    
+    def get_scenic_points(self, region_id: str, allow_stale: bool = False) -> Optional[List[Dict]]:
+        """Get cached scenic points for a region (recently expired ones too if allow_stale)."""
+        return self._read_entry("scenic_points", region_id, allow_stale=allow_stale)
+    
+    def set_scenic_points(self, region_id: str, scenic_points: List[Dict]) -> None:
+        """Cache scenic points for a region."""
+        self._write_entry("scenic_points", region_id, scenic_points)
+    
+    def get_feasible_pairs(self, region_id: str, allow_stale: bool = False) -> Optional[List[Dict]]:
+        """Get cached feasible pairs for a region (recently expired ones too if allow_stale)."""
+        return self._read_entry("feasible_pairs", region_id, allow_stale=allow_stale)
     
     def set_feasible_pairs(self, region_id: str, feasible_pairs: List[Dict]) -> None:
         """Cache feasible pairs for a region."""
-        cache_file = self.feasible_pairs_cache_dir / f"{region_id}.json"
+        self._write_entry("feasible_pairs", region_id, feasible_pairs)
+    
+    def fill_lock(self, kind: str, region_id: str, timeout: Optional[float] = None) -> FillLock:
+        """
+        Lock for the single filler of a region cache entry.
+        
+        Args:
+            kind: Cache kind ("scenic_points" or "feasible_pairs")
+            region_id: Region being filled
+            timeout: Seconds to wait (0 = don't wait; defaults to CACHE_FILL_LOCK_TIMEOUT_S)
+        
+        Returns:
+            FillLock context manager that yields whether it was acquired
+        """
+        return FillLock(
+            f"{kind}:{region_id}",
+            self.lock_dir,
+            timeout=CACHE_FILL_LOCK_TIMEOUT_S if timeout is None else timeout,
+            redis_cache=self.redis_cache,
+            lease_seconds=CACHE_FILL_LOCK_LEASE_S
+        )
+    
+    def get_feasible_graph(self, region_id: str) -> Optional[FeasibleGraph]:
+        """
+        Get the cached CSR form of a region's feasible pairs.
+        
+        The graph is a sidecar of the feasible pairs file and is only returned
+        while that file can be served (within TTL or the max-stale window) and
+        is unchanged since the graph was derived.
+        """
+        pairs_file = self._cache_file("feasible_pairs", region_id)
+        graph_file = self.feasible_pairs_cache_dir / f"{region_id}.npz"
+        
+        if not graph_file.exists() or not self._is_cache_valid(pairs_file, allow_stale=True):
+            return None
+        
+        try:
+            graph = FeasibleGraph.load(graph_file)
+        except Exception as e:
+            print(f"[LOG] Error loading feasible graph for {region_id}: {e}")
+            return None
+        
+        if graph.source_mtime != pairs_file.stat().st_mtime:
+            return None
+        return graph
+    
+    def set_feasible_graph(self, region_id: str, graph: FeasibleGraph) -> None:
+        """Cache the CSR form of a region's feasible pairs next to the pairs file it was built from."""
+        pairs_file = self._cache_file("feasible_pairs", region_id)
+        graph_file = self.feasible_pairs_cache_dir / f"{region_id}.npz"
+        
+        if not pairs_file.exists():
+            return
         
         try:
-            with open(cache_file, 'w') as f:
-                json.dump(feasible_pairs, f, indent=2)
+            graph.save(graph_file, source_mtime=pairs_file.stat().st_mtime)
         except Exception as e:
-            print(f"[LOG] Error saving feasible pairs cache for {region_id}: {e}")
+            print(f"[LOG] Error saving feasible graph for {region_id}: {e}")
+    
+    def get_leg_store(self, region_id: str) -> Optional[Dict]:
+        """
+        Get the precomputed leg store for a region.
+        
+        The leg store is produced offline by prepare_regions.py and is not
+        subject to the cache TTL.
+        """
+        return self._read_entry("leg_store", region_id, use_ttl=False)
+    
+    def set_leg_store(self, region_id: str, leg_store: Dict) -> None:
+        """Save the precomputed leg store for a region."""
+        self._write_entry("leg_store", region_id, leg_store, use_ttl=False)
+    
+    def get_source_version(self, kind: str, region_id: str) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of one region cache file, or None if it is missing."""
+        try:
+            stat = self._cache_file(kind, region_id).stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def get_source_versions(self, region_id: str) -> Tuple[Optional[float], ...]:
+        """
+        Modification times of a region's cache files (None where missing).
+        
+        Used to tell whether data loaded from these files is still current.
+        """
+        versions = []
+        for kind in ("scenic_points", "feasible_pairs", "leg_store"):
+            cache_file = self._cache_file(kind, region_id)
+            try:
+                versions.append(cache_file.stat().st_mtime)
+            except OSError:
+                versions.append(None)
+        return tuple(versions)
     
     def invalidate_region_cache(self, region_id: str) -> None:
         """Invalidate all caches for a region."""
-        scenic_file = self.scenic_cache_dir / f"{region_id}.json"
-        feasible_file = self.feasible_pairs_cache_dir / f"{region_id}.json"
+        cache_files = [
+            directory / f"{region_id}{suffix}"
+            for directory in (self.scenic_cache_dir, self.feasible_pairs_cache_dir)
+            for suffix in FORMAT_SUFFIXES.values()
+        ]
+        cache_files.append(self.feasible_pairs_cache_dir / f"{region_id}.npz")
         
-        for cache_file in [scenic_file, feasible_file]:
+        self._forget(self.scenic_cache_dir, region_id)
+        self._forget(self.feasible_pairs_cache_dir, region_id)
+        if self.redis_cache is not None:
+            for kind in ("scenic_points", "feasible_pairs"):
+                self.redis_cache.delete_matching(self._remote_key(kind, region_id))
+        for cache_file in cache_files:
             if cache_file.exists():
                 try:
                     cache_file.unlink()
@@ -93,8 +419,13 @@ class CacheService:
     
     def clear_all_caches(self) -> None:
         """Clear all cached data."""
+        if self.redis_cache is not None:
+            for kind in ("scenic_points", "feasible_pairs"):
+                self.redis_cache.delete_matching(self._remote_key(kind, "*"))
+        
         for cache_dir in [self.scenic_cache_dir, self.feasible_pairs_cache_dir]:
-            for cache_file in cache_dir.glob("*.json"):
+            self._forget(cache_dir)
+            for cache_file in [*self._cache_files(cache_dir), *cache_dir.glob("*.npz")]:
                 try:
                     cache_file.unlink()
                     print(f"[LOG] Cleared cache: {cache_file}")
@@ -103,14 +434,28 @@ class CacheService:
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
+        with self._lock:
+            memory_stats = {
+                "entries": len(self._memory),
+                "max_entries": self.max_memory_entries,
+                "memory_hits": self.memory_hits,
+                "file_hits": self.file_hits,
+                "remote_hits": self.remote_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses
+            }
+        
         stats = {
             "scenic_cache": {},
-            "feasible_pairs_cache": {}
+            "feasible_pairs_cache": {},
+            "memory_cache": memory_stats
         }
+        if self.redis_cache is not None:
+            stats["redis_cache"] = self.redis_cache.get_stats()
         
         # Scenic cache stats
-        for cache_file in self.scenic_cache_dir.glob("*.json"):
-            region_id = cache_file.stem
+        for cache_file in self._cache_files(self.scenic_cache_dir):
+            region_id = self._region_of(cache_file)
             file_size = cache_file.stat().st_size
             file_age = datetime.now() - datetime.fromtimestamp(cache_file.stat().st_mtime)
             
@@ -121,8 +466,8 @@ class CacheService:
             }
         
         # Feasible pairs cache stats
-        for cache_file in self.feasible_pairs_cache_dir.glob("*.json"):
-            region_id = cache_file.stem
+        for cache_file in self._cache_files(self.feasible_pairs_cache_dir):
+            region_id = self._region_of(cache_file)
             file_size = cache_file.stat().st_size
             file_age = datetime.now() - datetime.fromtimestamp(cache_file.stat().st_mtime)
             
@@ -1,11 +1,31 @@
 """
 GeoAPIfy API client wrapper.
 """
+import hashlib
 import requests
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
-from ..config import GEOAPIFY_API_KEY
+from .http_session import get_shared_session, send_with_retries
+from .rate_limiter import RequestLimiter
+from .tiered_cache import TieredCache
+from .redis_cache import get_redis_cache
+from ..config import (
+    GEOAPIFY_API_KEY,
+    GEOAPIFY_MAX_CONCURRENCY,
+    GEOAPIFY_RATE_LIMIT_PER_SEC,
+    ROUTE_LEG_CACHE_DIR,
+    ROUTE_LEG_CACHE_TTL_HOURS,
+    ROUTE_LEG_CACHE_MEMORY_ENTRIES,
+    ROUTE_LEG_CACHE_MAX_DISK_MB,
+    ROUTE_LEG_CACHE_PRECISION,
+    CACHE_REDIS_MAX_ENTRY_BYTES,
+    CACHE_REDIS_ENTRY_TTL_HOURS,
+)
+
+
+# Geoapify limits are per API key, so every client in the process shares one limiter
+geoapify_limiter = RequestLimiter(GEOAPIFY_RATE_LIMIT_PER_SEC, GEOAPIFY_MAX_CONCURRENCY)
 
 
 @dataclass
@@ -19,10 +39,23 @@ class RouteResult:
 class GeoAPIfyClient:
     """Client for GeoAPIfy API."""
     
-    def __init__(self, api_key: str = None):
+    def __init__(
+        self, 
+        api_key: str = None, 
+        leg_cache: Optional[TieredCache] = None, 
+        session: Optional[requests.Session] = None
+    ):
         self.api_key = api_key or GEOAPIFY_API_KEY
+        self.session = session or get_shared_session()
         self.base_url = "https://api.geoapify.com/v1"
         self.places_url = "https://api.geoapify.com/v2/places"
+        self.leg_cache = leg_cache
+    
+    @staticmethod
+    def leg_cache_key(waypoints: List[Tuple[float, float]], mode: str) -> str:
+        """Content address for a routing request: rounded (lat, lon) waypoints plus mode."""
+        parts = [f"{lat:.{ROUTE_LEG_CACHE_PRECISION}f},{lon:.{ROUTE_LEG_CACHE_PRECISION}f}" for lat, lon in waypoints]
+        return hashlib.sha1(f"{mode}|{'|'.join(parts)}".encode()).hexdigest()
     
     def get_route(self, waypoints: List[Tuple[float, float]], mode: str = "hike") -> Optional[RouteResult]:
         """
@@ -38,6 +71,17 @@ class GeoAPIfyClient:
         if len(waypoints) < 2:
             return None
         
+        cache_key = None
+        if self.leg_cache is not None:
+            cache_key = self.leg_cache_key(waypoints, mode)
+            cached = self.leg_cache.get(cache_key)
+            if cached is not None:
+                return RouteResult(
+                    properties=cached['properties'],
+                    geometry=cached['geometry'],
+                    coords=self._extract_coords_from_geometry(cached['geometry'])
+                )
+        
         # Format waypoints for API
         wp_str = "|".join([f"{lat},{lon}" for lat, lon in waypoints])
         
@@ -49,7 +93,9 @@ class GeoAPIfyClient:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = send_with_retries(
+                lambda: self.session.get(url, params=params, timeout=30), geoapify_limiter
+            )
             response.raise_for_status()
             
             data = response.json()
@@ -59,6 +105,12 @@ class GeoAPIfyClient:
             feature = data['features'][0]
             coords = self._extract_coords_from_geometry(feature['geometry'])
             
+            if cache_key is not None:
+                self.leg_cache.set(cache_key, {
+                    'properties': feature['properties'],
+                    'geometry': feature['geometry']
+                })
+            
             return RouteResult(
                 properties=feature['properties'],
                 geometry=feature['geometry'],
@@ -90,7 +142,9 @@ class GeoAPIfyClient:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = send_with_retries(
+                lambda: self.session.get(url, params=params, timeout=30), geoapify_limiter
+            )
             response.raise_for_status()
             
             data = response.json()
@@ -128,3 +182,16 @@ class GeoAPIfyClient:
                 coords.extend([(float(pt[0]), float(pt[1])) for pt in line])
         
         return coords
+
+
+# Process-wide route leg cache shared by every RoutePlanner in this process
+route_leg_cache = TieredCache(
+    ROUTE_LEG_CACHE_DIR,
+    ttl_hours=ROUTE_LEG_CACHE_TTL_HOURS,
+    max_memory_entries=ROUTE_LEG_CACHE_MEMORY_ENTRIES,
+    max_disk_bytes=ROUTE_LEG_CACHE_MAX_DISK_MB * 1024 * 1024,
+    remote=get_redis_cache(),
+    remote_namespace="route_legs",
+    remote_max_bytes=CACHE_REDIS_MAX_ENTRY_BYTES,
+    remote_ttl_hours=CACHE_REDIS_ENTRY_TTL_HOURS
+)
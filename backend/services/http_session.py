@@ -0,0 +1,120 @@
+"""
+Process-wide pooled HTTP session for outbound API calls.
+"""
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limiter import RequestLimiter
+from ..config import HTTP_POOL_SIZE, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR, HTTP_MAX_RETRY_AFTER_S
+
+# Transient statuses worth retrying: rate limiting and upstream/server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def create_session(pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """
+    Create a keep-alive session with a connection pool.
+
+    The adapter does not retry: retries go through send_with_retries so
+    each attempt takes its own rate limiter slot.
+
+    Args:
+        pool_size: Connections kept open per host
+
+    Returns:
+        Configured requests.Session
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _retry_delay(response: Optional[requests.Response], attempt: int, backoff_factor: float) -> float:
+    """Seconds to wait before the next attempt: Retry-After for 429/503, else exponential backoff."""
+    if response is not None and response.status_code in (429, 503):
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+    return backoff_factor * (2 ** attempt)
+
+
+def send_with_retries(
+    send: Callable[[], requests.Response],
+    limiter: RequestLimiter,
+    max_retries: int = HTTP_MAX_RETRIES,
+    backoff_factor: float = HTTP_BACKOFF_FACTOR,
+    max_retry_after: float = HTTP_MAX_RETRY_AFTER_S
+) -> requests.Response:
+    """
+    Send a request through a limiter, retrying connection errors and RETRY_STATUSES.
+
+    Each attempt acquires its own limiter slot, so retries count against the
+    rate limit, and backoff sleeps happen with no slot held.
+
+    Args:
+        send: Makes one attempt (e.g. a bound session.get call)
+        limiter: Limiter for the target host
+        max_retries: Retries after the first attempt
+        backoff_factor: Exponential backoff base in seconds (Retry-After is honoured for 429/503)
+        max_retry_after: Longest wait before a retry; a response asking for longer is returned as is
+
+    Returns:
+        The last response; connection errors from the last attempt are raised
+    """
+    for attempt in range(max_retries + 1):
+        response = None
+        try:
+            with limiter:
+                response = send()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == max_retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+        delay = _retry_delay(response, attempt, backoff_factor)
+        if response is not None:
+            if delay > max_retry_after:
+                return response
+            response.close()
+        time.sleep(delay)
+    return response
+
+
+def get_shared_session() -> requests.Session:
+    """Get the session shared by every API client in this process, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def _reset_after_fork() -> None:
+    """Drop pooled connections inherited from the parent, so a forked child never shares its sockets."""
+    global _session_lock
+    _session_lock = threading.Lock()
+    if _session is not None:
+        _session.close()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,11 +1,46 @@
 """
 OpenStreetMap Overpass API client wrapper.
 """
+import math
 import requests
-from typing import Dict, List, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
-from ..config import OVERPASS_API_URL
+import numpy as np
+
+from .http_session import get_shared_session, send_with_retries
+from .rate_limiter import get_host_limiter
+from .tiered_cache import TieredCache
+from .redis_cache import get_redis_cache
+from ..config import (
+    OVERPASS_API_URL,
+    OVERPASS_BATCHED,
+    OVERPASS_TIMEOUT_S,
+    OVERPASS_MAX_CONCURRENCY,
+    OVERPASS_RATE_LIMIT_PER_SEC,
+    SURFACE_INDEX_DIR,
+    SURFACE_CACHE_DIR,
+    SURFACE_CACHE_TTL_HOURS,
+    SURFACE_CACHE_MEMORY_ENTRIES,
+    SURFACE_CACHE_MAX_DISK_MB,
+    SURFACE_CACHE_CELL_M,
+    SURFACE_SAMPLE_SPACING_M,
+    SURFACE_SAMPLE_BEND_DEG,
+    SURFACE_SAMPLE_MAX,
+    CACHE_REDIS_MAX_ENTRY_BYTES,
+    CACHE_REDIS_ENTRY_TTL_HOURS,
+)
+from ..utils.geometry import distance_to_polyline_km, sample_polyline, to_local_km
+from ..utils.surface_index import SurfaceIndex
+
+# Search radius around each sampled coordinate, matching the per-point query
+SURFACE_SEARCH_RADIUS_M = 50
+
+# Metres per degree of latitude, for snapping samples to surface cache cells
+METRES_PER_DEG_LAT = 111320.0
 
 
 @dataclass
@@ -21,66 +56,277 @@ class SurfaceData:
 class OSMClient:
     """Client for OpenStreetMap Overpass API."""
     
-    def __init__(self, api_url: str = None):
+    def __init__(
+        self,
+        api_url: str = None,
+        batched: bool = None,
+        session: Optional[requests.Session] = None,
+        surface_index_dir: Optional[Path] = None,
+        surface_cache: Optional[TieredCache] = None
+    ):
         self.api_url = api_url or OVERPASS_API_URL
+        self.batched = OVERPASS_BATCHED if batched is None else batched
+        self.session = session or get_shared_session()
+        # Shared with every other client of the same Overpass host
+        self.limiter = get_host_limiter(self.api_url, OVERPASS_RATE_LIMIT_PER_SEC, OVERPASS_MAX_CONCURRENCY)
+        self.surface_index_dir = Path(surface_index_dir or SURFACE_INDEX_DIR)
+        self._surface_indexes: Dict[str, Tuple[float, SurfaceIndex]] = {}
+        self._surface_index_lock = threading.Lock()
+        self.surface_cache = surface_cache
     
-    def get_surface_data(self, coordinates: List[Tuple[float, float]], sample_size: int = 10) -> List[SurfaceData]:
+    def get_surface_data(
+        self,
+        coordinates: List[Tuple[float, float]],
+        sample_size: Optional[int] = None,
+        region_id: Optional[str] = None
+    ) -> List[SurfaceData]:
         """
         Get surface type data along route coordinates.
         
+        Uses the region's local surface index when one has been built
+        (see prepare_regions.py --surface-source), otherwise the surface
+        cell cache, querying Overpass only for samples in uncached cells.
+        
         Args:
             coordinates: List of (lon, lat) coordinate tuples
-            sample_size: Number of coordinates to sample for API calls
+            sample_size: Take this many evenly spaced vertices instead of adaptive
+                sampling by distance (SURFACE_SAMPLE_SPACING_M) plus sharp bends
+            region_id: Region whose local surface index to use, if available
         
         Returns:
             List of SurfaceData objects
         """
         # Sample coordinates to avoid too many API calls
-        if len(coordinates) > sample_size:
+        if sample_size is None:
+            sample_coords = sample_polyline(
+                coordinates,
+                spacing_m=SURFACE_SAMPLE_SPACING_M,
+                # Samples closer than this would have overlapping search buffers
+                min_separation_m=2 * SURFACE_SEARCH_RADIUS_M,
+                bend_angle_deg=SURFACE_SAMPLE_BEND_DEG,
+                max_samples=SURFACE_SAMPLE_MAX
+            )
+        elif len(coordinates) > sample_size:
             step = len(coordinates) // sample_size
             sample_coords = coordinates[::step]
         else:
             sample_coords = coordinates
         
-        surface_data = []
+        if not sample_coords:
+            return []
         
-        for coord in sample_coords:
-            lon, lat = coord
-            
-            # Overpass API query for ways near this coordinate with surface tags
-            overpass_query = f"""
-            [out:json][timeout:25];
-            (
-              way(around:50,{lat},{lon})["surface"];
-              way(around:50,{lat},{lon})["highway"];
-              way(around:50,{lat},{lon})["tracktype"];
-            );
-            out tags;
-            """
+        surface_index = self.get_surface_index(region_id) if region_id else None
+        if surface_index is not None:
+            return self._get_surface_data_local(surface_index, sample_coords)
+        
+        # Per-sample results; None marks samples that still need a network query
+        results: List[Optional[List[SurfaceData]]] = [None] * len(sample_coords)
+        if self.surface_cache is not None:
+            for i, (lon, lat) in enumerate(sample_coords):
+                cached = self.surface_cache.get(self.surface_cell_key(lon, lat))
+                if cached is not None:
+                    results[i] = [
+                        SurfaceData(surface=surface, highway=highway, tracktype=tracktype, lat=lat, lon=lon)
+                        for surface, highway, tracktype in cached
+                    ]
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            missing_coords = [sample_coords[i] for i in missing]
+            if self.batched:
+                fetched = self._get_surface_data_batched(missing_coords)
+            else:
+                fetched = self._get_surface_data_per_point(missing_coords)
             
+            for i, sample_data in zip(missing, fetched):
+                results[i] = sample_data
+                # Failed lookups stay uncached; empty results are cached so bare ground is not re-queried
+                if sample_data is not None and self.surface_cache is not None:
+                    lon, lat = sample_coords[i]
+                    self.surface_cache.set(
+                        self.surface_cell_key(lon, lat),
+                        [[data.surface, data.highway, data.tracktype] for data in sample_data]
+                    )
+        
+        return [data for sample_data in results if sample_data for data in sample_data]
+    
+    @staticmethod
+    def surface_cell_key(lon: float, lat: float) -> str:
+        """
+        Key of the SURFACE_CACHE_CELL_M grid cell containing a coordinate.
+        
+        Cells are roughly square: longitude steps are scaled by the cosine of
+        the cell row's latitude.
+        """
+        row = math.floor(lat * METRES_PER_DEG_LAT / SURFACE_CACHE_CELL_M)
+        row_lat = (row + 0.5) * SURFACE_CACHE_CELL_M / METRES_PER_DEG_LAT
+        col = math.floor(lon * METRES_PER_DEG_LAT * math.cos(math.radians(row_lat)) / SURFACE_CACHE_CELL_M)
+        return f"{row}_{col}"
+    
+    def surface_index_path(self, region_id: str) -> Path:
+        """Path of the local surface index file for a region."""
+        return self.surface_index_dir / f"{region_id}.npz"
+    
+    def get_surface_index(self, region_id: str) -> Optional[SurfaceIndex]:
+        """
+        Load a region's local surface index, reloading it if the file has changed.
+        
+        Returns:
+            SurfaceIndex, or None if no index has been built for the region
+        """
+        path = self.surface_index_path(region_id)
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        
+        with self._surface_index_lock:
+            cached = self._surface_indexes.get(region_id)
+            if cached and cached[0] == mtime:
+                return cached[1]
             try:
-                response = requests.post(
+                surface_index = SurfaceIndex.load(path)
+            except Exception as e:
+                print(f"[LOG] Error loading surface index for {region_id}: {e}")
+                return None
+            self._surface_indexes[region_id] = (mtime, surface_index)
+            return surface_index
+    
+    @staticmethod
+    def _get_surface_data_local(surface_index: SurfaceIndex, sample_coords: List[Tuple[float, float]]) -> List[SurfaceData]:
+        """Answer surface queries from a local index, with the same radius as the Overpass query."""
+        surface_data = []
+        for lon, lat in sample_coords:
+            for surface, highway, tracktype in surface_index.query(lat, lon, SURFACE_SEARCH_RADIUS_M):
+                surface_data.append(SurfaceData(
+                    surface=surface or 'unknown',
+                    highway=highway,
+                    tracktype=tracktype,
+                    lat=lat,
+                    lon=lon
+                ))
+        return surface_data
+    
+    def _get_surface_data_batched(self, sample_coords: List[Tuple[float, float]]) -> List[Optional[List[SurfaceData]]]:
+        """
+        Query every sample in one Overpass request and map the returned ways back to samples locally.
+        
+        The query is the union of the per-point queries, with way geometry
+        included so each way can be matched to the samples it passes within
+        SURFACE_SEARCH_RADIUS_M of.
+        """
+        clauses = []
+        for lon, lat in sample_coords:
+            for tag in ("surface", "highway", "tracktype"):
+                clauses.append(f'  way(around:{SURFACE_SEARCH_RADIUS_M},{lat},{lon})["{tag}"];')
+        
+        overpass_query = "[out:json][timeout:25];\n(\n" + "\n".join(clauses) + "\n);\nout tags geom;\n"
+        
+        try:
+            response = send_with_retries(
+                lambda: self.session.post(self.api_url, data=overpass_query, timeout=OVERPASS_TIMEOUT_S),
+                self.limiter
+            )
+            if response.status_code != 200:
+                print(f"[LOG] OSM batched query returned HTTP {response.status_code}")
+                return [None] * len(sample_coords)
+            elements = response.json().get('elements', [])
+        except Exception as e:
+            print(f"[LOG] OSM batched query error for {len(sample_coords)} points: {e}")
+            return [None] * len(sample_coords)
+        
+        return self._match_ways_to_samples(sample_coords, elements)
+    
+    @staticmethod
+    def _match_ways_to_samples(sample_coords: List[Tuple[float, float]], elements: List[Dict]) -> List[List[SurfaceData]]:
+        """Collect, per sample, one SurfaceData for each way passing within the search radius."""
+        lat0 = float(np.mean([lat for _, lat in sample_coords]))
+        samples_km = to_local_km([lon for lon, _ in sample_coords], [lat for _, lat in sample_coords], lat0)
+        # Small slack for the local projection versus Overpass' great-circle distances
+        radius_km = SURFACE_SEARCH_RADIUS_M * 1.02 / 1000
+        
+        matches: List[List[SurfaceData]] = [[] for _ in sample_coords]
+        for element in elements:
+            geometry = element.get('geometry')
+            if not geometry:
+                continue
+            way_km = to_local_km([node['lon'] for node in geometry], [node['lat'] for node in geometry], lat0)
+            near = distance_to_polyline_km(samples_km, way_km) <= radius_km
+            
+            tags = element.get('tags', {})
+            for i in np.nonzero(near)[0]:
+                lon, lat = sample_coords[i]
+                matches[i].append(SurfaceData(
+                    surface=tags.get('surface', 'unknown'),
+                    highway=tags.get('highway', ''),
+                    tracktype=tags.get('tracktype', ''),
+                    lat=lat,
+                    lon=lon
+                ))
+        
+        return matches
+    
+    def _get_surface_data_per_point(self, sample_coords: List[Tuple[float, float]]) -> List[Optional[List[SurfaceData]]]:
+        """Query Overpass once per sampled coordinate, a few at a time; failed samples are None."""
+        if len(sample_coords) == 1:
+            return [self._query_point(*sample_coords[0])]
+        
+        with ThreadPoolExecutor(max_workers=min(OVERPASS_MAX_CONCURRENCY, len(sample_coords))) as executor:
+            return list(executor.map(lambda coord: self._query_point(*coord), sample_coords))
+    
+    def _query_point(self, lon: float, lat: float) -> Optional[List[SurfaceData]]:
+        """Query Overpass for ways near one coordinate."""
+        # Overpass API query for ways near this coordinate with surface tags
+        overpass_query = f"""
+        [out:json][timeout:25];
+        (
+          way(around:{SURFACE_SEARCH_RADIUS_M},{lat},{lon})["surface"];
+          way(around:{SURFACE_SEARCH_RADIUS_M},{lat},{lon})["highway"];
+          way(around:{SURFACE_SEARCH_RADIUS_M},{lat},{lon})["tracktype"];
+        );
+        out tags;
+        """
+        
+        try:
+            response = send_with_retries(
+                lambda: self.session.post(
                     self.api_url,
                     data=overpass_query,
                     timeout=10
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    for element in data.get('elements', []):
-                        tags = element.get('tags', {})
-                        
-                        surface_data.append(SurfaceData(
-                            surface=tags.get('surface', 'unknown'),
-                            highway=tags.get('highway', ''),
-                            tracktype=tags.get('tracktype', ''),
-                            lat=lat,
-                            lon=lon
-                        ))
-                            
-            except Exception as e:
-                print(f"[LOG] OSM query error for {lat},{lon}: {e}")
-                continue
+                ),
+                self.limiter
+            )
+            
+            if response.status_code != 200:
+                return None
+            data = response.json()
+        except Exception as e:
+            print(f"[LOG] OSM query error for {lat},{lon}: {e}")
+            return None
+        
+        surface_data = []
+        for element in data.get('elements', []):
+            tags = element.get('tags', {})
+            
+            surface_data.append(SurfaceData(
+                surface=tags.get('surface', 'unknown'),
+                highway=tags.get('highway', ''),
+                tracktype=tags.get('tracktype', ''),
+                lat=lat,
+                lon=lon
+            ))
         
         return surface_data
+
+
+# Process-wide surface cell cache shared by every RoutePlanner in this process
+surface_cell_cache = TieredCache(
+    SURFACE_CACHE_DIR,
+    ttl_hours=SURFACE_CACHE_TTL_HOURS,
+    max_memory_entries=SURFACE_CACHE_MEMORY_ENTRIES,
+    max_disk_bytes=SURFACE_CACHE_MAX_DISK_MB * 1024 * 1024,
+    remote=get_redis_cache(),
+    remote_namespace="surface_cells",
+    remote_max_bytes=CACHE_REDIS_MAX_ENTRY_BYTES,
+    remote_ttl_hours=CACHE_REDIS_ENTRY_TTL_HOURS
+)
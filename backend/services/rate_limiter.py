@@ -0,0 +1,57 @@
+"""
+Thread-safe request limiter for outbound API calls.
+"""
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+
+class RequestLimiter:
+    """
+    Caps concurrent requests and spaces request starts to a maximum rate.
+
+    Use as a context manager around each outbound call; it is safe to share
+    one instance between threads.
+    """
+
+    def __init__(self, rate_per_sec: float, max_concurrency: int):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def __enter__(self):
+        self._slots.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._slots.release()
+        return False
+
+
+_host_limiters: Dict[str, RequestLimiter] = {}
+_host_limiters_lock = threading.Lock()
+
+
+def get_host_limiter(url: str, rate_per_sec: float, max_concurrency: int) -> RequestLimiter:
+    """
+    Get the process-wide limiter for a URL's host, creating it on first use.
+
+    Every client talking to the same host shares one limiter, so politeness
+    limits hold however many clients or threads there are. The limits given
+    on first use for a host win.
+    """
+    host = urlparse(url).netloc or url
+    with _host_limiters_lock:
+        limiter = _host_limiters.get(host)
+        if limiter is None:
+            limiter = RequestLimiter(rate_per_sec, max_concurrency)
+            _host_limiters[host] = limiter
+        return limiter
@@ -0,0 +1,170 @@
+"""
+Redis-backed cache tier shared by the web and worker processes.
+"""
+import json
+import math
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+
+from ..config import CACHE_REDIS_URL, CACHE_BACKEND, CACHE_REDIS_PREFIX, CACHE_REDIS_COMPRESS_MIN_BYTES
+
+# One-byte payload headers
+_RAW = b"j"
+_ZLIB = b"z"
+
+
+class RedisCache:
+    """
+    JSON values in Redis under namespaced keys, with TTL and zlib compression.
+
+    Keys are "<prefix>:<key>", where callers namespace key themselves (e.g.
+    "region:lake_district:feasible_pairs" or "route_legs:<digest>"). Each value
+    is stored with the time it was first written so that local tiers hydrated
+    from Redis keep the original age. Redis errors are logged and treated as
+    misses, so an outage only costs recomputation.
+    """
+
+    def __init__(
+        self,
+        conn: redis.Redis,
+        prefix: str = CACHE_REDIS_PREFIX,
+        compress_min_bytes: int = CACHE_REDIS_COMPRESS_MIN_BYTES
+    ):
+        self.conn = conn
+        self.prefix = prefix
+        self.compress_min_bytes = compress_min_bytes
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.oversized = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Get a value together with the time it was written.
+
+        Args:
+            key: Namespaced key (without the global prefix)
+
+        Returns:
+            (value, written_at) tuple, or None on a miss or error
+        """
+        try:
+            blob = self.conn.get(self._key(key))
+        except redis.RedisError as e:
+            print(f"[LOG] Error reading Redis cache entry {key}: {e}")
+            self._count("errors")
+            return None
+
+        if blob is None:
+            self._count("misses")
+            return None
+
+        try:
+            data = zlib.decompress(blob[1:]) if blob[:1] == _ZLIB else blob[1:]
+            payload = json.loads(data)
+        except Exception as e:
+            print(f"[LOG] Error decoding Redis cache entry {key}: {e}")
+            self._count("errors")
+            return None
+
+        self._count("hits")
+        return payload["v"], payload["t"]
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, or None on a miss or error."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        written_at: Optional[float] = None,
+        max_bytes: Optional[int] = None
+    ) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Namespaced key (without the global prefix)
+            value: JSON-serialisable value
+            ttl_seconds: Lifetime counted from written_at (None keeps it until deleted)
+            written_at: When the value was produced (defaults to now)
+            max_bytes: Skip values whose stored (compressed) size exceeds this
+        """
+        written_at = time.time() if written_at is None else written_at
+        expire = None
+        if ttl_seconds is not None:
+            # Redis expiries are whole seconds; an already-expired value is not stored
+            remaining = written_at + ttl_seconds - time.time()
+            if remaining <= 0:
+                return
+            expire = max(1, math.ceil(remaining))
+
+        data = json.dumps({"t": written_at, "v": value}, separators=(',', ':')).encode()
+        blob = _ZLIB + zlib.compress(data) if len(data) >= self.compress_min_bytes else _RAW + data
+        if max_bytes is not None and len(blob) > max_bytes:
+            self._count("oversized")
+            return
+
+        try:
+            self.conn.set(self._key(key), blob, ex=expire)
+        except redis.RedisError as e:
+            print(f"[LOG] Error writing Redis cache entry {key}: {e}")
+            self._count("errors")
+
+    def delete_matching(self, pattern: str) -> None:
+        """Delete every key matching a glob pattern (without the global prefix)."""
+        try:
+            keys = list(self.conn.scan_iter(match=self._key(pattern), count=500))
+            if keys:
+                self.conn.delete(*keys)
+        except redis.RedisError as e:
+            print(f"[LOG] Error deleting Redis cache entries {pattern}: {e}")
+            self._count("errors")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/error counters."""
+        with self._lock:
+            return {
+                "prefix": self.prefix,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "oversized": self.oversized
+            }
+
+
+_shared_cache: Optional[RedisCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_redis_cache() -> Optional[RedisCache]:
+    """
+    Get the process-wide Redis cache tier.
+
+    Returns:
+        RedisCache on CACHE_REDIS_URL when CACHE_BACKEND is "redis", otherwise None
+    """
+    global _shared_cache
+    if CACHE_BACKEND != "redis":
+        return None
+
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = RedisCache(redis.from_url(CACHE_REDIS_URL))
+        return _shared_cache
@@ -1,35 +1,90 @@
 """
 Unified route planner service for all regions.
 """
-import random
 import json
-from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 from pathlib import Path
 
+import numpy as np
+
 from ..models.region import Region
+from ..models.region_dataset import RegionDataset
+from ..models.waypoint_store import WaypointStore
+from ..models.feasible_graph import FeasibleGraph
 from ..regions.registry import region_registry
-from ..services.geoapify_client import GeoAPIfyClient, RouteResult
-from ..services.osm_client import OSMClient
+from ..services.geoapify_client import GeoAPIfyClient, RouteResult, route_leg_cache
+from ..services.osm_client import OSMClient, surface_cell_cache
 from ..services.cache_service import CacheService
-from ..utils.geometry import calculate_route_overlap, find_best_scenic_midpoint, calculate_feasible_pairs
+from ..utils.geometry import (
+    calculate_route_overlap,
+    find_best_scenic_midpoint,
+    calculate_feasible_pairs,
+    simplify_polyline,
+)
+from ..utils.spatial_index import ScenicPointIndex
+from ..utils.itinerary_search import ItinerarySearch
+from ..utils.overlap_estimator import estimate_itinerary_overlap
 from ..utils.terrain_analysis import analyze_surface_types
-from ..config import SCENIC_SEARCH_RADIUS_KM, DEFAULT_MAX_TRIES, DEFAULT_GOOD_ENOUGH_THRESHOLD
+from ..config import (
+    SCENIC_SEARCH_RADIUS_KM,
+    DEFAULT_MAX_TRIES,
+    DEFAULT_GOOD_ENOUGH_THRESHOLD,
+    DEFAULT_SPECULATIVE_ATTEMPTS,
+    SPECULATIVE_ATTEMPTS_MAX,
+    GEOJSON_SIMPLIFY_TOLERANCE_M,
+    GEOAPIFY_MAX_CONCURRENCY,
+    ITINERARY_CANDIDATE_POOL,
+    OVERLAP_GRID_M,
+    SURFACE_LOOKUP_WORKERS,
+    CACHE_REFRESH_MODE,
+    CACHE_REFRESH_RETRY_S,
+)
+
+
+@dataclass
+class RouteContext:
+    """Region data shared by every attempt of a route generation job."""
+    region: Region
+    num_days: int
+    waypoints: WaypointStore
+    node_waypoints: np.ndarray
+    itinerary_search: ItinerarySearch
+    scenic_points: List[Dict]
+    scenic_index: ScenicPointIndex
+    leg_store: Optional[Dict]
+    # Itineraries as feasible-graph node IDs; node_waypoints maps them onto the waypoint store
+    candidates: List[List[int]] = field(default_factory=list)
+    tried_itineraries: Set[Tuple[int, ...]] = field(default_factory=set)
+    lock: threading.Lock = field(default_factory=threading.Lock)
 
 
 class RoutePlanner:
     """Unified route planner for all regions."""
     
-    def __init__(self):
-        self.geoapify_client = GeoAPIfyClient()
-        self.osm_client = OSMClient()
+    def __init__(self, max_concurrency: int = None, refresh_mode: str = None):
+        self.max_concurrency = max_concurrency or GEOAPIFY_MAX_CONCURRENCY
+        self.geoapify_client = GeoAPIfyClient(leg_cache=route_leg_cache)
+        self.osm_client = OSMClient(surface_cache=surface_cell_cache)
         self.cache_service = CacheService()
+        # region -> (scenic cache file version, point count, index)
+        self._scenic_indexes: Dict[str, Tuple[Optional[Tuple[int, int]], int, ScenicPointIndex]] = {}
+        self._datasets: Dict[str, RegionDataset] = {}
+        self._datasets_lock = threading.Lock()
+        self.refresh_mode = refresh_mode or CACHE_REFRESH_MODE
+        self._refresh_scheduled: Dict[Tuple[str, str], float] = {}
+        self._refresh_lock = threading.Lock()
     
     def generate_route(
         self, 
         region_id: str, 
         num_days: int = None, 
         max_tries: int = None, 
-        good_enough_threshold: float = None
+        good_enough_threshold: float = None,
+        speculative_attempts: int = None
     ) -> Optional[Dict]:
         """
         Generate a hiking route for a region.
@@ -39,6 +94,7 @@ class RoutePlanner:
             num_days: Number of days for the route
             max_tries: Maximum number of attempts
             good_enough_threshold: Threshold for early termination
+            speculative_attempts: Number of attempts to run in parallel, up to SPECULATIVE_ATTEMPTS_MAX (1 runs them sequentially)
         
         Returns:
             Route data or None if failed
@@ -52,136 +108,61 @@ class RoutePlanner:
         num_days = num_days or region.route_params.default_days
         max_tries = max_tries or DEFAULT_MAX_TRIES
         good_enough_threshold = good_enough_threshold or DEFAULT_GOOD_ENOUGH_THRESHOLD
+        speculative_attempts = min(max(speculative_attempts or DEFAULT_SPECULATIVE_ATTEMPTS, 1), SPECULATIVE_ATTEMPTS_MAX)
         
         print(f"[LOG] Starting {region.name} route generation")
         
-        # Load waypoints
-        waypoints = region_registry.load_waypoints(region_id)
-        
-        # Build lookup keyed the same way as feasible pair IDs (name with coords fallback)
-        def _waypoint_key(wp: Dict) -> str:
-            props = wp.get('properties', {})
-            geom = wp.get('geometry', {})
-            coords = geom.get('coordinates', [None, None])
-            lon, lat = coords[0], coords[1]
-            wp_id = props.get('id') or props.get('osm_id') or props.get('ref')
-            if not wp_id:
-                name = props.get('name', 'Unnamed')
-                wp_id = f"{name}:{round(lat, 5)},{round(lon, 5)}"
-            return str(wp_id)
-        
-        waypoint_by_key: Dict[str, Dict] = {}
-        id_to_name: Dict[str, str] = {}
-        for wp in waypoints:
-            key = _waypoint_key(wp)
-            waypoint_by_key[key] = wp
-            id_to_name[key] = wp.get('properties', {}).get('name', key)
-        
-        # Get feasible pairs
-        feasible_pairs = self._get_feasible_pairs(region_id, waypoints)
-        if not feasible_pairs:
+        # Region data is loaded once per process and reused until its files change
+        dataset = self.get_dataset(region_id)
+        if not dataset.graph.num_edges:
             print("[LOG] No feasible pairs found")
             return None
         
-        print(f"[LOG] Found {len(feasible_pairs)} feasible pairs")
+        print(f"[LOG] Found {dataset.graph.num_edges} feasible pairs")
+        print(f"[LOG] Found {len(dataset.scenic_points)} scenic points")
         
-        # Get scenic points
-        scenic_points = self._get_scenic_points(region_id)
-        print(f"[LOG] Found {len(scenic_points)} scenic points")
-        
-        # Create lookup dictionary for faster access
-        feasible_next_steps = {}
-        for pair in feasible_pairs:
-            start = pair['from']
-            end = pair['to']
-            if start not in feasible_next_steps:
-                feasible_next_steps[start] = []
-            feasible_next_steps[start].append(end)
-        
-        best_score = float('inf')
-        best_route = None
-        
-        # Try to generate a valid route
-        for attempt in range(max_tries):
-            print(f"[LOG] Try {attempt + 1}/{max_tries}")
-            
-            # Start with a random waypoint ID that has feasible next steps and exists in waypoints
-            valid_starts = [wp_id for wp_id in feasible_next_steps.keys() if wp_id in waypoint_by_key]
-            if not valid_starts:
-                print("[LOG] No valid starting points found")
-                break
-            
-            current_id = random.choice(valid_starts)
-            route_names = [id_to_name.get(current_id, current_id)]
-            used_ids = {current_id}
-            route_legs = []
-            scenic_midpoints = []
-            
-            # Build route day by day
-            for day in range(num_days):
-                print(f"[LOG]  Day {day + 1}: Generating leg from {current_id}")
-                
-                # Get possible next steps from feasible pairs
-                if current_id not in feasible_next_steps:
-                    print(f"[LOG]  No feasible next steps from {current_id}")
-                    break
-                
-                next_steps = [next_point for next_point in feasible_next_steps[current_id] 
-                             if next_point not in used_ids and next_point in waypoint_by_key]
-                
-                if not next_steps:
-                    print(f"[LOG]  No unused feasible next steps from {current_id}")
-                    break
-                
-                # Choose a random next step from feasible options
-                next_id = random.choice(next_steps)
-                
-                # Get coordinates for current and next point
-                current_coords = waypoint_by_key[current_id]['geometry']['coordinates']
-                next_coords = waypoint_by_key[next_id]['geometry']['coordinates']
-                
-                # Find scenic midpoint
-                midpoint = find_best_scenic_midpoint(
-                    (current_coords[1], current_coords[0]),  # (lat, lon)
-                    (next_coords[1], next_coords[0]),        # (lat, lon)
-                    scenic_points,
-                    SCENIC_SEARCH_RADIUS_KM
-                )
-                
-                # Get route between current and next point, via midpoint if available
-                route_data = self._get_route_with_midpoint(
-                    current_coords, next_coords, midpoint, region.route_params.mode
-                )
-                if not route_data:
-                    print(f"[LOG]  No route found from {current_id} to {next_id}")
-                    break
-                
-                # Add to route
-                route_names.append(id_to_name.get(next_id, next_id))
-                used_ids.add(next_id)
-                route_legs.append(route_data)
-                # Always align scenic_midpoints length with legs
-                scenic_midpoints.append(midpoint if midpoint else None)
-                current_id = next_id
+        # Precomputed legs (prepare_regions.py --legs) avoid routing calls entirely
+        if dataset.leg_store:
+            print(f"[LOG] Using leg store with {len(dataset.leg_store.get('legs', {}))} precomputed legs")
+        
+        # Only sample itineraries that are guaranteed complete before paying for any routing
+        itinerary_search = ItinerarySearch(dataset.graph, num_days)
+        if not itinerary_search.starts:
+            print(f"[LOG] No {num_days}-day itinerary exists over the feasible pairs")
+            print(f"[LOG] No valid {region.name} route found")
+            return None
+        
+        context = RouteContext(
+            region=region,
+            num_days=num_days,
+            waypoints=dataset.waypoints,
+            node_waypoints=dataset.node_waypoints,
+            itinerary_search=itinerary_search,
+            scenic_points=dataset.scenic_points,
+            scenic_index=dataset.scenic_index,
+            leg_store=dataset.leg_store
+        )
+        
+        # Rank a pool of candidate itineraries by estimated overlap; attempts route the best ones first
+        context.candidates = self._rank_itineraries(context, max_tries)
+        
+        if speculative_attempts > 1:
+            best_score, best_route = self._run_speculative_attempts(
+                context, max_tries, good_enough_threshold, speculative_attempts
+            )
+        else:
+            best_score, best_route = float('inf'), None
             
-            # If we have a complete route, calculate its score
-            if len(route_names) == num_days + 1:
-                # Calculate overlap between legs
-                overlap = 0
-                for i in range(len(route_legs) - 1):
-                    overlap += calculate_route_overlap(route_legs[i]['coords'], route_legs[i+1]['coords'])
-                
-                # Calculate score (lower is better)
-                score = overlap / (num_days - 1)  # Average overlap per leg
-                print(f"[LOG] Route score: {score:.3f}")
+            # Try to generate a valid route
+            for attempt in range(max_tries):
+                print(f"[LOG] Try {attempt + 1}/{max_tries}")
+                result = self._run_attempt(context)
+                if not result:
+                    continue
                 
+                score, route = result
                 if score < best_score:
-                    best_score = score
-                    best_route = {
-                        'waypoints': route_names,
-                        'legs': route_legs,
-                        'scenic_midpoints': scenic_midpoints
-                    }
+                    best_score, best_route = score, route
                     print(f"[LOG] New best {region.name} itinerary found with score {score:.3f}")
                     
                     # If we found a route that's good enough, return it immediately
@@ -196,13 +177,211 @@ class RoutePlanner:
             print(f"[LOG] No valid {region.name} route found")
             return None
     
-    def export_route_to_geojson(self, region_id: str, route_data: Dict) -> Dict:
+    def _run_attempt(
+        self, 
+        context: "RouteContext", 
+        cancel_event: Optional[threading.Event] = None
+    ) -> Optional[Tuple[float, Dict]]:
+        """
+        Run one route attempt: take the next ranked itinerary (or sample an untried one), route it and score it.
+        
+        Attempts run one after another from generate_route, or concurrently
+        from _run_speculative_attempts; context is shared between them, and
+        its candidate pool and tried itineraries are only touched under
+        context.lock.
+        
+        Args:
+            context: Region data shared by all attempts of a job
+            cancel_event: Set by another attempt to stop this one before further routing calls
+        
+        Returns:
+            (score, route data) or None if the attempt did not produce a complete route
+        """
+        num_days = context.num_days
+        
+        # Take the next ranked candidate (or sample an untried itinerary), then route its legs together
+        with context.lock:
+            if context.candidates:
+                nodes = context.candidates.pop(0)
+            else:
+                nodes = context.itinerary_search.sample_nodes(exclude=context.tried_itineraries)
+            if nodes:
+                context.tried_itineraries.add(tuple(nodes))
+        if not nodes:
+            print("[LOG]  No untried itinerary left")
+            return None
+        
+        route = context.node_waypoints[nodes].tolist()
+        print(f"[LOG]  Itinerary: {' -> '.join(context.waypoints.keys[i] for i in route)}")
+        
+        routed_legs = self._route_legs(
+            list(zip(route, route[1:])),
+            context.waypoints,
+            context.scenic_points,
+            context.scenic_index,
+            context.leg_store,
+            context.region.route_params.mode,
+            cancel_event=cancel_event
+        )
+        if not routed_legs:
+            return None
+        
+        route_legs = [route_data for route_data, _ in routed_legs]
+        
+        # Calculate overlap between legs
+        overlap = 0
+        for i in range(len(route_legs) - 1):
+            overlap += calculate_route_overlap(route_legs[i]['coords'], route_legs[i+1]['coords'], OVERLAP_GRID_M)
+        
+        # Calculate score (lower is better)
+        score = overlap / (num_days - 1)  # Average overlap per leg
+        print(f"[LOG] Route score: {score:.3f}")
+        
+        return score, {
+            'waypoints': [context.waypoints.records[i].name for i in route],
+            'legs': route_legs,
+            # Always align scenic_midpoints length with legs
+            'scenic_midpoints': [midpoint if midpoint else None for _, midpoint in routed_legs]
+        }
+    
+    def _run_speculative_attempts(
+        self,
+        context: "RouteContext",
+        max_tries: int,
+        good_enough_threshold: float,
+        speculative_attempts: int
+    ) -> Tuple[float, Optional[Dict]]:
+        """
+        Run up to max_tries attempts, keeping speculative_attempts of them in flight at once.
+        
+        As soon as one attempt scores at or below the threshold, queued attempts
+        are cancelled and in-flight ones stop before making further routing calls.
+        
+        Returns:
+            (best score, best route), with best route None if no attempt succeeded
+        """
+        best_score, best_route = float('inf'), None
+        cancel_event = threading.Event()
+        submitted = 0
+        
+        # Don't wait for cancelled in-flight attempts on the way out; they stop at their next routing call
+        executor = ThreadPoolExecutor(max_workers=speculative_attempts)
+        try:
+            in_flight = set()
+            while submitted < max_tries or in_flight:
+                while submitted < max_tries and len(in_flight) < speculative_attempts:
+                    submitted += 1
+                    print(f"[LOG] Try {submitted}/{max_tries} (speculative)")
+                    in_flight.add(executor.submit(self._run_attempt, context, cancel_event))
+                
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if not result:
+                        continue
+                    
+                    score, route = result
+                    if score < best_score:
+                        best_score, best_route = score, route
+                        print(f"[LOG] New best {context.region.name} itinerary found with score {score:.3f}")
+                
+                if best_score <= good_enough_threshold:
+                    print(f"[LOG] Found route with score {best_score:.3f} below threshold {good_enough_threshold}; "
+                          f"cancelling {len(in_flight)} remaining attempts")
+                    cancel_event.set()
+                    for future in in_flight:
+                        future.cancel()
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return best_score, best_route
+    
+    def precompute_legs(self, region_id: str, force: bool = False) -> Dict[str, int]:
+        """
+        Route every feasible pair via its scenic midpoint and save the results in the region's leg store.
+        
+        Each unordered pair is routed once; generate_route serves the reverse
+        direction by reversing the stored geometry. Existing entries are kept
+        unless force is set, so an interrupted run can be resumed.
+        
+        Args:
+            region_id: ID of the region
+            force: Discard the existing leg store and route every pair again
+        
+        Returns:
+            Counts of newly routed legs, failed legs and total stored legs
+        """
+        region = region_registry.get_region(region_id)
+        if not region:
+            raise ValueError(f"Region not found: {region_id}")
+        
+        waypoints = WaypointStore.from_features(region_registry.load_waypoints(region_id))
+        graph = self._get_feasible_graph(region_id, waypoints)
+        node_waypoints = waypoints.indices_of(graph.keys)
+        keys = waypoints.keys
+        scenic_points = self._get_scenic_points(region_id)
+        scenic_index = self._get_scenic_index(region_id, scenic_points)
+        mode = region.route_params.mode
+        
+        cached = None if force else self.cache_service.get_leg_store(region_id)
+        if cached and cached.get('mode') == mode:
+            # The cached store is shared with the memory tier and loaded datasets; add legs to a copy
+            leg_store = {**cached, 'legs': dict(cached.get('legs', {}))}
+        else:
+            leg_store = {'version': 1, 'mode': mode, 'legs': {}}
+        
+        routed = 0
+        failed = 0
+        edges = (
+            (int(node_waypoints[node]), end)
+            for node in range(graph.num_nodes)
+            for end in node_waypoints[graph.neighbors_of(node)].tolist()
+        )
+        for start, end in edges:
+            start_id, end_id = keys[start], keys[end]
+            if self._get_stored_leg(leg_store, start_id, end_id):
+                continue
+            
+            start_coords = waypoints.coords_at(start)
+            end_coords = waypoints.coords_at(end)
+            midpoint = find_best_scenic_midpoint(
+                (start_coords[1], start_coords[0]),
+                (end_coords[1], end_coords[0]),
+                scenic_points,
+                SCENIC_SEARCH_RADIUS_KM,
+                index=scenic_index
+            )
+            
+            route_data = self._get_route_with_midpoint(start_coords, end_coords, midpoint, mode)
+            if not route_data:
+                print(f"[LOG] No route found from {start_id} to {end_id}")
+                failed += 1
+                continue
+            
+            leg_store['legs'][f"{start_id}|{end_id}"] = {
+                'midpoint': midpoint,
+                'distance': route_data['properties']['distance'],
+                'time': route_data['properties']['time'],
+                'coords': [[round(lon, 5), round(lat, 5)] for lon, lat in route_data['coords']]
+            }
+            routed += 1
+            
+            # Checkpoint periodically so long runs can be resumed
+            if routed % 25 == 0:
+                self.cache_service.set_leg_store(region_id, leg_store)
+        
+        self.cache_service.set_leg_store(region_id, leg_store)
+        return {'routed': routed, 'failed': failed, 'total': len(leg_store['legs'])}
+    
+    def export_route_to_geojson(self, region_id: str, route_data: Dict, simplify_tolerance_m: float = None) -> Dict:
         """
         Export route data as GeoJSON for interactive web maps.
         
         Args:
             region_id: ID of the region
             route_data: Route data from generate_route
+            simplify_tolerance_m: Douglas-Peucker tolerance for leg geometry (0 keeps full resolution)
         
         Returns:
             GeoJSON data
@@ -211,6 +390,9 @@ class RoutePlanner:
         if not region:
             raise ValueError(f"Region not found: {region_id}")
         
+        if simplify_tolerance_m is None:
+            simplify_tolerance_m = GEOJSON_SIMPLIFY_TOLERANCE_M
+        
         waypoints = region_registry.load_waypoints(region_id)
         waypoint_dict = {wp['properties']['name']: wp for wp in waypoints}
         
@@ -240,11 +422,9 @@ class RoutePlanner:
                 geojson["features"].append(feature)
         
         # Add route legs as LineString features with surface data
+        surface_analyses = self._analyze_leg_surfaces(region_id, region, route_data['legs'])
         for i, leg in enumerate(route_data['legs']):
-            # Get surface data for this route leg
-            print(f"[LOG] Getting surface data for {region.name} day {i + 1}...")
-            surface_data = self.osm_client.get_surface_data(leg['coords'])
-            surface_analysis = analyze_surface_types(surface_data, region.terrain_defaults.__dict__)
+            surface_analysis = surface_analyses[i]
             
             feature = {
                 "type": "Feature",
@@ -260,7 +440,7 @@ class RoutePlanner:
                 },
                 "geometry": {
                     "type": "LineString",
-                    "coordinates": leg['coords']
+                    "coordinates": simplify_polyline(leg['coords'], simplify_tolerance_m)
                 }
             }
             geojson["features"].append(feature)
@@ -286,45 +466,521 @@ class RoutePlanner:
         
         return geojson
     
-    def _get_feasible_pairs(self, region_id: str, waypoints: List[Dict]) -> List[Dict]:
-        """Get or compute feasible pairs for a region."""
-        # Try cache first
-        cached_pairs = self.cache_service.get_feasible_pairs(region_id)
-        if cached_pairs:
-            return cached_pairs
+    def _analyze_leg_surfaces(self, region_id: str, region: Region, legs: List[Dict]) -> List[Dict]:
+        """
+        Look up and analyze surface data for every leg concurrently.
         
-        # Compute feasible pairs
-        region = region_registry.get_region(region_id)
-        feasible_pairs = calculate_feasible_pairs(
-            waypoints,
-            region.route_params.min_distance_km,
-            region.route_params.max_distance_km
-        )
+        Overpass politeness is enforced by the OSM client's per-host limiter,
+        so the worker count only bounds how many legs are in flight.
         
-        # Cache the results
-        self.cache_service.set_feasible_pairs(region_id, feasible_pairs)
-        return feasible_pairs
+        Returns:
+            Surface analysis per leg, in day order
+        """
+        def analyze_leg(day: int, leg: Dict) -> Dict:
+            print(f"[LOG] Getting surface data for {region.name} day {day}...")
+            surface_data = self.osm_client.get_surface_data(leg['coords'], region_id=region_id)
+            return analyze_surface_types(surface_data, region.terrain_defaults.__dict__)
+        
+        if len(legs) <= 1:
+            return [analyze_leg(i + 1, leg) for i, leg in enumerate(legs)]
+        
+        with ThreadPoolExecutor(max_workers=min(SURFACE_LOOKUP_WORKERS, len(legs))) as executor:
+            futures = [executor.submit(analyze_leg, i + 1, leg) for i, leg in enumerate(legs)]
+            return [future.result() for future in futures]
     
-    def _get_scenic_points(self, region_id: str) -> List[Dict]:
-        """Get or fetch scenic points for a region."""
-        # Try cache first
-        cached_points = self.cache_service.get_scenic_points(region_id)
-        if cached_points:
-            return cached_points
+    def _rank_itineraries(self, context: "RouteContext", count: int) -> List[List[int]]:
+        """
+        Sample a pool of candidate itineraries and keep the count with the lowest estimated overlap.
+        
+        Legs are approximated by their precomputed geometry when the leg store
+        has them, otherwise by straight lines via the scenic midpoint, so no
+        routing calls are made.
+        """
+        pool: List[List[int]] = []
+        seen: Set[Tuple[int, ...]] = set()
+        pool_size = max(count, ITINERARY_CANDIDATE_POOL)
+        for _ in range(pool_size):
+            nodes = context.itinerary_search.sample_nodes(exclude=seen)
+            if not nodes:
+                break
+            seen.add(tuple(nodes))
+            pool.append(nodes)
+        
+        # Random sampling can miss the last few itineraries of a small graph; top up deterministically
+        if len(pool) < pool_size:
+            for nodes in context.itinerary_search.enumerate_nodes(limit=pool_size):
+                if len(pool) >= pool_size:
+                    break
+                if tuple(nodes) not in seen:
+                    seen.add(tuple(nodes))
+                    pool.append(nodes)
+
+        if len(pool) <= 1:
+            return pool
+        
+        waypoints = context.waypoints
+        proxies: Dict[Tuple[int, int], Tuple[List[Tuple[float, float]], Optional[Dict]]] = {}
+        
+        def proxy_leg(start_wp: int, end_wp: int) -> Tuple[List[Tuple[float, float]], Optional[Dict]]:
+            if (start_wp, end_wp) not in proxies:
+                stored = self._get_stored_leg(context.leg_store, waypoints.keys[start_wp], waypoints.keys[end_wp])
+                if stored:
+                    route_data, midpoint = stored
+                    proxies[(start_wp, end_wp)] = (route_data['coords'], midpoint)
+                else:
+                    start = waypoints.coords_at(start_wp)
+                    end = waypoints.coords_at(end_wp)
+                    midpoint = find_best_scenic_midpoint(
+                        (start[1], start[0]),
+                        (end[1], end[0]),
+                        context.scenic_points,
+                        SCENIC_SEARCH_RADIUS_KM,
+                        index=context.scenic_index
+                    )
+                    # The synthesized geometric midpoint is (lat, lon); scenic points are [lon, lat]
+                    if midpoint.get('type') == 'Midpoint':
+                        via = (midpoint['coords'][1], midpoint['coords'][0])
+                    else:
+                        via = tuple(midpoint['coords'])
+                    proxies[(start_wp, end_wp)] = ([tuple(start), via, tuple(end)], midpoint)
+            return proxies[(start_wp, end_wp)]
+        
+        scored = []
+        for nodes in pool:
+            route = context.node_waypoints[nodes].tolist()
+            legs = [proxy_leg(a, b) for a, b in zip(route, route[1:])]
+            score = estimate_itinerary_overlap([coords for coords, _ in legs], [mid for _, mid in legs])
+            scored.append((score, nodes))
+        
+        scored.sort(key=lambda item: item[0])
+        print(f"[LOG] Ranked {len(pool)} candidate itineraries; best estimated overlap {scored[0][0]:.3f}")
+        return [nodes for _, nodes in scored[:count]]
+    
+    def _route_legs(
+        self,
+        legs: List[Tuple[int, int]],
+        waypoints: WaypointStore,
+        scenic_points: List[Dict],
+        scenic_index: ScenicPointIndex,
+        leg_store: Optional[Dict],
+        mode: str,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Optional[List[Tuple[Dict, Optional[Dict]]]]:
+        """
+        Route a sequence of legs, fetching the ones not in the leg store concurrently.
+        
+        Args:
+            legs: (start, end) waypoint store IDs for each day in order
+            waypoints: Waypoint store holding every leg's endpoints
+            scenic_points: Scenic points for the region
+            scenic_index: Spatial index over scenic_points
+            leg_store: Precomputed legs for the region, if any
+            mode: Routing mode
+            cancel_event: When set, legs that have not started routing are skipped
+        
+        Returns:
+            (route data, scenic midpoint) per leg in day order, or None if any leg failed or was cancelled
+        """
+        keys = waypoints.keys
+        results: List[Optional[Tuple[Dict, Optional[Dict]]]] = [None] * len(legs)
+        pending = []
+        
+        for i, (start, end) in enumerate(legs):
+            stored = self._get_stored_leg(leg_store, keys[start], keys[end])
+            if stored:
+                results[i] = stored
+                continue
+            
+            start_coords = waypoints.coords_at(start)
+            end_coords = waypoints.coords_at(end)
+            
+            # Find scenic midpoint
+            midpoint = find_best_scenic_midpoint(
+                (start_coords[1], start_coords[0]),  # (lat, lon)
+                (end_coords[1], end_coords[0]),      # (lat, lon)
+                scenic_points,
+                SCENIC_SEARCH_RADIUS_KM,
+                index=scenic_index
+            )
+            pending.append((i, start_coords, end_coords, midpoint))
+        
+        def route_leg(start_coords, end_coords, midpoint):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            return self._get_route_with_midpoint(start_coords, end_coords, midpoint, mode)
+        
+        if pending:
+            # Bounded by max_concurrency here and by the client's rate limiter per request
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(pending))) as executor:
+                futures = {
+                    i: executor.submit(route_leg, start_coords, end_coords, midpoint)
+                    for i, start_coords, end_coords, midpoint in pending
+                }
+                for i, _, _, midpoint in pending:
+                    route_data = futures[i].result()
+                    if route_data:
+                        results[i] = (route_data, midpoint)
+        
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        
+        for (start, end), result in zip(legs, results):
+            if result is None:
+                print(f"[LOG]  No route found from {keys[start]} to {keys[end]}")
+                return None
+        
+        return results
+    
+    @staticmethod
+    def _get_stored_leg(leg_store: Optional[Dict], start_id: str, end_id: str) -> Optional[Tuple[Dict, Dict]]:
+        """Look up a precomputed leg in either direction, returning (route data, midpoint)."""
+        if not leg_store:
+            return None
+        
+        legs = leg_store.get('legs', {})
+        entry = legs.get(f"{start_id}|{end_id}")
+        reverse = False
+        if entry is None:
+            entry = legs.get(f"{end_id}|{start_id}")
+            reverse = True
+        if entry is None:
+            return None
+        
+        coords = [(lon, lat) for lon, lat in entry['coords']]
+        if reverse:
+            coords.reverse()
         
-        # Fetch from API
+        route_data = {
+            'properties': {'distance': entry['distance'], 'time': entry['time']},
+            'geometry': {'type': 'LineString', 'coordinates': [list(c) for c in coords]},
+            'coords': coords
+        }
+        return route_data, entry['midpoint']
+    
+    def get_dataset(self, region_id: str, refresh_stale: bool = True) -> RegionDataset:
+        """
+        Get the region's data snapshot, loading it on first use.
+        
+        The snapshot is reused by every request and job in this process until
+        the waypoint or cache files it was built from change, or it outlives
+        the cache TTL. Reusing a snapshot built from expired caches schedules
+        their refresh, as loading them would have.
+        
+        Args:
+            region_id: ID of the region
+            refresh_stale: Schedule refreshes of expired caches (False in the RQ worker's parent)
+        
+        Returns:
+            RegionDataset
+        """
+        versions = self._dataset_versions(region_id)
+        with self._datasets_lock:
+            dataset = self._datasets.get(region_id)
+        if (
+            dataset is not None
+            and dataset.source_versions == versions
+            and time.time() - dataset.loaded_at < self.cache_service.ttl_hours * 3600
+        ):
+            if refresh_stale and self.refresh_mode != "off":
+                for kind in dataset.stale_caches:
+                    self._schedule_refresh(kind, region_id)
+            return dataset
+        
+        dataset = self._load_dataset(region_id, refresh_stale)
+        with self._datasets_lock:
+            self._datasets[region_id] = dataset
+        return dataset
+    
+    def preload_dataset(self, region_id: str) -> bool:
+        """
+        Load or refresh a region's snapshot without calling any external API.
+        
+        Used by the RQ worker before it forks each job. Expired scenic points
+        and feasible pairs still within CACHE_MAX_STALE_HOURS are loaded
+        without scheduling their refresh; the job schedules it when it uses
+        the snapshot. Regions with a cache missing or past the max-stale
+        window are skipped, since loading them would fetch from Places or
+        compute pairs in the parent; the job loads those itself. With
+        CACHE_REFRESH_MODE "off" expired caches are rebuilt inline, so only
+        regions with current caches are loaded.
+        
+        Args:
+            region_id: ID of the region
+        
+        Returns:
+            True if a snapshot is loaded
+        """
+        allow_stale = self.refresh_mode != "off"
+        if (
+            self.cache_service.get_scenic_points(region_id, allow_stale=allow_stale) is None
+            or self.cache_service.get_feasible_pairs(region_id, allow_stale=allow_stale) is None
+        ):
+            return False
+        self.get_dataset(region_id, refresh_stale=False)
+        return True
+    
+    def reload_dataset(self, region_id: Optional[str] = None) -> None:
+        """Drop the cached snapshot for one region (or all) so the next use reloads it."""
+        with self._datasets_lock:
+            if region_id is None:
+                self._datasets.clear()
+            else:
+                self._datasets.pop(region_id, None)
+        region_registry.reload_waypoints(region_id)
+    
+    def _dataset_versions(self, region_id: str) -> Tuple:
+        """Modification times of every file a region's snapshot is built from."""
+        try:
+            waypoints_version = region_registry.get_waypoints_file_path(region_id).stat().st_mtime
+        except (OSError, ValueError):
+            waypoints_version = None
+        return (waypoints_version,) + self.cache_service.get_source_versions(region_id)
+    
+    def _load_dataset(self, region_id: str, refresh_stale: bool = True) -> RegionDataset:
+        """Load a region's data and build its lookup tables (see get_dataset for refresh_stale)."""
         region = region_registry.get_region(region_id)
-        bbox_string = region.bbox.to_bbox_string()
+        if not region:
+            raise ValueError(f"Region not found: {region_id}")
+        
+        print(f"[LOG] Loading {region.name} dataset")
+        # Compact store keyed the same way as feasible pair IDs (explicit ID, else name with coords)
+        waypoints = WaypointStore.from_features(region_registry.load_waypoints(region_id))
         
-        scenic_points = self.geoapify_client.get_scenic_points(
-            bbox_string,
-            region.scenic_categories,
-            limit=100
+        graph = self._get_feasible_graph(region_id, waypoints, refresh_stale)
+        loaded_caches = ["feasible_pairs"]
+        
+        # Nothing can be routed without pairs, so skip fetching the rest
+        if graph.num_edges:
+            scenic_points = self._get_scenic_points(region_id, refresh_stale)
+            loaded_caches.append("scenic_points")
+            leg_store = self.cache_service.get_leg_store(region_id)
+            # Legs routed for another mode would be served as if they were this one
+            if leg_store and leg_store.get('mode') != region.route_params.mode:
+                print(f"[LOG] Ignoring leg store routed for mode {leg_store.get('mode')!r}, "
+                      f"region uses {region.route_params.mode!r}")
+                leg_store = None
+        else:
+            scenic_points, leg_store = [], None
+        
+        return RegionDataset(
+            region=region,
+            waypoints=waypoints,
+            graph=graph,
+            node_waypoints=waypoints.indices_of(graph.keys),
+            scenic_points=scenic_points,
+            scenic_index=self._get_scenic_index(region_id, scenic_points),
+            leg_store=leg_store,
+            # Taken after loading, so files written while loading (e.g. computed pairs) count as seen
+            source_versions=self._dataset_versions(region_id),
+            loaded_at=time.time(),
+            stale_caches=tuple(kind for kind in loaded_caches if not self.cache_service.is_fresh(kind, region_id))
         )
+    
+    def _get_feasible_graph(
+        self,
+        region_id: str,
+        waypoints: WaypointStore,
+        refresh_stale: bool = True
+    ) -> FeasibleGraph:
+        """
+        Get the region's feasible pairs as a CSR graph, from its binary cache when current.
+        
+        A cached graph whose pairs file has expired is served the same way as
+        an expired pairs file in _fill_region_cache: returned at once with a
+        background refresh, or rebuilt inline when CACHE_REFRESH_MODE is "off".
+        """
+        graph = self.cache_service.get_feasible_graph(region_id)
+        if graph is not None and graph.valid_digest == FeasibleGraph.digest(waypoints.keys):
+            if self.cache_service.is_fresh("feasible_pairs", region_id):
+                return graph
+            if self.refresh_mode != "off":
+                if refresh_stale:
+                    self._schedule_refresh("feasible_pairs", region_id)
+                return graph
+        
+        pairs = self._get_feasible_pairs(region_id, waypoints, refresh_stale)
+        graph = FeasibleGraph.from_pairs(pairs, waypoints.keys)
+        self.cache_service.set_feasible_graph(region_id, graph)
+        return graph
+    
+    def _region_cache_ops(
+        self,
+        kind: str,
+        region_id: str,
+        waypoints: Union[List[Dict], WaypointStore, None] = None
+    ) -> Tuple[Callable[..., Optional[List[Dict]]], Callable[[str, List[Dict]], None], Callable[[], List[Dict]]]:
+        """
+        Getter, setter and producer for one kind of region cache.
+        
+        Args:
+            kind: "feasible_pairs" or "scenic_points"
+            region_id: Region ID
+            waypoints: Waypoints for feasible pairs (loaded from the registry if omitted)
+        
+        Returns:
+            (get_cached, set_cached, compute) tuple
+        """
+        if kind == "feasible_pairs":
+            def compute() -> List[Dict]:
+                region = region_registry.get_region(region_id)
+                store = waypoints
+                if store is None:
+                    store = WaypointStore.from_features(region_registry.load_waypoints(region_id))
+                elif not isinstance(store, WaypointStore):
+                    store = WaypointStore.from_features(store)
+                return calculate_feasible_pairs(
+                    store.keys,
+                    store.lons,
+                    store.lats,
+                    region.route_params.min_distance_km,
+                    region.route_params.max_distance_km
+                )
+            
+            return self.cache_service.get_feasible_pairs, self.cache_service.set_feasible_pairs, compute
+        
+        if kind == "scenic_points":
+            def fetch() -> List[Dict]:
+                region = region_registry.get_region(region_id)
+                return self.geoapify_client.get_scenic_points(
+                    region.bbox.to_bbox_string(),
+                    region.scenic_categories,
+                    limit=100
+                )
+            
+            return self.cache_service.get_scenic_points, self.cache_service.set_scenic_points, fetch
+        
+        raise ValueError(f"Unknown region cache: {kind}")
+    
+    def _fill_region_cache(
+        self,
+        kind: str,
+        region_id: str,
+        waypoints: Union[List[Dict], WaypointStore, None] = None,
+        refresh_stale: bool = True
+    ) -> List[Dict]:
+        """
+        Read a region cache, filling it on a miss with single-flight semantics.
+        
+        An expired entry still within the max-stale window is returned at once
+        and refreshed in the background (stale-while-revalidate), unless
+        CACHE_REFRESH_MODE is "off". Otherwise only one thread or process
+        computes a missing entry at a time; the others are served the expired
+        copy if there is one, or wait for the filler and read its result.
+        
+        Args:
+            kind: "feasible_pairs" or "scenic_points"
+            region_id: Region ID
+            waypoints: Waypoints for feasible pairs
+            refresh_stale: Schedule the refresh of an expired entry it returns
+        
+        Returns:
+            Cached or freshly computed value
+        """
+        get_cached, set_cached, compute = self._region_cache_ops(kind, region_id, waypoints)
+        cached = get_cached(region_id)
+        if cached:
+            return cached
+        
+        stale = get_cached(region_id, allow_stale=True)
+        if stale and self.refresh_mode != "off":
+            if refresh_stale:
+                self._schedule_refresh(kind, region_id)
+            return stale
+        
+        with self.cache_service.fill_lock(kind, region_id, timeout=0 if stale else None) as acquired:
+            if not acquired and stale:
+                print(f"[LOG] {kind} for {region_id} is being refreshed elsewhere, serving the expired copy")
+                return stale
+            
+            # Another filler may have finished while we waited for the lock
+            cached = get_cached(region_id)
+            if cached:
+                return cached
+            
+            value = compute()
+            set_cached(region_id, value)
+            return value
+    
+    def refresh_region_cache(self, kind: str, region_id: str) -> bool:
+        """
+        Recompute an expired region cache now, unless another filler holds it or it is already fresh.
+        
+        Args:
+            kind: "feasible_pairs" or "scenic_points"
+            region_id: Region ID
+        
+        Returns:
+            True if this call rewrote the cache
+        """
+        get_cached, set_cached, compute = self._region_cache_ops(kind, region_id)
+        with self.cache_service.fill_lock(kind, region_id, timeout=0) as acquired:
+            if not acquired or get_cached(region_id):
+                return False
+            set_cached(region_id, compute())
+            print(f"[LOG] Refreshed {kind} cache for {region_id}")
+            return True
+    
+    def _schedule_refresh(self, kind: str, region_id: str) -> None:
+        """Start a background refresh of a region cache, at most once per CACHE_REFRESH_RETRY_S."""
+        key = (kind, region_id)
+        now = time.monotonic()
+        with self._refresh_lock:
+            last = self._refresh_scheduled.get(key)
+            if last is not None and now - last < CACHE_REFRESH_RETRY_S:
+                return
+            self._refresh_scheduled[key] = now
+        
+        print(f"[LOG] Serving expired {kind} for {region_id}, refreshing in the background ({self.refresh_mode})")
+        if self.refresh_mode == "rq":
+            # Imported here: the task module imports this one
+            from ..tasks.route_tasks import enqueue_region_cache_refresh
+            try:
+                enqueue_region_cache_refresh(kind, region_id)
+            except Exception as e:
+                print(f"[LOG] Error enqueuing {kind} refresh for {region_id}: {e}")
+            return
+        
+        def run() -> None:
+            try:
+                self.refresh_region_cache(kind, region_id)
+            except Exception as e:
+                print(f"[LOG] Error refreshing {kind} for {region_id}: {e}")
+        
+        threading.Thread(target=run, name=f"refresh-{kind}-{region_id}", daemon=True).start()
+    
+    def _get_feasible_pairs(
+        self,
+        region_id: str,
+        waypoints: Union[List[Dict], WaypointStore],
+        refresh_stale: bool = True
+    ) -> List[Dict]:
+        """Get or compute feasible pairs for a region."""
+        return self._fill_region_cache("feasible_pairs", region_id, waypoints, refresh_stale)
+    
+    def _get_scenic_points(self, region_id: str, refresh_stale: bool = True) -> List[Dict]:
+        """Get or fetch scenic points for a region."""
+        return self._fill_region_cache("scenic_points", region_id, refresh_stale=refresh_stale)
+    
+    def _get_scenic_index(self, region_id: str, scenic_points: List[Dict]) -> ScenicPointIndex:
+        """
+        Get the spatial index for a region's scenic points, rebuilding it if the points changed.
+        
+        The index is reused for the same list object, or for a list read from
+        the same version of the scenic cache file, so reloads from the cache
+        don't compare every point.
+        """
+        version = self.cache_service.get_source_version("scenic_points", region_id)
+        entry = self._scenic_indexes.get(region_id)
+        if entry is not None:
+            index_version, count, index = entry
+            if index.points is scenic_points:
+                return index
+            if version is not None and index_version == version and count == len(scenic_points):
+                return index
         
-        # Cache the results
-        self.cache_service.set_scenic_points(region_id, scenic_points)
-        return scenic_points
+        index = ScenicPointIndex(scenic_points)
+        self._scenic_indexes[region_id] = (version, len(scenic_points), index)
+        return index
     
     def _get_route_with_midpoint(
         self, 
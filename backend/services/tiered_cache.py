@@ -0,0 +1,200 @@
+"""
+Two-tier key/value cache: in-process LRU in front of a directory of JSON files.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .redis_cache import RedisCache
+from ..utils.cache_codec import write_file
+
+
+class TieredCache:
+    """
+    Content-addressed cache with an in-process LRU tier and an on-disk tier.
+
+    Keys must be filesystem-safe strings (e.g. hex digests). Both tiers honour
+    the same TTL; the disk tier is additionally bounded by total size, evicting
+    the least recently written files first.
+
+    An optional Redis tier (keys "<remote_namespace>:<key>") sits behind the
+    disk: every set is written through to it, and disk misses fall back to it,
+    so entries survive restarts on ephemeral filesystems. Redis has no size
+    budget of its own here, so entries larger than remote_max_bytes are not
+    written to it, and remote_ttl_hours can expire them sooner than the TTL.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        ttl_hours: float,
+        max_memory_entries: int = 512,
+        max_disk_bytes: int = 200 * 1024 * 1024,
+        sweep_interval: int = 50,
+        remote: Optional[RedisCache] = None,
+        remote_namespace: str = "cache",
+        remote_max_bytes: Optional[int] = None,
+        remote_ttl_hours: Optional[float] = None
+    ):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.sweep_interval = sweep_interval
+        self.remote = remote
+        self.remote_namespace = remote_namespace
+        self.remote_max_bytes = remote_max_bytes
+        self.remote_ttl_seconds = self.ttl_seconds
+        if remote_ttl_hours is not None:
+            self.remote_ttl_seconds = min(self.ttl_seconds, remote_ttl_hours * 3600)
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_sweep = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, promoting disk hits into the memory tier."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+        path = self._path(key)
+        try:
+            mtime = path.stat().st_mtime
+            if now - mtime >= self.ttl_seconds:
+                return self._get_remote(key)
+            with open(path, 'r') as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            return self._get_remote(key)
+        except Exception as e:
+            print(f"[LOG] Error reading cache entry {path}: {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self._remember(key, value, mtime + self.ttl_seconds)
+            self.hits += 1
+        return value
+
+    def _get_remote(self, key: str) -> Optional[Any]:
+        """Fall back to the Redis tier after a disk miss, promoting hits into memory."""
+        entry = None
+        if self.remote is not None:
+            entry = self.remote.get_entry(f"{self.remote_namespace}:{key}")
+        if entry is None or entry[1] + self.ttl_seconds <= time.time():
+            with self._lock:
+                self.misses += 1
+            return None
+
+        value, written_at = entry
+        with self._lock:
+            self._remember(key, value, written_at + self.ttl_seconds)
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value in every tier."""
+        with self._lock:
+            self._remember(key, value, time.time() + self.ttl_seconds)
+
+        if self.remote is not None:
+            self.remote.set(
+                f"{self.remote_namespace}:{key}",
+                value,
+                ttl_seconds=self.remote_ttl_seconds,
+                max_bytes=self.remote_max_bytes
+            )
+
+        path = self._path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            write_file(path, value)
+        except Exception as e:
+            print(f"[LOG] Error writing cache entry {path}: {e}")
+            return
+
+        with self._lock:
+            self._writes_since_sweep += 1
+            should_sweep = self._writes_since_sweep >= self.sweep_interval
+            if should_sweep:
+                self._writes_since_sweep = 0
+        if should_sweep:
+            self.sweep()
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        """Insert into the memory tier; caller holds the lock."""
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def sweep(self) -> None:
+        """Drop expired files and evict the oldest ones while the disk tier is over its size budget."""
+        if not self.directory.exists():
+            return
+
+        now = time.time()
+        entries = []
+        total_bytes = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime >= self.ttl_seconds:
+                self._unlink(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_bytes += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_disk_bytes:
+                break
+            self._unlink(path)
+            total_bytes -= size
+
+    def _unlink(self, path: Path) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[LOG] Error evicting cache entry {path}: {e}")
+
+    def clear(self) -> None:
+        """Remove every entry from every tier."""
+        with self._lock:
+            self._memory.clear()
+        if self.remote is not None:
+            self.remote.delete_matching(f"{self.remote_namespace}:*")
+        if self.directory.exists():
+            for path in self.directory.glob("*.json"):
+                self._unlink(path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and tier sizes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory)
+            }
@@ -1,22 +1,136 @@
 """
 Route generation tasks for RQ workers.
 """
+import json
+from typing import Dict, List, Optional
+
 import redis
-from rq import Queue
+from rq import Queue, get_current_job
 
 from ..services.route_planner import RoutePlanner
 from ..services.geoapify_client import GeoAPIfyClient
 from ..services.osm_client import OSMClient
 from ..services.cache_service import CacheService
 from ..regions.registry import region_registry
-from ..config import REDIS_URL
+from ..config import REDIS_URL, ROUTE_GEOMETRY_TTL_S, CACHE_REFRESH_MODE
 
 # Configure Redis connection
 conn = redis.from_url(REDIS_URL)
 route_queue = Queue('route_generation', connection=conn)
 
+# Full-resolution leg geometry, kept outside the (simplified) job result
+ROUTE_GEOMETRY_KEY = "route_geometry:{job_id}"
+
+# Held from enqueue until a region cache refresh job finishes, so only one is queued at a time
+REFRESH_MARKER_KEY = "region_cache_refresh:{kind}:{region_id}"
+REFRESH_JOB_TIMEOUT_S = 1800
+
+
+def save_route_geometry(job_id: str, legs: List[Dict]) -> None:
+    """
+    Store a route's full-resolution leg geometry as a GeoJSON FeatureCollection.
+    
+    Args:
+        job_id: ID of the route generation job
+        legs: Route legs from generate_route
+    """
+    geometry = {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {"name": f"Day {i + 1}", "day": i + 1, "type": "route_leg"},
+                "geometry": {"type": "LineString", "coordinates": leg['coords']}
+            }
+            for i, leg in enumerate(legs)
+        ]
+    }
+    conn.setex(ROUTE_GEOMETRY_KEY.format(job_id=job_id), ROUTE_GEOMETRY_TTL_S, json.dumps(geometry, separators=(',', ':')))
+
+
+def load_route_geometry(job_id: str) -> Optional[Dict]:
+    """Load a route's full-resolution leg geometry, or None if missing or expired."""
+    data = conn.get(ROUTE_GEOMETRY_KEY.format(job_id=job_id))
+    return json.loads(data) if data else None
+
+
+_route_planner = None
+
+
+def get_route_planner() -> RoutePlanner:
+    """
+    Get this process's route planner.
+    
+    Each job runs in a work-horse forked from the worker, so jobs share the
+    region data the worker loaded before forking them (see preload_datasets).
+    A work-horse exits as soon as its job ends, taking any background thread
+    with it, so expired caches are refreshed by a queued job instead.
+    """
+    global _route_planner
+    if _route_planner is None:
+        refresh_mode = "rq" if CACHE_REFRESH_MODE == "thread" else CACHE_REFRESH_MODE
+        _route_planner = RoutePlanner(refresh_mode=refresh_mode)
+    return _route_planner
+
+
+def preload_datasets() -> None:
+    """Load or refresh every region's snapshot in this process without calling external APIs."""
+    planner = get_route_planner()
+    for region_id in region_registry.get_region_ids():
+        try:
+            planner.preload_dataset(region_id)
+        except Exception as e:
+            print(f"[LOG] Could not preload {region_id} dataset: {e}")
+
 
-def generate_route_task(region_id, num_days=None, max_tries=None, good_enough_threshold=None):
+def refresh_region_cache_task(kind: str, region_id: str) -> bool:
+    """
+    Refresh an expired region cache (scenic points or feasible pairs) on a worker.
+    
+    Args:
+        kind: "feasible_pairs" or "scenic_points"
+        region_id: ID of the region
+    
+    Returns:
+        True if the cache was rewritten
+    """
+    try:
+        return get_route_planner().refresh_region_cache(kind, region_id)
+    finally:
+        conn.delete(REFRESH_MARKER_KEY.format(kind=kind, region_id=region_id))
+
+
+def enqueue_region_cache_refresh(kind: str, region_id: str) -> bool:
+    """
+    Queue a region cache refresh unless one is already queued or running.
+    
+    RQ does not deduplicate by job ID, so a Redis marker set with NX guards
+    the enqueue. The task clears it when done, and it expires with the job
+    timeout in case the worker dies first.
+    
+    Returns:
+        True if a refresh job was queued
+    """
+    marker = REFRESH_MARKER_KEY.format(kind=kind, region_id=region_id)
+    if not conn.set(marker, 1, nx=True, ex=REFRESH_JOB_TIMEOUT_S):
+        return False
+    
+    try:
+        route_queue.enqueue(
+            refresh_region_cache_task,
+            kind,
+            region_id,
+            job_id=f"refresh-{kind}-{region_id}",
+            job_timeout=REFRESH_JOB_TIMEOUT_S,
+            result_ttl=0
+        )
+    except Exception:
+        conn.delete(marker)
+        raise
+    return True
+
+
+def generate_route_task(region_id, num_days=None, max_tries=None, good_enough_threshold=None, speculative_attempts=None):
     """
     Generate a hiking route for any region.
     
@@ -25,6 +139,7 @@ def generate_route_task(region_id, num_days=None, max_tries=None, good_enough_th
         num_days: Number of days for the route
         max_tries: Maximum number of attempts
         good_enough_threshold: Threshold for early termination
+        speculative_attempts: Number of attempts to run in parallel
     
     Returns:
         Route generation result
@@ -32,15 +147,16 @@ def generate_route_task(region_id, num_days=None, max_tries=None, good_enough_th
     print(f"[LOG] Starting route generation for region: {region_id}")
     
     try:
-        # Initialize route planner (it initializes its own dependencies)
-        route_planner = RoutePlanner()
+        # Shared route planner (it initializes its own dependencies and caches region data)
+        route_planner = get_route_planner()
         
         # Generate route
         result = route_planner.generate_route(
             region_id=region_id,
             num_days=num_days,
             max_tries=max_tries,
-            good_enough_threshold=good_enough_threshold
+            good_enough_threshold=good_enough_threshold,
+            speculative_attempts=speculative_attempts
         )
         
         if not result:
@@ -49,9 +165,17 @@ def generate_route_task(region_id, num_days=None, max_tries=None, good_enough_th
                 'message': f'No valid route found for region {region_id}'
             }
         
-        # Export to GeoJSON
+        # Export to GeoJSON (leg geometry simplified)
         geojson_data = route_planner.export_route_to_geojson(region_id, result)
         
+        # Keep the full-resolution geometry available to the geometry endpoint
+        job = get_current_job()
+        if job:
+            try:
+                save_route_geometry(job.get_id(), result['legs'])
+            except Exception as e:
+                print(f"[LOG] Error saving full-resolution geometry for job {job.get_id()}: {e}")
+        
         # Calculate summary
         total_distance = sum(leg['properties']['distance'] for leg in result['legs']) / 1000
         total_duration = sum(leg['properties']['time'] for leg in result['legs']) / 60
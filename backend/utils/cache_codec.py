@@ -0,0 +1,113 @@
+"""
+Encodings for on-disk cache files, with atomic writes.
+"""
+import gzip
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Union
+
+# Supported formats and the file suffix each is written with
+FORMAT_SUFFIXES = {
+    "json": ".json",
+    "json.gz": ".json.gz",
+    "msgpack": ".msgpack",
+    "zstd": ".json.zst"
+}
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# First non-whitespace byte of any JSON document
+JSON_START = set(b'[{"-0123456789tfn')
+
+
+def _require_msgpack():
+    try:
+        import msgpack
+    except ImportError as e:
+        raise ImportError("The msgpack cache format requires msgpack: pip install msgpack") from e
+    return msgpack
+
+
+def _require_zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("The zstd cache format requires zstandard: pip install zstandard") from e
+    return zstandard
+
+
+def encode(value: Any, fmt: str = "json") -> bytes:
+    """
+    Encode a JSON-compatible value.
+
+    Args:
+        value: Value to encode
+        fmt: One of FORMAT_SUFFIXES
+
+    Returns:
+        Encoded bytes
+    """
+    if fmt not in FORMAT_SUFFIXES:
+        raise ValueError(f"Unknown cache format {fmt!r}; expected one of {', '.join(FORMAT_SUFFIXES)}")
+    if fmt == "msgpack":
+        return _require_msgpack().packb(value, use_bin_type=True)
+
+    data = json.dumps(value, separators=(',', ':')).encode()
+    if fmt == "json.gz":
+        # mtime=0 keeps output deterministic for identical values
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if fmt == "zstd":
+        return _require_zstandard().ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def decode(data: bytes) -> Any:
+    """
+    Decode bytes written by encode(), detecting the format from their content.
+
+    gzip and zstd are recognised by their magic numbers; anything else that
+    starts like a JSON document is JSON, and the remainder is msgpack.
+    """
+    if data[:2] == GZIP_MAGIC:
+        return json.loads(gzip.decompress(data))
+    if data[:4] == ZSTD_MAGIC:
+        return json.loads(_require_zstandard().ZstdDecompressor().decompress(data))
+
+    stripped = data.lstrip()
+    if not stripped or stripped[0] in JSON_START:
+        return json.loads(data)
+    return _require_msgpack().unpackb(data, raw=False)
+
+
+def read_file(path: Union[str, Path]) -> Any:
+    """Read and decode a cache file in any supported format."""
+    with open(path, 'rb') as f:
+        return decode(f.read())
+
+
+def atomic_write(path: Union[str, Path], write: Callable[[Any], None]) -> None:
+    """
+    Write a file atomically: write(f) fills a temp file in the same directory,
+    which then replaces path in one rename. Readers in other processes see
+    either the old file or the new one, never a partial write.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_file(path: Union[str, Path], value: Any, fmt: str = "json") -> None:
+    """Encode a value and write it to path atomically."""
+    data = encode(value, fmt)
+    atomic_write(path, lambda f: f.write(data))
@@ -1,44 +1,287 @@
 """
 Geometry utilities for route planning.
 """
-from typing import List, Tuple
-from geopy.distance import geodesic
+from typing import List, Optional, Sequence, Tuple, TYPE_CHECKING
 
+import numpy as np
 
-def calculate_route_overlap(leg1_coords: List[Tuple[float, float]], leg2_coords: List[Tuple[float, float]]) -> float:
+if TYPE_CHECKING:
+    from .spatial_index import ScenicPointIndex
+
+# Mean Earth radius (IUGG), used by the vectorized haversine engine
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Vectorized great-circle distance in kilometres.
+
+    Accepts scalars or NumPy arrays (broadcast together) in degrees.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def to_local_km(lons, lats, lat0: float = None) -> np.ndarray:
+    """
+    Project lon/lat degrees onto a local equirectangular plane in kilometres.
+
+    Accurate to well under 1% over a single region; lat0 defaults to the mean latitude.
+
+    Returns:
+        Array of shape (n, 2) with (x, y) in km
+    """
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    if lat0 is None:
+        lat0 = float(lats.mean()) if lats.size else 0.0
+    kx = np.pi / 180 * EARTH_RADIUS_KM * np.cos(np.radians(lat0))
+    ky = np.pi / 180 * EARTH_RADIUS_KM
+    return np.column_stack((lons * kx, lats * ky))
+
+
+def resample_polyline(points_km: np.ndarray, spacing_km: float) -> np.ndarray:
+    """
+    Resample a projected polyline at a fixed spacing along its length (endpoints kept).
+
+    Args:
+        points_km: Array of shape (n, 2) from to_local_km
+        spacing_km: Distance between consecutive samples
+
+    Returns:
+        Array of shape (m, 2)
+    """
+    if len(points_km) < 2:
+        return points_km
+    seg_lengths = np.hypot(*np.diff(points_km, axis=0).T)
+    cumulative = np.concatenate(([0.0], np.cumsum(seg_lengths)))
+    total = cumulative[-1]
+    if total == 0:
+        return points_km[:1]
+    stations = np.append(np.arange(0.0, total, spacing_km), total)
+    return np.column_stack((
+        np.interp(stations, cumulative, points_km[:, 0]),
+        np.interp(stations, cumulative, points_km[:, 1])
+    ))
+
+
+def sample_polyline(
+    coordinates: List[Tuple[float, float]],
+    spacing_m: float,
+    min_separation_m: float,
+    bend_angle_deg: float = 45.0,
+    max_samples: Optional[int] = None
+) -> List[Tuple[float, float]]:
+    """
+    Pick sample points along a route by distance, with extra samples at sharp bends.
+
+    Endpoints and bends (sharpest first) are placed first, then regular
+    samples every spacing_m; any candidate closer than min_separation_m
+    (straight-line) to a kept sample is dropped, so search buffers of half that
+    radius never overlap. Bends are measured on the route resampled at
+    min_separation_m, which ignores GPS jitter below the buffer size.
+
+    Args:
+        coordinates: List of (lon, lat) tuples
+        spacing_m: Distance along the route between regular samples
+        min_separation_m: Minimum distance between any two samples
+        bend_angle_deg: Heading change that counts as a sharp bend
+        max_samples: Cap on the number of samples; the spacing is widened to fit and
+            the gentlest bends are dropped if they alone exceed it
+
+    Returns:
+        List of (lon, lat) samples in route order
+    """
+    if len(coordinates) <= 1:
+        return list(coordinates)
+
+    coords = np.asarray(coordinates, dtype=float)
+    lat0 = float(coords[:, 1].mean())
+    points_km = to_local_km(coords[:, 0], coords[:, 1], lat0)
+    cumulative = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(points_km, axis=0).T))))
+    total = cumulative[-1]
+    if total == 0:
+        return [tuple(coordinates[0])]
+
+    spacing_km = spacing_m / 1000
+    if max_samples:
+        spacing_km = max(spacing_km, total / max_samples)
+    separation_km = min_separation_m / 1000
+
+    # Heading changes on a coarse resampling of the route
+    coarse = np.append(np.arange(0.0, total, separation_km), total)
+    coarse_xy = np.column_stack((
+        np.interp(coarse, cumulative, points_km[:, 0]),
+        np.interp(coarse, cumulative, points_km[:, 1])
+    ))
+    headings = np.arctan2(*np.diff(coarse_xy, axis=0).T[::-1])
+    turns = np.abs((np.diff(headings) + np.pi) % (2 * np.pi) - np.pi)
+    sharp = turns > np.radians(bend_angle_deg)
+    bends = coarse[1:-1][sharp][np.argsort(-turns[sharp], kind="stable")]
+
+    regular = np.arange(spacing_km, total, spacing_km)
+    candidates = np.concatenate(([0.0, total], bends, regular))
+    candidate_xy = np.column_stack((
+        np.interp(candidates, cumulative, points_km[:, 0]),
+        np.interp(candidates, cumulative, points_km[:, 1])
+    ))
+
+    # Greedy in priority order; each candidate is checked against every kept sample at once
+    limit = max_samples or len(candidates)
+    kept = np.empty(min(limit, len(candidates)), dtype=int)
+    kept_xy = np.empty((len(kept), 2))
+    count = 0
+    for i, xy in enumerate(candidate_xy):
+        if count and np.hypot(*(kept_xy[:count] - xy).T).min() < separation_km:
+            continue
+        kept[count] = i
+        kept_xy[count] = xy
+        count += 1
+        if count == limit:
+            break
+
+    stations = np.sort(candidates[kept[:count]])
+    return list(zip(
+        np.interp(stations, cumulative, coords[:, 0]).tolist(),
+        np.interp(stations, cumulative, coords[:, 1]).tolist()
+    ))
+
+
+def simplify_polyline(coordinates: List[Tuple[float, float]], tolerance_m: float) -> List[Tuple[float, float]]:
+    """
+    Douglas-Peucker simplification with a tolerance in metres.
+
+    Each split step measures every point of the current span against its
+    chord in one vectorized pass; endpoints are always kept.
+
+    Args:
+        coordinates: List of (lon, lat) tuples
+        tolerance_m: Maximum distance of a dropped vertex from the simplified line
+
+    Returns:
+        The retained (lon, lat) tuples, in order
+    """
+    if tolerance_m <= 0 or len(coordinates) <= 2:
+        return list(coordinates)
+
+    coords = np.asarray(coordinates, dtype=float)
+    points_km = to_local_km(coords[:, 0], coords[:, 1])
+    tolerance_km = tolerance_m / 1000
+    keep = np.zeros(len(points_km), dtype=bool)
+    keep[[0, -1]] = True
+
+    stack = [(0, len(points_km) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a = points_km[first]
+        ab = points_km[last] - a
+        ap = points_km[first + 1:last] - a
+        t = np.clip(ap @ ab / max(float(ab @ ab), 1e-12), 0.0, 1.0)
+        distances = np.hypot(*(ap - t[:, None] * ab).T)
+        i = int(distances.argmax())
+        if distances[i] > tolerance_km:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return [coordinates[i] for i in np.nonzero(keep)[0]]
+
+
+def distance_to_polyline_km(points_km: np.ndarray, line_km: np.ndarray) -> np.ndarray:
+    """
+    Minimum distance from each point to a polyline, vectorized over points and segments.
+
+    Args:
+        points_km: Array of shape (n, 2) from to_local_km
+        line_km: Array of shape (m, 2) from to_local_km, using the same lat0
+
+    Returns:
+        Array of n distances in km
+    """
+    if len(line_km) == 1:
+        return np.hypot(*(points_km - line_km[0]).T)
+    a = line_km[:-1]
+    ab = line_km[1:] - a
+    ab_len2 = np.maximum((ab ** 2).sum(axis=1), 1e-12)
+    ap = points_km[:, None, :] - a[None, :, :]
+    t = np.clip((ap * ab[None, :, :]).sum(axis=2) / ab_len2[None, :], 0.0, 1.0)
+    closest = a[None, :, :] + t[:, :, None] * ab[None, :, :]
+    return np.hypot(*(points_km[:, None, :] - closest).transpose(2, 0, 1)).min(axis=1)
+
+
+def _snapped_cells(points_km: np.ndarray, tolerance_m: float) -> np.ndarray:
+    """Unique grid cells (packed into int64) touched by a polyline densified below the grid size."""
+    tolerance_km = tolerance_m / 1000
+    
+    # Split every segment into equal parts no longer than half a cell. Unlike
+    # resampling by arc length, this gives the same points for a reversed leg.
+    if len(points_km) > 1:
+        starts = points_km[:-1]
+        deltas = np.diff(points_km, axis=0)
+        parts = np.maximum(1, np.ceil(np.hypot(*deltas.T) / (tolerance_km / 2))).astype(int)
+        seg = np.repeat(np.arange(len(parts)), parts)
+        step = np.arange(parts.sum()) - np.repeat(np.cumsum(parts) - parts, parts)
+        dense = starts[seg] + (step / parts[seg])[:, None] * deltas[seg]
+        dense = np.vstack((dense, points_km[-1:]))
+    else:
+        dense = points_km
+    
+    cells = np.floor(dense / tolerance_km).astype(np.int64)
+    return np.unique((cells[:, 0] << 32) ^ (cells[:, 1] & 0xFFFFFFFF))
+
+
+def calculate_route_overlap(
+    leg1_coords: List[Tuple[float, float]], 
+    leg2_coords: List[Tuple[float, float]],
+    tolerance_m: float = 25
+) -> float:
     """
     Calculate overlap between two route legs.
     
+    Both legs are projected to a local metric plane, densified and snapped
+    to a tolerance_m grid, so near-identical trail segments count as shared
+    even when their vertices differ slightly.
+    
     Args:
-        leg1_coords: Coordinates from first leg
-        leg2_coords: Coordinates from second leg
+        leg1_coords: Coordinates from first leg, as (lon, lat)
+        leg2_coords: Coordinates from second leg, as (lon, lat)
+        tolerance_m: Grid cell size in metres
     
     Returns:
-        Overlap ratio (0-1)
+        Overlap ratio (0-1), intersection over union of the snapped cells
     """
     if not leg1_coords or not leg2_coords:
         return 0
     
-    # Convert to sets of coordinate tuples for comparison
-    set1 = set(leg1_coords)
-    set2 = set(leg2_coords)
+    coords1 = np.asarray(leg1_coords, dtype=float)
+    coords2 = np.asarray(leg2_coords, dtype=float)
+    lat0 = float(np.concatenate((coords1[:, 1], coords2[:, 1])).mean())
+    
+    cells1 = _snapped_cells(to_local_km(coords1[:, 0], coords1[:, 1], lat0), tolerance_m)
+    cells2 = _snapped_cells(to_local_km(coords2[:, 0], coords2[:, 1], lat0), tolerance_m)
     
     # Calculate overlap as intersection over union
-    intersection = len(set1.intersection(set2))
-    union = len(set1.union(set2))
+    intersection = np.intersect1d(cells1, cells2, assume_unique=True).size
+    union = cells1.size + cells2.size - intersection
     
     if union == 0:
         return 0
     
-    overlap = intersection / union
-    return overlap
+    return intersection / union
 
 
 def find_best_scenic_midpoint(
     start_coords: Tuple[float, float], 
     end_coords: Tuple[float, float], 
     scenic_points: List[dict], 
-    search_radius_km: float = 10
+    search_radius_km: float = 10,
+    index: Optional["ScenicPointIndex"] = None
 ) -> dict:
     """
     Find the best scenic midpoint between two coordinates.
@@ -48,6 +291,7 @@ def find_best_scenic_midpoint(
         end_coords: (lat, lon) of end point
         scenic_points: List of scenic point data
         search_radius_km: Search radius in kilometers
+        index: Prebuilt spatial index over scenic_points (built on the fly if omitted)
     
     Returns:
         Best scenic point or None
@@ -64,89 +308,75 @@ def find_best_scenic_midpoint(
             'coords': (mid_lat, mid_lon)
         }
     
-    # Find scenic points within search radius of the midpoint
-    best_point = None
-    min_distance = float('inf')
+    if index is None:
+        from .spatial_index import ScenicPointIndex
+        index = ScenicPointIndex(scenic_points)
     
-    for point in scenic_points:
-        # scenic_points coords are [lon, lat]; geodesic expects (lat, lon)
-        point_lat, point_lon = point['coords'][1], point['coords'][0]
-        dist = geodesic((mid_lat, mid_lon), (point_lat, point_lon)).kilometers
-        if dist < search_radius_km and dist < min_distance:
-            best_point = point
-            min_distance = dist
+    # The nearest scenic point overall is also the best one inside the radius, if any is
+    best_point, distance = index.nearest(mid_lat, mid_lon)
     
-    if best_point:
-        return best_point
-
-    # Fallback: choose the closest scenic point to the geometric midpoint, even if outside radius
-    print(f"[LOG] No scenic midpoint within {search_radius_km}km; falling back to nearest scenic point to midpoint ({mid_lat}, {mid_lon})")
-    nearest_point = None
-    nearest_distance = float('inf')
-    for point in scenic_points:
-        point_lat, point_lon = point['coords'][1], point['coords'][0]
-        dist = geodesic((mid_lat, mid_lon), (point_lat, point_lon)).kilometers
-        if dist < nearest_distance:
-            nearest_distance = dist
-            nearest_point = point
-
-    return nearest_point
+    if distance >= search_radius_km:
+        # Fallback: choose the closest scenic point to the geometric midpoint, even if outside radius
+        print(f"[LOG] No scenic midpoint within {search_radius_km}km; falling back to nearest scenic point to midpoint ({mid_lat}, {mid_lon})")
+    
+    return best_point
 
 
-def calculate_feasible_pairs(waypoints: List[dict], min_distance_km: float, max_distance_km: float) -> List[dict]:
+def calculate_feasible_pairs(
+    ids: Sequence[str],
+    lons,
+    lats,
+    min_distance_km: float,
+    max_distance_km: float
+) -> List[dict]:
     """
     Calculate feasible pairs between waypoints based on distance constraints.
     
     Args:
-        waypoints: List of waypoint data
+        ids: Waypoint keys (e.g. WaypointStore.keys)
+        lons: Longitudes in degrees, parallel to ids
+        lats: Latitudes in degrees, parallel to ids
         min_distance_km: Minimum distance between waypoints
         max_distance_km: Maximum distance between waypoints
     
     Returns:
         List of feasible pairs
     """
-    # Build stable, unique identifiers for waypoints to avoid name collisions
-    def _waypoint_key(wp: dict) -> Tuple[str, float, float]:
-        props = wp.get('properties', {})
-        geom = wp.get('geometry', {})
-        coords = geom.get('coordinates', [None, None])
-        if coords is None or len(coords) < 2:
-            return ("", None, None)
-        lon, lat = coords[0], coords[1]
-        # Prefer explicit IDs when present; otherwise synthesize from name and rounded coords
-        wp_id = props.get('id') or props.get('osm_id') or props.get('ref')
-        if not wp_id:
-            name = props.get('name', 'Unnamed')
-            wp_id = f"{name}:{round(lat, 5)},{round(lon, 5)}"
-        return (str(wp_id), lat, lon)
-
-    keyed_points: List[Tuple[str, float, float]] = []
-    for wp in waypoints:
-        wp_id, lat, lon = _waypoint_key(wp)
-        if wp_id and lat is not None and lon is not None:
-            keyed_points.append((wp_id, lat, lon))
-
-    # Deduplicate exact duplicates while preserving distinct points that share a name
-    seen = {}
-    for wp_id, lat, lon in keyed_points:
-        seen[(wp_id, lat, lon)] = (lat, lon)
-
-    items = list(seen.items())  # [((id, lat, lon), (lat, lon)), ...]
-
-    # Calculate distances between all ordered pairs (A->B and B->A) within constraints
-    feasible_pairs: List[dict] = []
-    for i in range(len(items)):
-        (id1, lat1, lon1), (lat1v, lon1v) = items[i]
-        for j in range(len(items)):
-            if i == j:
-                continue
-            (id2, lat2, lon2), (lat2v, lon2v) = items[j]
-            dist = geodesic((lat1v, lon1v), (lat2v, lon2v)).kilometers
-            if min_distance_km <= dist <= max_distance_km:
-                feasible_pairs.append({
-                    'from': id1,
-                    'to': id2,
-                    'distance': dist
-                })
-
-    return feasible_pairs
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    if len(ids) < 2:
+        return []
+
+    # Compute the upper triangle of the distance matrix one row at a time (O(n) memory),
+    # keep the pairs inside the distance band and emit both directions from each hit
+    from_idx: List[np.ndarray] = []
+    to_idx: List[np.ndarray] = []
+    dists: List[np.ndarray] = []
+    for i in range(len(ids) - 1):
+        row = haversine_km(lats[i], lons[i], lats[i + 1:], lons[i + 1:])
+        hits = np.nonzero((row >= min_distance_km) & (row <= max_distance_km))[0]
+        if hits.size == 0:
+            continue
+        j = hits + i + 1
+        from_idx.extend((np.full(j.size, i), j))
+        to_idx.extend((j, np.full(j.size, i)))
+        dists.extend((row[hits], row[hits]))
+
+    if not dists:
+        return []
+
+    from_arr = np.concatenate(from_idx)
+    to_arr = np.concatenate(to_idx)
+    dist_arr = np.concatenate(dists)
+
+    # Keep the historical (from, to) row-major ordering of the cached pair files
+    order = np.lexsort((to_arr, from_arr))
+
+    return [
+        {
+            'from': ids[from_arr[k]],
+            'to': ids[to_arr[k]],
+            'distance': float(dist_arr[k])
+        }
+        for k in order
+    ]
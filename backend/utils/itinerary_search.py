@@ -0,0 +1,196 @@
+"""
+Itinerary search over the feasible-pair graph.
+"""
+import random
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from ..models.feasible_graph import FeasibleGraph
+
+
+def build_adjacency(feasible_pairs: List[Dict], valid_ids: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Build directed adjacency lists from feasible pairs, keeping only known waypoint IDs.
+
+    Args:
+        feasible_pairs: Feasible pairs ({'from', 'to', 'distance'})
+        valid_ids: Waypoint IDs that can appear in an itinerary
+
+    Returns:
+        Mapping of waypoint ID to the IDs reachable in one day
+    """
+    valid = set(valid_ids)
+    adjacency: Dict[str, List[str]] = {}
+    for pair in feasible_pairs:
+        start, end = pair['from'], pair['to']
+        if start in valid and end in valid and start != end:
+            adjacency.setdefault(start, []).append(end)
+    return adjacency
+
+
+class ItinerarySearch:
+    """
+    Finds simple paths of exactly num_days legs over the feasible-pair graph.
+
+    Nodes are pruned by their remaining depth: the longest walk (capped at
+    num_days) that starts from them. A node whose depth is below the number of
+    legs still needed can never complete an itinerary, so DFS never visits it.
+    Walk depth is an upper bound on simple-path depth, so backtracking handles
+    the cases where revisits would be needed.
+    """
+
+    def __init__(
+        self,
+        graph: Union[FeasibleGraph, Dict[str, List[str]]],
+        num_days: int,
+        max_expansions: int = 10000
+    ):
+        # Adjacency dicts are accepted for convenience and converted once
+        self.graph = graph if isinstance(graph, FeasibleGraph) else FeasibleGraph.from_adjacency(graph)
+        self.num_days = num_days
+        self.max_expansions = max_expansions
+        self.depth = self._remaining_depth()
+        self._start_ids = np.nonzero(self.depth >= num_days)[0].tolist()
+        self.starts = [self.graph.keys[i] for i in self._start_ids]
+
+    def _remaining_depth(self) -> np.ndarray:
+        """Longest walk length from each node (by integer ID), capped at num_days."""
+        graph = self.graph
+        depth = np.zeros(graph.num_nodes, dtype=np.int64)
+        has_neighbors = np.diff(graph.offsets) > 0
+        if not has_neighbors.any():
+            return depth
+
+        row_starts = graph.offsets[:-1][has_neighbors]
+        for _ in range(self.num_days):
+            best_neighbor = np.maximum.reduceat(depth[graph.neighbors], row_starts)
+            depth = np.zeros_like(depth)
+            depth[has_neighbors] = np.minimum(self.num_days, best_neighbor + 1)
+        return depth
+
+    def _extend(self, path: List[int], used: np.ndarray, rng: Optional[random.Random], budget: List[int]) -> bool:
+        """Depth-first extension of path in place; returns True once it has num_days legs."""
+        remaining = self.num_days - (len(path) - 1)
+        if remaining == 0:
+            return True
+
+        # Drop used and too-shallow neighbours in one vectorized pass
+        neighbors = self.graph.neighbors_of(path[-1])
+        candidates = neighbors[~used[neighbors] & (self.depth[neighbors] >= remaining - 1)].tolist()
+        if rng is not None:
+            rng.shuffle(candidates)
+
+        for node in candidates:
+            if budget[0] <= 0:
+                return False
+            budget[0] -= 1
+            path.append(node)
+            used[node] = True
+            if self._extend(path, used, rng, budget):
+                return True
+            path.pop()
+            used[node] = False
+        return False
+
+    def _keys(self, path: List[int]) -> List[str]:
+        return [self.graph.keys[i] for i in path]
+
+    def sample(self, rng: Optional[random.Random] = None, exclude: Optional[Set[Tuple[str, ...]]] = None) -> Optional[List[str]]:
+        """
+        Sample a random complete itinerary as waypoint keys.
+
+        Convenience wrapper over sample_nodes for callers working with keys.
+
+        Args:
+            rng: Random source (defaults to the module-level generator)
+            exclude: Itineraries (as key tuples) that should not be returned again
+
+        Returns:
+            List of num_days + 1 waypoint IDs, or None if every itinerary is excluded
+        """
+        excluded_nodes = None
+        if exclude:
+            excluded_nodes = {tuple(self.graph.index_of(key) for key in keys) for keys in exclude}
+        path = self.sample_nodes(rng, excluded_nodes)
+        return self._keys(path) if path else None
+
+    def sample_nodes(self, rng: Optional[random.Random] = None, exclude: Optional[Set[Tuple[int, ...]]] = None) -> Optional[List[int]]:
+        """
+        Sample a random complete itinerary as integer node IDs.
+
+        Random tries give up on a start after a few paths that were already
+        tried; the first untried itinerary in enumeration order is returned
+        instead, so None means every itinerary is in exclude.
+
+        Args:
+            rng: Random source (defaults to the module-level generator)
+            exclude: Itineraries (as node ID tuples) that should not be returned again
+
+        Returns:
+            List of num_days + 1 node IDs, or None if every itinerary is excluded
+        """
+        rng = rng or random
+        starts = list(self._start_ids)
+        rng.shuffle(starts)
+        budget = [self.max_expansions]
+
+        for start in starts:
+            # A few reshuffled tries per start, in case the first paths found were already tried
+            for _ in range(3):
+                path = [start]
+                used = np.zeros(self.graph.num_nodes, dtype=bool)
+                used[start] = True
+                if not self._extend(path, used, rng, budget):
+                    break
+                if not exclude or tuple(path) not in exclude:
+                    return path
+            if budget[0] <= 0:
+                break
+
+        # At most len(exclude) itineraries can be excluded, so one more enumerated is enough
+        limit = len(exclude) + 1 if exclude else 1
+        for path in self.enumerate_nodes(limit=limit):
+            if not exclude or tuple(path) not in exclude:
+                return path
+        return None
+
+    def enumerate(self, limit: Optional[int] = None) -> Iterator[List[str]]:
+        """
+        Enumerate complete itineraries as waypoint keys, in deterministic DFS order.
+
+        Args:
+            limit: Maximum number of itineraries to yield
+
+        Yields:
+            Lists of num_days + 1 waypoint IDs
+        """
+        for path in self.enumerate_nodes(limit):
+            yield self._keys(path)
+
+    def enumerate_nodes(self, limit: Optional[int] = None) -> Iterator[List[int]]:
+        """
+        Enumerate complete itineraries as integer node IDs, in deterministic DFS order.
+
+        Args:
+            limit: Maximum number of itineraries to yield
+
+        Yields:
+            Lists of num_days + 1 node IDs
+        """
+        count = 0
+        stack: List[List[int]] = [[start] for start in reversed(self._start_ids)]
+        while stack:
+            path = stack.pop()
+            remaining = self.num_days - (len(path) - 1)
+            if remaining == 0:
+                yield path
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+                continue
+
+            neighbors = self.graph.neighbors_of(path[-1])
+            keep = (self.depth[neighbors] >= remaining - 1) & ~np.isin(neighbors, path)
+            for node in reversed(neighbors[keep].tolist()):
+                stack.append(path + [node])
@@ -0,0 +1,76 @@
+"""
+Cheap pre-routing overlap estimate for candidate itineraries.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .geometry import distance_to_polyline_km, resample_polyline, to_local_km
+
+
+def _backtrack(leg_in: np.ndarray, leg_out: np.ndarray) -> float:
+    """0 when the next leg carries straight on, 1 when it heads back the way the last one came."""
+    v_in = leg_in[-1] - leg_in[-2] if len(leg_in) > 1 else None
+    v_out = leg_out[1] - leg_out[0] if len(leg_out) > 1 else None
+    if v_in is None or v_out is None:
+        return 0.0
+    norm = np.linalg.norm(v_in) * np.linalg.norm(v_out)
+    if norm == 0:
+        return 0.0
+    cos_angle = float(np.dot(v_in, v_out) / norm)
+    return (1.0 - cos_angle) / 2.0
+
+
+def estimate_itinerary_overlap(
+    legs: Sequence[Sequence[Tuple[float, float]]],
+    midpoints: Sequence[Optional[Dict]] = (),
+    corridor_km: float = 0.5,
+    spacing_km: float = 0.25,
+    corridor_weight: float = 1.0,
+    midpoint_weight: float = 0.5,
+    angle_weight: float = 0.25
+) -> float:
+    """
+    Estimate how much an itinerary's legs will overlap, before routing it.
+
+    Legs are straight-line proxies (start -> midpoint -> end) or cached leg
+    geometry. The score combines, per consecutive pair of legs:
+    - corridor intersection: share of each leg lying within corridor_km of the other
+    - shared midpoint: both legs visit the same scenic midpoint
+    - backtracking: the turn between them is close to a U-turn
+
+    Args:
+        legs: Per-leg polylines as (lon, lat) coordinates
+        midpoints: Scenic midpoint per leg (or None)
+        corridor_km: Half-width of the corridor treated as shared trail
+        spacing_km: Resampling distance along each leg
+        corridor_weight, midpoint_weight, angle_weight: Component weights
+
+    Returns:
+        Average penalty per consecutive leg pair (lower is better, 0 for single-leg itineraries)
+    """
+    if len(legs) < 2:
+        return 0.0
+
+    all_coords = np.array([pt for leg in legs for pt in leg], dtype=float)
+    lat0 = float(all_coords[:, 1].mean())
+    projected = [to_local_km([pt[0] for pt in leg], [pt[1] for pt in leg], lat0) for leg in legs]
+    sampled = [resample_polyline(leg, spacing_km) for leg in projected]
+
+    total = 0.0
+    for i in range(len(legs) - 1):
+        near_next = (distance_to_polyline_km(sampled[i], projected[i + 1]) <= corridor_km).mean()
+        near_prev = (distance_to_polyline_km(sampled[i + 1], projected[i]) <= corridor_km).mean()
+        corridor = float(near_next + near_prev) / 2.0
+
+        shared_midpoint = 0.0
+        if i + 1 < len(midpoints) and midpoints[i] and midpoints[i + 1]:
+            same = (midpoints[i].get('name') == midpoints[i + 1].get('name')
+                    and list(midpoints[i]['coords']) == list(midpoints[i + 1]['coords']))
+            shared_midpoint = 1.0 if same else 0.0
+
+        total += (corridor_weight * corridor
+                  + midpoint_weight * shared_midpoint
+                  + angle_weight * _backtrack(projected[i], projected[i + 1]))
+
+    return total / (len(legs) - 1)
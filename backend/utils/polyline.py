@@ -0,0 +1,82 @@
+"""
+Google encoded polyline format for compact route geometry in API responses.
+"""
+import copy
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+POLYLINE_PRECISION = 5  # decimal places (~1 m), the format's standard precision
+
+
+def encode_polyline(coordinates: Sequence[Sequence[float]], precision: int = POLYLINE_PRECISION) -> str:
+    """
+    Encode GeoJSON-ordered coordinates as a Google encoded polyline.
+
+    Args:
+        coordinates: Sequence of (lon, lat) pairs
+        precision: Decimal places kept
+
+    Returns:
+        Encoded string (lat/lon order, as the format specifies)
+    """
+    if len(coordinates) == 0:
+        return ""
+    factor = 10 ** precision
+    scaled = np.round(np.asarray(coordinates, dtype=float)[:, [1, 0]] * factor).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    # Zig-zag encode signed deltas, then emit 5-bit little-endian chunks
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+
+    chars = []
+    for value in values.tolist():
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return "".join(chars)
+
+
+def decode_polyline(encoded: str, precision: int = POLYLINE_PRECISION) -> List[List[float]]:
+    """
+    Decode a Google encoded polyline back to GeoJSON-ordered coordinates.
+
+    Returns:
+        List of [lon, lat] pairs
+    """
+    values = []
+    value, shift = 0, 0
+    for char in encoded:
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1f) << shift
+        shift += 5
+        if chunk < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+
+    if not values:
+        return []
+    lat_lon = np.cumsum(np.asarray(values, dtype=np.int64).reshape(-1, 2), axis=0) / 10 ** precision
+    return lat_lon[:, [1, 0]].tolist()
+
+
+def encode_feature_collection(geojson: Dict, precision: int = POLYLINE_PRECISION) -> Dict:
+    """
+    Copy a FeatureCollection with every LineString's coordinates replaced by an encoded polyline.
+
+    Encoded geometries keep their type and carry 'encoded' and 'precision'
+    in place of 'coordinates'; other geometries are left as they are.
+    """
+    encoded = copy.copy(geojson)
+    encoded['features'] = []
+    for feature in geojson.get('features', []):
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') == 'LineString':
+            feature = dict(feature)
+            feature['geometry'] = {
+                "type": "LineString",
+                "encoded": encode_polyline(geometry['coordinates'], precision),
+                "precision": precision
+            }
+        encoded['features'].append(feature)
+    return encoded
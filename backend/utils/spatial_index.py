@@ -0,0 +1,131 @@
+"""
+Spatial index for scenic point lookups.
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .geometry import EARTH_RADIUS_KM, haversine_km
+
+# Kilometres per degree of latitude, and of longitude at the equator
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON = 111.320
+# Kilometres per degree along a great circle, the scale haversine_km measures in
+KM_PER_DEG_HAVERSINE = math.pi / 180 * EARTH_RADIUS_KM
+
+
+class ScenicPointIndex:
+    """
+    Uniform grid over scenic points projected to a local equirectangular plane.
+
+    Built once per region; nearest-point queries only visit the grid cells in
+    expanding rings around the query instead of scanning every point.
+    """
+
+    def __init__(self, scenic_points: List[Dict], cell_size_km: float = 5.0):
+        self.points = scenic_points
+        self.cell_size_km = cell_size_km
+
+        # scenic_points coords are [lon, lat]
+        self._lons = np.array([p['coords'][0] for p in scenic_points], dtype=float)
+        self._lats = np.array([p['coords'][1] for p in scenic_points], dtype=float)
+
+        lat0 = float(self._lats.mean()) if len(scenic_points) else 0.0
+        self._max_abs_lat = float(np.abs(self._lats).max()) if len(scenic_points) else 0.0
+        self._kx = KM_PER_DEG_LON * math.cos(math.radians(lat0))
+        self._ky = KM_PER_DEG_LAT
+
+        self._cells: Dict[Tuple[int, int], np.ndarray] = {}
+        if scenic_points:
+            ix = np.floor(self._lons * self._kx / cell_size_km).astype(int)
+            iy = np.floor(self._lats * self._ky / cell_size_km).astype(int)
+            buckets: Dict[Tuple[int, int], List[int]] = {}
+            for i, cell in enumerate(zip(ix.tolist(), iy.tolist())):
+                buckets.setdefault(cell, []).append(i)
+            self._cells = {cell: np.array(idx) for cell, idx in buckets.items()}
+            self._bounds = (int(ix.min()), int(ix.max()), int(iy.min()), int(iy.max()))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _cell_of(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (
+            math.floor(lon * self._kx / self.cell_size_km),
+            math.floor(lat * self._ky / self.cell_size_km)
+        )
+
+    def _bound_scale(self, lat: float) -> float:
+        """
+        Fewest haversine km per projected km between a query and any indexed point.
+
+        The grid projects longitude at the mean latitude's scale, which
+        overstates east-west distances nearer the pole than that, and its
+        degree constants differ slightly from haversine_km's sphere. Ring
+        bounds scaled by this factor never exceed the true distance (the
+        great-circle shortcut over a parallel is negligible at region scale).
+        """
+        max_abs_lat = min(max(abs(lat), self._max_abs_lat), 89.9)
+        return min(
+            1.0,
+            KM_PER_DEG_HAVERSINE * math.cos(math.radians(max_abs_lat)) / self._kx,
+            KM_PER_DEG_HAVERSINE / self._ky
+        )
+
+    def _ring(self, cx: int, cy: int, ring: int) -> List[np.ndarray]:
+        """Point indices in cells at Chebyshev distance ``ring`` from (cx, cy)."""
+        if ring == 0:
+            cell = self._cells.get((cx, cy))
+            return [cell] if cell is not None else []
+
+        found = []
+        for dx in range(-ring, ring + 1):
+            for dy in (-ring, ring):
+                cell = self._cells.get((cx + dx, cy + dy))
+                if cell is not None:
+                    found.append(cell)
+        for dy in range(-ring + 1, ring):
+            for dx in (-ring, ring):
+                cell = self._cells.get((cx + dx, cy + dy))
+                if cell is not None:
+                    found.append(cell)
+        return found
+
+    def nearest(self, lat: float, lon: float) -> Tuple[Optional[Dict], float]:
+        """
+        Find the scenic point nearest to a coordinate.
+
+        Args:
+            lat: Query latitude
+            lon: Query longitude
+
+        Returns:
+            (scenic point, distance in km), or (None, inf) for an empty index
+        """
+        if not self.points:
+            return None, float('inf')
+
+        cx, cy = self._cell_of(lat, lon)
+        min_x, max_x, min_y, max_y = self._bounds
+        max_ring = max(abs(cx - min_x), abs(cx - max_x), abs(cy - min_y), abs(cy - max_y))
+
+        bound_scale = self._bound_scale(lat)
+
+        best_index = None
+        best_distance = float('inf')
+        for ring in range(max_ring + 1):
+            cells = self._ring(cx, cy, ring)
+            if cells:
+                candidates = np.concatenate(cells)
+                distances = haversine_km(lat, lon, self._lats[candidates], self._lons[candidates])
+                k = int(np.argmin(distances))
+                if distances[k] < best_distance:
+                    best_distance = float(distances[k])
+                    best_index = int(candidates[k])
+
+            # Anything outside the rings searched so far is at least ring * cell_size away in the
+            # projection, and at least bound_scale times that by haversine_km
+            if best_index is not None and best_distance <= ring * self.cell_size_km * bound_scale:
+                break
+
+        return self.points[best_index], best_distance
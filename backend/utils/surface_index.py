@@ -0,0 +1,235 @@
+"""
+Local surface-type index built from an OSM extract, for offline terrain analysis.
+"""
+import json
+import math
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.region import BoundingBox
+from .geometry import to_local_km
+
+# Tags that make a way relevant for surface analysis (mirrors the Overpass query)
+SURFACE_TAGS = ("surface", "highway", "tracktype")
+
+Way = Tuple[Dict[str, str], List[Tuple[float, float]]]  # (tags, [(lon, lat), ...])
+
+
+def read_overpass_json(path: Path) -> Iterator[Way]:
+    """
+    Read ways from an Overpass JSON dump.
+
+    Accepts either 'out geom' output (geometry inline on each way) or
+    'out body; >; out skel' output (ways referencing separate node elements).
+    """
+    with open(path, 'r') as f:
+        elements = json.load(f).get('elements', [])
+
+    nodes = {el['id']: (el['lon'], el['lat']) for el in elements if el.get('type') == 'node' and 'lat' in el}
+    for el in elements:
+        if el.get('type') != 'way':
+            continue
+        if el.get('geometry'):
+            coords = [(pt['lon'], pt['lat']) for pt in el['geometry'] if pt]
+        else:
+            coords = [nodes[n] for n in el.get('nodes', []) if n in nodes]
+        yield el.get('tags', {}), coords
+
+
+def read_osm_pbf(path: Path) -> Iterator[Way]:
+    """Read ways from a .osm.pbf extract (requires the optional 'osmium' package)."""
+    try:
+        import osmium
+    except ImportError as e:
+        raise ImportError("Reading .osm.pbf extracts requires pyosmium: pip install osmium") from e
+
+    ways: List[Way] = []
+
+    class _WayHandler(osmium.SimpleHandler):
+        def way(self, w):
+            tags = {k: w.tags[k] for k in SURFACE_TAGS if k in w.tags}
+            if tags:
+                ways.append((tags, [(n.lon, n.lat) for n in w.nodes if n.location.valid()]))
+
+    _WayHandler().apply_file(str(path), locations=True)
+    return iter(ways)
+
+
+def read_ways(path: Path) -> Iterator[Way]:
+    """Read ways from an OSM extract, choosing the reader by file extension."""
+    path = Path(path)
+    if path.name.endswith('.osm.pbf') or path.suffix == '.pbf':
+        return read_osm_pbf(path)
+    return read_overpass_json(path)
+
+
+class SurfaceIndex:
+    """
+    Grid-bucketed way segments with their surface/highway/tracktype tags.
+
+    Segments are registered in every grid cell their bounding box touches;
+    with cells at least as large as the query radius, a query only needs the
+    3x3 block of cells around the point.
+    """
+
+    def __init__(
+        self,
+        segments: np.ndarray,
+        segment_ways: np.ndarray,
+        way_tags: np.ndarray,
+        lat0: float,
+        cell_size_m: float = 100.0
+    ):
+        self.segments = segments          # (n, 4): lon1, lat1, lon2, lat2
+        self.segment_ways = segment_ways  # (n,): index into way_tags
+        self.way_tags = way_tags          # (w, 3): surface, highway, tracktype ('' when absent)
+        self.lat0 = lat0
+        self.cell_size_m = cell_size_m
+
+        self._dlat = cell_size_m / 111320.0
+        self._dlon = cell_size_m / (111320.0 * math.cos(math.radians(lat0)))
+        self._cells = self._build_cells()
+
+    @classmethod
+    def from_ways(cls, ways: Iterable[Way], bbox: Optional[BoundingBox] = None, cell_size_m: float = 100.0) -> "SurfaceIndex":
+        """
+        Build an index from (tags, coordinates) ways.
+
+        Args:
+            ways: Ways as (tags, [(lon, lat), ...])
+            bbox: Keep only ways with at least one node inside this box
+            cell_size_m: Grid cell size; must be at least the query radius
+
+        Returns:
+            SurfaceIndex
+        """
+        segments = []
+        segment_ways = []
+        way_tags = []
+        for tags, coords in ways:
+            if len(coords) < 2 or not any(tag in tags for tag in SURFACE_TAGS):
+                continue
+            if bbox is not None and not any(
+                bbox.west <= lon <= bbox.east and bbox.south <= lat <= bbox.north for lon, lat in coords
+            ):
+                continue
+            way_index = len(way_tags)
+            way_tags.append(tuple(tags.get(tag, '') for tag in SURFACE_TAGS))
+            for (lon1, lat1), (lon2, lat2) in zip(coords, coords[1:]):
+                segments.append((lon1, lat1, lon2, lat2))
+                segment_ways.append(way_index)
+
+        segment_array = np.array(segments, dtype=float).reshape(-1, 4)
+        if bbox is not None:
+            lat0 = (bbox.south + bbox.north) / 2
+        elif len(segment_array):
+            lat0 = float(segment_array[:, 1].mean())
+        else:
+            lat0 = 0.0
+
+        return cls(
+            segment_array,
+            np.array(segment_ways, dtype=np.int32),
+            np.array(way_tags, dtype=str).reshape(-1, len(SURFACE_TAGS)),
+            lat0,
+            cell_size_m
+        )
+
+    def _build_cells(self) -> Dict[Tuple[int, int], np.ndarray]:
+        if not len(self.segments):
+            return {}
+        lons = self.segments[:, [0, 2]]
+        lats = self.segments[:, [1, 3]]
+        x0 = np.floor(lons.min(axis=1) / self._dlon).astype(int)
+        x1 = np.floor(lons.max(axis=1) / self._dlon).astype(int)
+        y0 = np.floor(lats.min(axis=1) / self._dlat).astype(int)
+        y1 = np.floor(lats.max(axis=1) / self._dlat).astype(int)
+
+        buckets: Dict[Tuple[int, int], List[int]] = {}
+        for i, (ax, bx, ay, by) in enumerate(zip(x0.tolist(), x1.tolist(), y0.tolist(), y1.tolist())):
+            for cx in range(ax, bx + 1):
+                for cy in range(ay, by + 1):
+                    buckets.setdefault((cx, cy), []).append(i)
+        return {cell: np.array(idx, dtype=np.int64) for cell, idx in buckets.items()}
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def query(self, lat: float, lon: float, radius_m: float = 50) -> List[Tuple[str, str, str]]:
+        """
+        Find ways passing within radius_m of a coordinate.
+
+        Returns:
+            (surface, highway, tracktype) per matching way, in way order
+        """
+        cx = math.floor(lon / self._dlon)
+        cy = math.floor(lat / self._dlat)
+        reach = max(1, math.ceil(radius_m / self.cell_size_m))
+        found = [
+            self._cells[(cx + dx, cy + dy)]
+            for dx in range(-reach, reach + 1)
+            for dy in range(-reach, reach + 1)
+            if (cx + dx, cy + dy) in self._cells
+        ]
+        if not found:
+            return []
+
+        candidates = np.unique(np.concatenate(found))
+        segs = self.segments[candidates]
+        p = to_local_km([lon], [lat], self.lat0)[0]
+        a = to_local_km(segs[:, 0], segs[:, 1], self.lat0)
+        b = to_local_km(segs[:, 2], segs[:, 3], self.lat0)
+
+        # Point-to-segment distance for every candidate at once
+        ab = b - a
+        length_sq = (ab ** 2).sum(axis=1)
+        t = np.clip(((p - a) * ab).sum(axis=1) / np.where(length_sq > 0, length_sq, 1.0), 0.0, 1.0)
+        dist_m = np.hypot(*(a + t[:, None] * ab - p).T) * 1000
+
+        way_ids = np.unique(self.segment_ways[candidates[dist_m <= radius_m]])
+        return [tuple(str(tag) for tag in self.way_tags[w]) for w in way_ids]
+
+    def save(self, path: Path) -> None:
+        """Save the index as a compressed .npz file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            segments=self.segments,
+            segment_ways=self.segment_ways,
+            way_tags=self.way_tags,
+            lat0=np.array(self.lat0),
+            cell_size_m=np.array(self.cell_size_m)
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "SurfaceIndex":
+        """Load an index saved with save()."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data['segments'],
+                data['segment_ways'],
+                data['way_tags'],
+                float(data['lat0']),
+                float(data['cell_size_m'])
+            )
+
+
+def build_surface_index(source: Path, bbox: BoundingBox, output: Path, cell_size_m: float = 100.0) -> SurfaceIndex:
+    """
+    Build and save a region's surface index from an OSM extract.
+
+    Args:
+        source: Overpass JSON dump or .osm.pbf extract covering the region
+        bbox: Region bounding box; ways entirely outside it are dropped
+        output: Destination .npz path
+        cell_size_m: Grid cell size
+
+    Returns:
+        The built SurfaceIndex
+    """
+    surface_index = SurfaceIndex.from_ways(read_ways(source), bbox=bbox, cell_size_m=cell_size_m)
+    surface_index.save(output)
+    return surface_index
@@ -13,6 +13,7 @@ os.environ['OBJC_DISABLE_INITIALIZE_FORK_SAFETY'] = 'YES'
 load_dotenv()
 
 from .config import REDIS_URL
+from .tasks.route_tasks import preload_datasets
 
 # Configure Redis connection
 conn = redis.from_url(REDIS_URL)
@@ -20,8 +21,23 @@ conn = redis.from_url(REDIS_URL)
 # Define the queues
 route_queue = Queue('route_generation', connection=conn)
 
+
+class DatasetWorker(Worker):
+    """
+    Worker that refreshes region data in the parent before forking each job.
+    
+    Every job runs in a forked work-horse that exits when it finishes, so data
+    a job loads for itself is thrown away. Only what the parent holds is
+    inherited, and the parent keeps it current here, between jobs.
+    """
+    
+    def execute_job(self, job, queue):
+        preload_datasets()
+        return super().execute_job(job, queue)
+
+
 # Create worker instance with an explicit connection to avoid None-type issues
-worker = Worker([route_queue], connection=conn)
+worker = DatasetWorker([route_queue], connection=conn)
 
 if __name__ == '__main__':
     with Connection(conn):
@@ -1,5 +1,6 @@
 import axios from 'axios';
 import { Region } from '../types';
+import { decodeFeatureCollection } from '../utils/polyline';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000';
 
@@ -19,8 +20,15 @@ export const api = {
   },
 
   async getRouteStatus(region: Region, jobId: string): Promise<any> {
-    const response = await axios.get(`${API_BASE_URL}/api/regions/${region.id}/routes/${jobId}`);
-    return response.data;
+    // Leg geometry comes back as encoded polylines (several times smaller than GeoJSON arrays)
+    const response = await axios.get(`${API_BASE_URL}/api/regions/${region.id}/routes/${jobId}`, {
+      params: { format: 'polyline' }
+    });
+    const data = response.data;
+    if (data.format === 'polyline' && data.result && data.result.geojson) {
+      data.result.geojson = decodeFeatureCollection(data.result.geojson);
+    }
+    return data;
   },
 };
 
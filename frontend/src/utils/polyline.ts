@@ -0,0 +1,51 @@
+// Decoding for the compact route geometry format (Google encoded polylines).
+
+const DEFAULT_PRECISION = 5;
+
+export function decodePolyline(encoded: string, precision: number = DEFAULT_PRECISION): [number, number][] {
+  const factor = Math.pow(10, precision);
+  const coordinates: [number, number][] = [];
+  let index = 0;
+  let lat = 0;
+  let lon = 0;
+
+  const nextValue = (): number => {
+    let result = 0;
+    let shift = 0;
+    let chunk: number;
+    do {
+      chunk = encoded.charCodeAt(index++) - 63;
+      result |= (chunk & 0x1f) << shift;
+      shift += 5;
+    } while (chunk >= 0x20);
+    return result & 1 ? ~(result >> 1) : result >> 1;
+  };
+
+  while (index < encoded.length) {
+    lat += nextValue();
+    lon += nextValue();
+    // GeoJSON order: [lon, lat]
+    coordinates.push([lon / factor, lat / factor]);
+  }
+  return coordinates;
+}
+
+// Restore plain GeoJSON LineStrings from features whose geometry was sent encoded
+export function decodeFeatureCollection(geojson: any): GeoJSON.FeatureCollection {
+  return {
+    ...geojson,
+    features: geojson.features.map((feature: any) => {
+      const geometry = feature.geometry;
+      if (geometry && geometry.type === 'LineString' && typeof geometry.encoded === 'string') {
+        return {
+          ...feature,
+          geometry: {
+            type: 'LineString',
+            coordinates: decodePolyline(geometry.encoded, geometry.precision ?? DEFAULT_PRECISION),
+          },
+        };
+      }
+      return feature;
+    }),
+  };
+}
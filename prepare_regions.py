@@ -15,8 +15,9 @@ from backend.services.route_planner import RoutePlanner
 from backend.services.geoapify_client import GeoAPIfyClient
 from backend.services.osm_client import OSMClient
 from backend.services.cache_service import CacheService
+from backend.utils.surface_index import build_surface_index
 
-def prepare_region_cache(region_id, force=False):
+def prepare_region_cache(region_id, force=False, legs=False, surface_source=None):
     """Pre-generate cache data for a specific region."""
     print(f"\n🏔️  Preparing cache for {region_id}...")
     
@@ -56,10 +57,24 @@ def prepare_region_cache(region_id, force=False):
         scenic_points = route_planner._get_scenic_points(region_id)
         print(f"✅ Found {len(scenic_points)} scenic points")
 
+        # Optionally route every feasible pair ahead of time
+        if legs:
+            print("🥾 Routing all feasible pair legs (this makes one routing call per new pair)...")
+            leg_counts = route_planner.precompute_legs(region_id, force=force)
+            print(f"✅ Leg store: {leg_counts['total']} legs "
+                  f"({leg_counts['routed']} newly routed, {leg_counts['failed']} failed)")
+
+        # Optionally build the offline surface index from an OSM extract
+        if surface_source:
+            print(f"🗺️  Building surface index from {surface_source}...")
+            surface_index = build_surface_index(
+                Path(surface_source), region.bbox, osm_client.surface_index_path(region_id)
+            )
+            print(f"✅ Surface index: {len(surface_index)} way segments")
+
         # Validation summary
         try:
             # Recompute the unique keyed waypoint count using the same logic as feasible pairing
-            from backend.utils.geometry import geodesic  # placeholder import to keep symmetry
             unique_keys = set()
             for wp in waypoints:
                 props = wp.get('properties', {})
@@ -87,6 +102,9 @@ def main():
     parser = argparse.ArgumentParser(description="Prepare region caches (feasible pairs and scenic points)")
     parser.add_argument("region", nargs="?", help="Optional single region ID to prepare")
     parser.add_argument("--force", action="store_true", help="Force invalidate caches before regeneration")
+    parser.add_argument("--legs", action="store_true", help="Also precompute routed legs for every feasible pair")
+    parser.add_argument("--surface-source", metavar="PATH",
+                        help="OSM extract (Overpass JSON or .osm.pbf) to build the offline surface index from")
     args = parser.parse_args()
 
     if args.region:
@@ -97,7 +115,7 @@ def main():
     
     if args.region:
         # Single region mode
-        ok = prepare_region_cache(args.region, force=args.force)
+        ok = prepare_region_cache(args.region, force=args.force, legs=args.legs, surface_source=args.surface_source)
         print("\n🎉 Cache preparation complete!")
         if ok:
             print("✅ Region prepared successfully")
@@ -112,7 +130,7 @@ def main():
         
         success_count = 0
         for region in regions:
-            if prepare_region_cache(region.id, force=args.force):
+            if prepare_region_cache(region.id, force=args.force, legs=args.legs, surface_source=args.surface_source):
                 success_count += 1
         
         print(f"\n🎉 Cache preparation complete!")
@@ -150,6 +150,25 @@ class TestRoutesAPI:
             assert data['job_id'] == 'test_job_123'
             assert data['status'] == 'queued'
     
+    def test_generate_route_speculative_attempts_validated(self, client):
+        """Test speculative_attempts is rejected unless it is an integer, and clamped to the maximum."""
+        with patch('backend.app.region_registry') as mock_registry, \
+             patch('backend.app.route_queue') as mock_queue, \
+             patch('backend.app.SPECULATIVE_ATTEMPTS_MAX', 8):
+            
+            mock_registry.region_exists.return_value = True
+            mock_queue.enqueue.return_value.get_id.return_value = "test_job_123"
+            
+            response = client.post('/api/regions/lake_district/routes', json={"speculative_attempts": "many"})
+            assert response.status_code == 400
+            assert 'error' in response.get_json()
+            mock_queue.enqueue.assert_not_called()
+            
+            for requested, expected in ((1000, 8), (0, 1), ("3", 3)):
+                response = client.post('/api/regions/lake_district/routes', json={"speculative_attempts": requested})
+                assert response.status_code == 202
+                assert mock_queue.enqueue.call_args.kwargs['speculative_attempts'] == expected
+    
     def test_generate_route_region_not_found(self, client):
         """Test POST /api/regions/{region_id}/routes endpoint with non-existent region."""
         with patch('backend.app.region_registry') as mock_registry:
@@ -192,6 +211,39 @@ class TestRoutesAPI:
             assert data['result'] == {"status": "success", "data": "test"}
             assert data['region'] == 'lake_district'
     
+    def test_get_route_status_completed_polyline(self, client):
+        """Test completed jobs return encoded leg geometry when requested by query or Accept header."""
+        geojson = {
+            "type": "FeatureCollection",
+            "features": [{"type": "Feature", "properties": {"day": 1},
+                          "geometry": {"type": "LineString", "coordinates": [[-120.2, 38.5], [-120.95, 40.7]]}}]
+        }
+        with patch('backend.app.region_registry') as mock_registry, \
+             patch('backend.app.route_queue') as mock_queue:
+            
+            mock_registry.region_exists.return_value = True
+            mock_job = Mock()
+            mock_job.is_finished = True
+            mock_job.is_failed = False
+            mock_job.result = {"status": "success", "geojson": geojson}
+            mock_queue.fetch_job.return_value = mock_job
+            
+            by_query = client.get('/api/regions/lake_district/routes/test_job_123?format=polyline').get_json()
+            by_header = client.get(
+                '/api/regions/lake_district/routes/test_job_123',
+                headers={'Accept': 'application/vnd.polyline+json'}
+            ).get_json()
+            default = client.get(
+                '/api/regions/lake_district/routes/test_job_123', headers={'Accept': '*/*'}
+            ).get_json()
+            
+            for data in (by_query, by_header):
+                assert data['format'] == 'polyline'
+                geometry = data['result']['geojson']['features'][0]['geometry']
+                assert geometry == {"type": "LineString", "encoded": "_p~iF~ps|U_ulLnnqC", "precision": 5}
+            assert default['format'] == 'geojson'
+            assert default['result']['geojson'] == geojson
+    
     def test_get_route_status_failed(self, client):
         """Test GET /api/regions/{region_id}/routes/{job_id} endpoint with failed job."""
         with patch('backend.app.region_registry') as mock_registry, \
@@ -254,6 +306,36 @@ class TestRoutesAPI:
             assert response.status_code == 404
             data = response.get_json()
             assert 'error' in data
+    
+    def test_get_route_geometry(self, client):
+        """Test GET /api/regions/{region_id}/routes/{job_id}/geometry endpoint."""
+        geometry = {
+            "type": "FeatureCollection",
+            "features": [{"type": "Feature", "properties": {"day": 1},
+                          "geometry": {"type": "LineString", "coordinates": [[-3.0, 54.0], [-2.9, 54.1]]}}]
+        }
+        with patch('backend.app.region_registry') as mock_registry, \
+             patch('backend.app.load_route_geometry', return_value=geometry) as mock_load:
+            
+            mock_registry.region_exists.return_value = True
+            
+            response = client.get('/api/regions/lake_district/routes/test_job_123/geometry')
+            
+            assert response.status_code == 200
+            assert response.get_json()['geometry'] == geometry
+            mock_load.assert_called_once_with('test_job_123')
+    
+    def test_get_route_geometry_not_found(self, client):
+        """Test the geometry endpoint when the job's geometry is missing or expired."""
+        with patch('backend.app.region_registry') as mock_registry, \
+             patch('backend.app.load_route_geometry', return_value=None):
+            
+            mock_registry.region_exists.return_value = True
+            
+            response = client.get('/api/regions/lake_district/routes/expired_job/geometry')
+            
+            assert response.status_code == 404
+            assert response.get_json()['status'] == 'not_found'
 
 
 class TestHealthAPI:
@@ -1,8 +1,16 @@
 """
 Integration tests for route planner service.
 """
+import os
+import tempfile
+import threading
+import time
 import pytest
+from pathlib import Path
 from unittest.mock import patch, Mock
+from backend.services.cache_service import CacheService
+from backend.models.feasible_graph import FeasibleGraph
+from backend.models.waypoint_store import WaypointStore
 from backend.services.route_planner import RoutePlanner
 
 
@@ -250,3 +258,507 @@ class TestRoutePlanner:
         with patch.object(planner.geoapify_client, 'get_route', return_value=None):
             result = planner._get_route_with_midpoint(start_coords, end_coords, midpoint, mode)
             assert result is None
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_generate_route_uses_leg_store(self, mock_registry):
+        """Test route generation served entirely from precomputed legs."""
+        mock_region = Mock()
+        mock_region.route_params.default_days = 2
+        mock_region.route_params.mode = "hike"
+        mock_registry.get_region.return_value = mock_region
+        mock_registry.load_waypoints.return_value = [
+            {"properties": {"id": "A", "name": "A"}, "geometry": {"coordinates": [-3.0, 54.0]}},
+            {"properties": {"id": "B", "name": "B"}, "geometry": {"coordinates": [-2.9, 54.1]}},
+            {"properties": {"id": "C", "name": "C"}, "geometry": {"coordinates": [-2.8, 54.2]}}
+        ]
+        
+        feasible_pairs = [
+            {"from": "A", "to": "B", "distance": 12.0},
+            {"from": "B", "to": "C", "distance": 13.0}
+        ]
+        midpoint = {"name": "Peak 1", "type": "Peak", "coords": [-2.95, 54.05]}
+        leg_store = {
+            "version": 1,
+            "mode": "hike",
+            "legs": {
+                "A|B": {"midpoint": midpoint, "distance": 12000, "time": 3600,
+                        "coords": [[-3.0, 54.0], [-2.95, 54.05], [-2.9, 54.1]]},
+                # Stored in the opposite direction; must be reversed on lookup
+                "C|B": {"midpoint": midpoint, "distance": 13000, "time": 3900,
+                        "coords": [[-2.8, 54.2], [-2.9, 54.1]]}
+            }
+        }
+        
+        planner = RoutePlanner()
+        
+        with patch.object(planner, '_get_feasible_pairs', return_value=feasible_pairs), \
+             patch.object(planner, '_get_scenic_points', return_value=[midpoint]), \
+             patch.object(planner.cache_service, 'get_leg_store', return_value=leg_store), \
+             patch.object(planner, '_get_route_with_midpoint') as mock_route:
+            
+            result = planner.generate_route("test_region", num_days=2, max_tries=1)
+            
+            mock_route.assert_not_called()
+            assert result['waypoints'] == ['A', 'B', 'C']
+            assert result['legs'][1]['coords'] == [(-2.9, 54.1), (-2.8, 54.2)]
+            assert result['legs'][1]['properties']['distance'] == 13000
+            
+            # A leg store routed for another mode must not be served
+            leg_store["mode"] = "bicycle"
+            planner.reload_dataset("test_region")
+            mock_route.return_value = {
+                "properties": {"distance": 1000, "time": 600},
+                "geometry": {"type": "LineString", "coordinates": [[-3.0, 54.0], [-2.9, 54.1]]},
+                "coords": [(-3.0, 54.0), (-2.9, 54.1)]
+            }
+            assert planner.get_dataset("test_region").leg_store is None
+            result = planner.generate_route("test_region", num_days=2, max_tries=1)
+            assert mock_route.call_count == 2
+            assert result['legs'][1]['properties']['distance'] == 1000
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_precompute_legs(self, mock_registry):
+        """Test precomputing legs routes each unordered pair once."""
+        mock_region = Mock()
+        mock_region.route_params.mode = "hike"
+        mock_registry.get_region.return_value = mock_region
+        mock_registry.load_waypoints.return_value = [
+            {"properties": {"id": "A", "name": "A"}, "geometry": {"coordinates": [-3.0, 54.0]}},
+            {"properties": {"id": "B", "name": "B"}, "geometry": {"coordinates": [-2.9, 54.1]}}
+        ]
+        feasible_pairs = [
+            {"from": "A", "to": "B", "distance": 12.0},
+            {"from": "B", "to": "A", "distance": 12.0}
+        ]
+        route_data = {
+            "properties": {"distance": 12000, "time": 3600},
+            "geometry": {"type": "LineString", "coordinates": [[-3.0, 54.0], [-2.9, 54.1]]},
+            "coords": [(-3.0, 54.0), (-2.9, 54.1)]
+        }
+        
+        planner = RoutePlanner()
+        
+        with patch.object(planner, '_get_feasible_pairs', return_value=feasible_pairs), \
+             patch.object(planner, '_get_scenic_points', return_value=[]), \
+             patch.object(planner.cache_service, 'get_leg_store', return_value=None), \
+             patch.object(planner.cache_service, 'set_leg_store') as mock_set, \
+             patch.object(planner, '_get_route_with_midpoint', return_value=route_data) as mock_route:
+            
+            counts = planner.precompute_legs("test_region")
+            
+            assert counts == {'routed': 1, 'failed': 0, 'total': 1}
+            assert mock_route.call_count == 1
+            saved = mock_set.call_args[0][1]
+            assert list(saved['legs']) == ['A|B']
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_precompute_legs_leaves_cached_store_untouched(self, mock_registry):
+        """Test new legs go into a copy, not the leg store shared through the cache's memory tier."""
+        mock_region = Mock()
+        mock_region.route_params.mode = "hike"
+        mock_registry.get_region.return_value = mock_region
+        mock_registry.load_waypoints.return_value = [
+            {"properties": {"id": "A", "name": "A"}, "geometry": {"coordinates": [-3.0, 54.0]}},
+            {"properties": {"id": "B", "name": "B"}, "geometry": {"coordinates": [-2.9, 54.1]}},
+            {"properties": {"id": "C", "name": "C"}, "geometry": {"coordinates": [-2.8, 54.2]}}
+        ]
+        feasible_pairs = [
+            {"from": "A", "to": "B", "distance": 12.0},
+            {"from": "B", "to": "C", "distance": 12.0}
+        ]
+        shared = {"version": 1, "mode": "hike", "legs": {
+            "A|B": {"midpoint": None, "distance": 12000, "time": 3600, "coords": [[-3.0, 54.0], [-2.9, 54.1]]}
+        }}
+        route_data = {
+            "properties": {"distance": 12000, "time": 3600},
+            "geometry": {"type": "LineString", "coordinates": [[-2.9, 54.1], [-2.8, 54.2]]},
+            "coords": [(-2.9, 54.1), (-2.8, 54.2)]
+        }
+        
+        planner = RoutePlanner()
+        
+        with patch.object(planner, '_get_feasible_pairs', return_value=feasible_pairs), \
+             patch.object(planner, '_get_scenic_points', return_value=[]), \
+             patch.object(planner.cache_service, 'get_leg_store', return_value=shared), \
+             patch.object(planner.cache_service, 'set_leg_store') as mock_set, \
+             patch.object(planner, '_get_route_with_midpoint', return_value=route_data):
+            
+            counts = planner.precompute_legs("test_region")
+        
+        assert counts == {'routed': 1, 'failed': 0, 'total': 2}
+        assert list(shared['legs']) == ['A|B']
+        assert sorted(mock_set.call_args[0][1]['legs']) == ['A|B', 'B|C']
+    
+    def test_route_legs_concurrently_in_day_order(self):
+        """Test legs routed through the thread pool come back in day order."""
+        planner = RoutePlanner(max_concurrency=3)
+        waypoints = WaypointStore(
+            ["A", "B", "C", "D"], ["A", "B", "C", "D"],
+            [-3.0, -2.9, -2.8, -2.7], [54.0, 54.1, 54.2, 54.3]
+        )
+        
+        def fake_route(start_coords, end_coords, midpoint, mode):
+            return {"properties": {"distance": 1, "time": 1}, "geometry": {}, "coords": [tuple(start_coords), tuple(end_coords)]}
+        
+        with patch.object(planner, '_get_route_with_midpoint', side_effect=fake_route) as mock_route:
+            legs = planner._route_legs(
+                [(0, 1), (1, 2), (2, 3)], waypoints, [], None, None, "hike"
+            )
+        
+        assert mock_route.call_count == 3
+        assert [leg['coords'][0] for leg, _ in legs] == [(-3.0, 54.0), (-2.9, 54.1), (-2.8, 54.2)]
+    
+    def test_analyze_leg_surfaces_concurrently_in_day_order(self):
+        """Test surface lookups for all legs overlap and their analyses come back in day order."""
+        planner = RoutePlanner()
+        region = Mock()
+        region.name = "Test Region"
+        region.terrain_defaults.__dict__ = {}
+        legs = [{'coords': [(-3.0 + i * 0.1, 54.0)]} for i in range(3)]
+        
+        barrier = threading.Barrier(3, timeout=5)
+        
+        def fake_surface_data(coords, region_id=None):
+            # Every leg must be in flight at once for the barrier to release
+            barrier.wait()
+            return [coords[0][0]]
+        
+        with patch.object(planner.osm_client, 'get_surface_data', side_effect=fake_surface_data), \
+             patch('backend.services.route_planner.analyze_surface_types', side_effect=lambda data, defaults: data[0]):
+            analyses = planner._analyze_leg_surfaces("test_region", region, legs)
+        
+        assert analyses == [-3.0, -2.9, -2.8]
+    
+    def test_route_legs_fails_if_any_leg_fails(self):
+        """Test an attempt is abandoned when one of its legs cannot be routed."""
+        planner = RoutePlanner()
+        waypoints = WaypointStore(["A", "B"], ["A", "B"], [-3.0, -2.9], [54.0, 54.1])
+        
+        with patch.object(planner, '_get_route_with_midpoint', return_value=None):
+            assert planner._route_legs([(0, 1)], waypoints, [], None, None, "hike") is None
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_generate_route_speculative_cancels_remaining_attempts(self, mock_registry):
+        """Test speculative mode returns the first good-enough attempt and cancels the rest."""
+        mock_region = Mock()
+        mock_region.route_params.default_days = 2
+        mock_registry.get_region.return_value = mock_region
+        mock_registry.load_waypoints.return_value = [
+            {"properties": {"id": "A", "name": "A"}, "geometry": {"coordinates": [-3.0, 54.0]}},
+            {"properties": {"id": "B", "name": "B"}, "geometry": {"coordinates": [-2.9, 54.1]}},
+            {"properties": {"id": "C", "name": "C"}, "geometry": {"coordinates": [-2.8, 54.2]}}
+        ]
+        feasible_pairs = [
+            {"from": "A", "to": "B", "distance": 12.0},
+            {"from": "B", "to": "C", "distance": 12.0}
+        ]
+        good_route = {'waypoints': ['A', 'B', 'C'], 'legs': [], 'scenic_midpoints': []}
+        
+        calls = []
+        cancelled = []
+        lock = threading.Lock()
+        
+        def fake_attempt(context, cancel_event=None):
+            with lock:
+                calls.append(1)
+                is_first = len(calls) == 1
+            if is_first:
+                return 0.05, good_route
+            cancelled.append(cancel_event.wait(timeout=2))
+            return None
+        
+        planner = RoutePlanner()
+        
+        with patch.object(planner, '_get_feasible_pairs', return_value=feasible_pairs), \
+             patch.object(planner, '_get_scenic_points', return_value=[]), \
+             patch.object(planner.cache_service, 'get_leg_store', return_value=None), \
+             patch.object(planner, '_run_attempt', side_effect=fake_attempt):
+            
+            result = planner.generate_route(
+                "test_region", max_tries=10, good_enough_threshold=0.1, speculative_attempts=3
+            )
+        
+        assert result is good_route
+        assert len(calls) <= 3
+        assert all(cancelled)
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_rank_itineraries_prefers_low_overlap(self, mock_registry):
+        """Test ranked candidates put onward itineraries ahead of out-and-back ones."""
+        waypoints = [
+            {"properties": {"id": "A", "name": "A"}, "geometry": {"coordinates": [-3.0, 54.0]}},
+            {"properties": {"id": "B", "name": "B"}, "geometry": {"coordinates": [-3.0, 54.1]}},
+            {"properties": {"id": "C", "name": "C"}, "geometry": {"coordinates": [-3.0, 54.2]}},
+            {"properties": {"id": "D", "name": "D"}, "geometry": {"coordinates": [-3.0, 54.01]}}
+        ]
+        mock_region = Mock()
+        mock_region.route_params.default_days = 2
+        mock_region.route_params.mode = "hike"
+        mock_registry.get_region.return_value = mock_region
+        mock_registry.load_waypoints.return_value = waypoints
+        
+        # From B, continuing to C is onward; dropping back to D retraces A -> B
+        feasible_pairs = [
+            {"from": "A", "to": "B", "distance": 11.0},
+            {"from": "B", "to": "C", "distance": 11.0},
+            {"from": "B", "to": "D", "distance": 10.0}
+        ]
+        
+        planner = RoutePlanner()
+        attempted = []
+        
+        def fake_route_legs(legs, waypoints, *args, **kwargs):
+            attempted.append([waypoints.keys[a] for a, _ in legs] + [waypoints.keys[legs[-1][1]]])
+            return None
+        
+        with patch.object(planner, '_get_feasible_pairs', return_value=feasible_pairs), \
+             patch.object(planner, '_get_scenic_points', return_value=[]), \
+             patch.object(planner.cache_service, 'get_leg_store', return_value=None), \
+             patch.object(planner, '_route_legs', side_effect=fake_route_legs):
+            
+            planner.generate_route("test_region", num_days=2, max_tries=1)
+        
+        assert attempted == [['A', 'B', 'C']]
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_dataset_loaded_once_until_sources_change(self, mock_registry):
+        """Test region data is reused across calls and reloaded when its files change or on request."""
+        mock_region = Mock()
+        mock_registry.get_region.return_value = mock_region
+        mock_registry.load_waypoints.return_value = [
+            {"properties": {"id": "A", "name": "A"}, "geometry": {"coordinates": [-3.0, 54.0]}},
+            {"properties": {"id": "B", "name": "B"}, "geometry": {"coordinates": [-2.9, 54.1]}}
+        ]
+        feasible_pairs = [{"from": "A", "to": "B", "distance": 12.0}]
+        
+        planner = RoutePlanner()
+        versions = [(1.0, None, None)]
+        
+        with patch.object(planner, '_get_feasible_pairs', return_value=feasible_pairs) as mock_pairs, \
+             patch.object(planner, '_get_scenic_points', return_value=[]), \
+             patch.object(planner.cache_service, 'get_leg_store', return_value=None), \
+             patch.object(planner.cache_service, 'get_source_versions', side_effect=lambda region_id: versions[0]):
+            
+            first = planner.get_dataset("test_region")
+            assert planner.get_dataset("test_region") is first
+            assert first.graph.to_adjacency() == {"A": ["B"]}
+            assert first.waypoints.keys == ["A", "B"]
+            assert mock_pairs.call_count == 1
+            
+            versions[0] = (2.0, None, None)
+            second = planner.get_dataset("test_region")
+            assert second is not first
+            
+            planner.reload_dataset("test_region")
+            assert planner.get_dataset("test_region") is not second
+            assert mock_pairs.call_count == 3
+    
+    def _temp_cache_service(self, cache_dir):
+        with patch('backend.services.cache_service.SCENIC_CACHE_DIR', cache_dir / "scenic_points"), \
+             patch('backend.services.cache_service.FEASIBLE_PAIRS_CACHE_DIR', cache_dir / "feasible_pairs"), \
+             patch('backend.services.cache_service.LEG_STORE_DIR', cache_dir / "leg_store"), \
+             patch('backend.services.cache_service.CACHE_LOCK_DIR', cache_dir / "locks"):
+            return CacheService(redis_cache=None)
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_preload_dataset_skips_regions_needing_api_calls(self, mock_registry):
+        """Test preloading only loads regions whose caches are current, and never calls Places."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            planner = RoutePlanner()
+            service = self._temp_cache_service(Path(temp_dir))
+            planner.cache_service = service
+            service.set_feasible_pairs("test_region", [{"from": "A", "to": "B", "distance": 12.0}])
+            
+            with patch.object(planner.geoapify_client, 'get_scenic_points') as mock_fetch, \
+                 patch.object(planner, 'get_dataset') as mock_get:
+                assert planner.preload_dataset("test_region") is False
+                
+                service.set_scenic_points("test_region", [{"name": "Tarn", "coords": [-3.0, 54.0]}])
+                assert planner.preload_dataset("test_region") is True
+            
+            mock_fetch.assert_not_called()
+            mock_get.assert_called_once_with("test_region", refresh_stale=False)
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_preload_dataset_loads_stale_caches_without_refreshing(self, mock_registry):
+        """Test preloading serves caches within max-stale as is, leaving their refresh to the job."""
+        mock_registry.get_region.return_value.route_params.mode = "hike"
+        mock_registry.load_waypoints.return_value = [
+            {"properties": {"id": "A", "name": "A"}, "geometry": {"coordinates": [-3.0, 54.0]}},
+            {"properties": {"id": "B", "name": "B"}, "geometry": {"coordinates": [-2.9, 54.1]}}
+        ]
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            planner = self._expired_scenic_cache(temp_dir, hours_past_ttl=1)
+            planner.refresh_mode = "rq"
+            planner.cache_service.set_feasible_pairs("test_region", [{"from": "A", "to": "B", "distance": 12.0}])
+            
+            with patch('backend.tasks.route_tasks.enqueue_region_cache_refresh') as mock_enqueue, \
+                 patch.object(planner.geoapify_client, 'get_scenic_points') as mock_fetch:
+                assert planner.preload_dataset("test_region") is True
+                mock_enqueue.assert_not_called()
+                
+                dataset = planner.get_dataset("test_region")
+                assert dataset.scenic_points[0]["name"] == "Old Tarn"
+                assert dataset.stale_caches == ("scenic_points",)
+            
+            mock_fetch.assert_not_called()
+            mock_enqueue.assert_called_once_with("scenic_points", "test_region")
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            planner = self._expired_scenic_cache(temp_dir, hours_past_ttl=24 * 8)
+            planner.refresh_mode = "rq"
+            planner.cache_service.set_feasible_pairs("test_region", [{"from": "A", "to": "B", "distance": 12.0}])
+            assert planner.preload_dataset("test_region") is False
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_scenic_points_filled_once_by_concurrent_callers(self, mock_registry):
+        """Test concurrent misses make a single Places call and all callers get its result."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            planner = RoutePlanner()
+            planner.cache_service = self._temp_cache_service(Path(temp_dir))
+            points = [{"name": "Tarn", "coords": [-3.0, 54.0]}]
+            
+            def slow_fetch(*args, **kwargs):
+                time.sleep(0.2)
+                return points
+            
+            with patch.object(planner.geoapify_client, 'get_scenic_points', side_effect=slow_fetch) as mock_fetch:
+                results = []
+                threads = [
+                    threading.Thread(target=lambda: results.append(planner._get_scenic_points("test_region")))
+                    for _ in range(4)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            
+            assert mock_fetch.call_count == 1
+            assert results == [points] * 4
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_expired_scenic_points_served_while_another_filler_runs(self, mock_registry):
+        """Test a caller that finds the fill lock taken gets the expired copy instead of waiting."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            planner = RoutePlanner()
+            planner.refresh_mode = "off"
+            service = self._temp_cache_service(Path(temp_dir))
+            planner.cache_service = service
+            stale_points = [{"name": "Old Tarn", "coords": [-3.0, 54.0]}]
+            
+            service.set_scenic_points("test_region", stale_points)
+            scenic_file = Path(temp_dir) / "scenic_points" / "test_region.json"
+            expired = time.time() - (service.ttl_hours + 1) * 3600
+            os.utime(scenic_file, (expired, expired))
+            
+            holding = threading.Event()
+            release = threading.Event()
+            
+            def hold_lock():
+                with service.fill_lock("scenic_points", "test_region"):
+                    holding.set()
+                    release.wait(5)
+            
+            holder = threading.Thread(target=hold_lock)
+            holder.start()
+            holding.wait(5)
+            try:
+                with patch.object(planner.geoapify_client, 'get_scenic_points') as mock_fetch:
+                    assert planner._get_scenic_points("test_region") == stale_points
+                    mock_fetch.assert_not_called()
+            finally:
+                release.set()
+                holder.join()
+    
+    def _expired_scenic_cache(self, temp_dir, hours_past_ttl):
+        planner = RoutePlanner()
+        service = self._temp_cache_service(Path(temp_dir))
+        planner.cache_service = service
+        service.set_scenic_points("test_region", [{"name": "Old Tarn", "coords": [-3.0, 54.0]}])
+        
+        expired = time.time() - (service.ttl_hours + hours_past_ttl) * 3600
+        os.utime(Path(temp_dir) / "scenic_points" / "test_region.json", (expired, expired))
+        return planner
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_expired_scenic_points_served_and_refreshed_in_background(self, mock_registry):
+        """Test an expired entry within max-stale is returned at once and refreshed by a background thread."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            planner = self._expired_scenic_cache(temp_dir, hours_past_ttl=1)
+            fresh_points = [{"name": "New Tarn", "coords": [-3.1, 54.1]}]
+            
+            with patch.object(planner.geoapify_client, 'get_scenic_points', return_value=fresh_points) as mock_fetch:
+                assert planner._get_scenic_points("test_region")[0]["name"] == "Old Tarn"
+                for thread in threading.enumerate():
+                    if thread.name.startswith("refresh-scenic_points"):
+                        thread.join(5)
+                
+                assert mock_fetch.call_count == 1
+                assert planner._get_scenic_points("test_region") == fresh_points
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_scenic_points_past_max_stale_refetched_inline(self, mock_registry):
+        """Test an entry older than the max-stale window is not served and is refetched before returning."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            planner = self._expired_scenic_cache(temp_dir, hours_past_ttl=24 * 365)
+            fresh_points = [{"name": "New Tarn", "coords": [-3.1, 54.1]}]
+            
+            with patch.object(planner.geoapify_client, 'get_scenic_points', return_value=fresh_points):
+                assert planner._get_scenic_points("test_region") == fresh_points
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_expired_scenic_points_refresh_enqueued_once_in_rq_mode(self, mock_registry):
+        """Test RQ refresh mode enqueues one worker refresh however many requests see the expired entry."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            planner = self._expired_scenic_cache(temp_dir, hours_past_ttl=1)
+            planner.refresh_mode = "rq"
+            
+            with patch('backend.tasks.route_tasks.enqueue_region_cache_refresh') as mock_enqueue, \
+                 patch.object(planner.geoapify_client, 'get_scenic_points') as mock_fetch:
+                planner._get_scenic_points("test_region")
+                planner._get_scenic_points("test_region")
+            
+            mock_enqueue.assert_called_once_with("scenic_points", "test_region")
+            mock_fetch.assert_not_called()
+    
+    def test_scenic_index_reused_for_reloaded_points(self):
+        """Test a reload of an unchanged scenic cache file reuses the index, and a rewrite rebuilds it."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            planner = RoutePlanner()
+            service = self._temp_cache_service(Path(temp_dir))
+            planner.cache_service = service
+            service.set_scenic_points("test_region", [{"name": "Tarn", "coords": [-3.0, 54.0]}])
+            
+            index = planner._get_scenic_index("test_region", service.get_scenic_points("test_region"))
+            reloaded = [dict(point) for point in service.get_scenic_points("test_region")]
+            assert planner._get_scenic_index("test_region", reloaded) is index
+            
+            service.set_scenic_points("test_region", [{"name": "Fell", "coords": [-3.1, 54.1]}, *reloaded])
+            rebuilt = planner._get_scenic_index("test_region", service.get_scenic_points("test_region"))
+            assert rebuilt is not index
+            assert len(rebuilt) == 2
+    
+    @patch('backend.services.route_planner.region_registry')
+    def test_expired_pairs_with_current_graph_sidecar_refreshed_once(self, mock_registry):
+        """Test a graph sidecar of an expired pairs file is served while one refresh is queued."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            planner = RoutePlanner(refresh_mode="rq")
+            service = self._temp_cache_service(Path(temp_dir))
+            planner.cache_service = service
+            waypoints = WaypointStore(["A", "B"], ["A", "B"], [-3.0, -2.9], [54.0, 54.1])
+            
+            pairs = [{"from": "A", "to": "B", "distance": 12.0}]
+            service.set_feasible_pairs("test_region", pairs)
+            expired = time.time() - (service.ttl_hours + 1) * 3600
+            os.utime(Path(temp_dir) / "feasible_pairs" / "test_region.json", (expired, expired))
+            graph = FeasibleGraph.from_pairs(pairs, waypoints.keys)
+            service.set_feasible_graph("test_region", graph)
+            
+            with patch('backend.tasks.route_tasks.enqueue_region_cache_refresh') as mock_enqueue, \
+                 patch.object(planner, '_get_feasible_pairs') as mock_pairs:
+                for _ in range(2):
+                    assert planner._get_feasible_graph("test_region", waypoints).to_adjacency() == graph.to_adjacency()
+            
+            mock_enqueue.assert_called_once_with("feasible_pairs", "test_region")
+            mock_pairs.assert_not_called()
@@ -0,0 +1,52 @@
+"""
+Unit tests for cache file encodings and atomic writes.
+"""
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from backend.utils.cache_codec import FORMAT_SUFFIXES, atomic_write, decode, encode, read_file, write_file
+
+
+VALUE = [{"from": "A", "to": "B", "distance": 12.5, "name": "Café"}] * 10
+
+
+class TestCacheCodec:
+    """Test encode/decode and atomic writes."""
+    
+    @pytest.mark.parametrize("fmt", list(FORMAT_SUFFIXES))
+    def test_round_trip_detects_format(self, fmt):
+        """Test every format decodes without being told which it is."""
+        if fmt == "msgpack":
+            pytest.importorskip("msgpack")
+        if fmt == "zstd":
+            pytest.importorskip("zstandard")
+        
+        assert decode(encode(VALUE, fmt)) == VALUE
+    
+    def test_compressed_json_is_smaller(self):
+        """Test json.gz shrinks repetitive cache data and plain JSON is compact."""
+        assert len(encode(VALUE, "json.gz")) < len(encode(VALUE, "json")) / 4
+        assert b" " not in encode({"a": [1, 2]}, "json")
+    
+    def test_unknown_format_rejected(self):
+        """Test an unsupported format name raises ValueError."""
+        with pytest.raises(ValueError):
+            encode(VALUE, "xml")
+    
+    def test_atomic_write_keeps_old_file_on_failure(self):
+        """Test a failed write leaves the previous file intact and no temp files behind."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "region.json"
+            write_file(path, VALUE)
+            
+            def fail(f):
+                f.write(b"[{\"partial")
+                raise RuntimeError("interrupted")
+            
+            with pytest.raises(RuntimeError):
+                atomic_write(path, fail)
+            
+            assert read_file(path) == VALUE
+            assert [p.name for p in Path(temp_dir).iterdir()] == ["region.json"]
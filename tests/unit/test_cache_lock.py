@@ -0,0 +1,50 @@
+"""
+Unit tests for single-flight cache fill locks.
+"""
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from backend.services.cache_lock import FillLock
+
+
+class TestFillLock:
+    """Test FillLock."""
+    
+    def test_excludes_other_threads(self):
+        """Test a second thread cannot take a held lock without waiting, but can once it is released."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results = []
+            
+            def try_lock():
+                with FillLock("scenic_points:test_region", Path(temp_dir), timeout=0) as acquired:
+                    results.append(acquired)
+            
+            with FillLock("scenic_points:test_region", Path(temp_dir), timeout=0) as acquired:
+                assert acquired
+                thread = threading.Thread(target=try_lock)
+                thread.start()
+                thread.join()
+            
+            try_lock()
+            assert results == [False, True]
+    
+    def test_excludes_other_processes_via_lock_file(self):
+        """Test a lock file held through another open file description blocks until the timeout."""
+        fcntl = pytest.importorskip("fcntl")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            lock_dir = Path(temp_dir)
+            with FillLock("feasible_pairs:test_region", lock_dir) as acquired:
+                assert acquired
+            
+            # flock treats each open() as a separate holder, like another process
+            with open(lock_dir / "feasible_pairs.test_region.lock", 'a') as other:
+                fcntl.flock(other, fcntl.LOCK_EX)
+                with FillLock("feasible_pairs:test_region", lock_dir, timeout=0.2) as acquired:
+                    assert not acquired
+                fcntl.flock(other, fcntl.LOCK_UN)
+            
+            with FillLock("feasible_pairs:test_region", lock_dir, timeout=0.2) as acquired:
+                assert acquired
@@ -4,10 +4,12 @@ Unit tests for cache service.
 import pytest
 import tempfile
 import json
+import os
 from pathlib import Path
 from unittest.mock import patch, mock_open
 from datetime import datetime, timedelta
 
+from backend.models.feasible_graph import FeasibleGraph
 from backend.services.cache_service import CacheService
 
 
@@ -106,6 +108,92 @@ class TestCacheService:
                 result = service.get_feasible_pairs("nonexistent")
                 assert result is None
     
+    def test_memory_tier_serves_repeat_reads_until_file_changes(self):
+        """Test repeat reads skip the file and a rewritten file is picked up."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = Path(temp_dir)
+            
+            with patch('backend.services.cache_service.SCENIC_CACHE_DIR', cache_dir), \
+                 patch('backend.services.cache_service.FEASIBLE_PAIRS_CACHE_DIR', cache_dir):
+                
+                service = CacheService()
+                region_id = "test_region"
+                pairs_file = cache_dir / f"{region_id}.json"
+                pairs_file.write_text(json.dumps([{"from": "A", "to": "B", "distance": 12.5}]))
+                
+                first = service.get_feasible_pairs(region_id)
+                with patch('builtins.open', side_effect=AssertionError("file tier read")):
+                    assert service.get_feasible_pairs(region_id) is first
+                
+                # A re-prepared file (different size) replaces the memory entry
+                pairs_file.write_text(json.dumps([{"from": "A", "to": "C", "distance": 8.25}]))
+                assert service.get_feasible_pairs(region_id)[0]["to"] == "C"
+                assert service.get_feasible_pairs("nonexistent") is None
+                
+                memory = service.get_cache_stats()["memory_cache"]
+                assert memory["memory_hits"] == 1
+                assert memory["file_hits"] == 2
+                assert memory["misses"] == 1
+                
+                service.invalidate_region_cache(region_id)
+                assert service.get_cache_stats()["memory_cache"]["entries"] == 0
+    
+    def test_compressed_format_is_read_by_any_service(self):
+        """Test files in another format are found, and rewriting replaces them."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = Path(temp_dir)
+            
+            with patch('backend.services.cache_service.SCENIC_CACHE_DIR', cache_dir), \
+                 patch('backend.services.cache_service.FEASIBLE_PAIRS_CACHE_DIR', cache_dir):
+                
+                region_id = "test_region"
+                feasible_pairs = [{"from": "A", "to": "B", "distance": 12.5}]
+                
+                CacheService(file_format="json.gz").set_feasible_pairs(region_id, feasible_pairs)
+                assert (cache_dir / f"{region_id}.json.gz").exists()
+                
+                service = CacheService(file_format="json")
+                assert service.get_feasible_pairs(region_id) == feasible_pairs
+                assert region_id in service.get_cache_stats()["feasible_pairs_cache"]
+                
+                service.set_feasible_pairs(region_id, feasible_pairs)
+                assert sorted(p.name for p in cache_dir.iterdir()) == [f"{region_id}.json"]
+                
+                service.invalidate_region_cache(region_id)
+                assert list(cache_dir.iterdir()) == []
+    
+    def test_feasible_graph_tracks_pairs_file(self):
+        """Test the CSR graph sidecar is only served while its pairs file is unchanged."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = Path(temp_dir)
+            
+            with patch('backend.services.cache_service.SCENIC_CACHE_DIR', cache_dir), \
+                 patch('backend.services.cache_service.FEASIBLE_PAIRS_CACHE_DIR', cache_dir):
+                
+                service = CacheService()
+                region_id = "test_region"
+                feasible_pairs = [
+                    {"from": "A", "to": "B", "distance": 12.5}
+                ]
+                graph = FeasibleGraph.from_pairs(feasible_pairs, ["A", "B"])
+                
+                # No pairs file yet, so nothing is written
+                service.set_feasible_graph(region_id, graph)
+                assert not (cache_dir / f"{region_id}.npz").exists()
+                
+                service.set_feasible_pairs(region_id, feasible_pairs)
+                service.set_feasible_graph(region_id, graph)
+                
+                result = service.get_feasible_graph(region_id)
+                assert result.to_adjacency() == {"A": ["B"]}
+                assert result.valid_digest == graph.valid_digest
+                
+                # Rewriting the pairs file makes the sidecar stale
+                pairs_file = cache_dir / f"{region_id}.json"
+                mtime = pairs_file.stat().st_mtime
+                os.utime(pairs_file, (mtime + 10, mtime + 10))
+                assert service.get_feasible_graph(region_id) is None
+    
     def test_invalidate_region_cache(self):
         """Test region cache invalidation."""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -0,0 +1,57 @@
+"""
+Unit tests for the CSR feasible-pair graph.
+"""
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from backend.models.feasible_graph import FeasibleGraph
+
+
+PAIRS = [
+    {"from": "B", "to": "C", "distance": 4.0},
+    {"from": "A", "to": "C", "distance": 3.0},
+    {"from": "A", "to": "B", "distance": 2.0},
+    {"from": "A", "to": "X", "distance": 9.0},
+    {"from": "C", "to": "C", "distance": 0.0}
+]
+
+
+class TestFeasibleGraph:
+    """Test FeasibleGraph construction, slicing and persistence."""
+    
+    def test_from_pairs_builds_csr_rows(self):
+        """Test each node's neighbours are a contiguous slice in pair-file order."""
+        graph = FeasibleGraph.from_pairs(PAIRS, ["A", "B", "C"])
+        
+        assert graph.num_nodes == 3
+        np.testing.assert_array_equal(graph.offsets, [0, 2, 3, 3])
+        assert [graph.keys[j] for j in graph.neighbors_of(graph.index_of("A"))] == ["C", "B"]
+        np.testing.assert_array_equal(graph.distances_of(0), [3.0, 2.0])
+        assert graph.neighbors_of(2).size == 0
+    
+    def test_from_pairs_drops_unknown_ids_and_self_loops(self):
+        """Test pairs to unknown waypoints and self-loops are filtered out."""
+        graph = FeasibleGraph.from_pairs(PAIRS, ["A", "B", "C"])
+        
+        assert graph.num_edges == 3
+        assert graph.index_of("X") is None
+        assert graph.to_adjacency() == {"A": ["C", "B"], "B": ["C"]}
+        assert graph.valid_digest == FeasibleGraph.digest(["C", "B", "A"])
+    
+    def test_save_and_load_round_trip(self):
+        """Test a saved graph loads with identical arrays and its source mtime."""
+        graph = FeasibleGraph.from_pairs(PAIRS, ["A", "B", "C"])
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "region.npz"
+            graph.save(path, source_mtime=123.5)
+            loaded = FeasibleGraph.load(path)
+        
+        assert loaded.keys == graph.keys
+        np.testing.assert_array_equal(loaded.offsets, graph.offsets)
+        np.testing.assert_array_equal(loaded.neighbors, graph.neighbors)
+        np.testing.assert_array_equal(loaded.distances, graph.distances)
+        assert loaded.valid_digest == graph.valid_digest
+        assert loaded.source_mtime == 123.5
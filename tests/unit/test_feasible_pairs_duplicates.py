@@ -1,6 +1,7 @@
 """
 Unit tests for feasible pair calculation with duplicate waypoint names.
 """
+from backend.models.waypoint_store import WaypointStore
 from backend.utils.geometry import calculate_feasible_pairs
 
 
@@ -19,9 +20,9 @@ def test_duplicate_names_do_not_collapse_waypoints():
     # Third point outside range to ensure it is excluded
     c = _feature("Ridge", -3.50, 54.00)
 
-    waypoints = [a, b, c]
+    store = WaypointStore.from_features([a, b, c])
 
-    pairs = calculate_feasible_pairs(waypoints, min_distance_km=10.0, max_distance_km=15.0)
+    pairs = calculate_feasible_pairs(store.keys, store.lons, store.lats, min_distance_km=10.0, max_distance_km=15.0)
 
     # Expect exactly two ordered pairs between the two Summits: a->b and b->a
     assert len(pairs) == 2
@@ -2,10 +2,14 @@
 Unit tests for GeoAPIfy client.
 """
 import pytest
-from unittest.mock import patch, Mock
+import tempfile
+from pathlib import Path
+from unittest.mock import patch, Mock, MagicMock
 import requests
 
 from backend.services.geoapify_client import GeoAPIfyClient, RouteResult
+from backend.services.http_session import send_with_retries
+from backend.services.tiered_cache import TieredCache
 
 
 class TestGeoAPIfyClient:
@@ -18,12 +22,53 @@ class TestGeoAPIfyClient:
         assert client.base_url == "https://api.geoapify.com/v1"
         assert client.places_url == "https://api.geoapify.com/v2/places"
     
+    def test_clients_share_pooled_session(self):
+        """Test every client in the process reuses one keep-alive session."""
+        first = GeoAPIfyClient()
+        second = GeoAPIfyClient(api_key="test_key")
+        assert first.session is second.session
+        
+        # Retries go through send_with_retries so each attempt is rate limited
+        adapter = first.session.get_adapter("https://api.geoapify.com")
+        assert adapter.max_retries.total == 0
+    
+    @patch('backend.services.http_session.time.sleep')
+    @patch('requests.Session.get')
+    def test_throttled_request_retried_through_limiter(self, mock_get, mock_sleep):
+        """Test a 429 is retried after Retry-After with a fresh limiter slot per attempt."""
+        throttled = Mock(status_code=429, headers={'Retry-After': '2'})
+        ok = Mock(status_code=200)
+        ok.json.return_value = {'features': []}
+        mock_get.side_effect = [throttled, ok]
+        
+        slots = []
+        with patch('backend.services.geoapify_client.geoapify_limiter') as mock_limiter:
+            mock_limiter.__enter__.side_effect = lambda: slots.append('acquire')
+            mock_limiter.__exit__.side_effect = lambda *args: slots.append('release')
+            mock_sleep.side_effect = lambda seconds: slots.append(f'sleep {seconds}')
+            
+            assert GeoAPIfyClient().get_scenic_points("-3.1,54.3,-2.9,54.5", ["natural"]) == []
+        
+        # The backoff sleep happens between attempts, with no slot held
+        assert slots == ['acquire', 'release', 'sleep 2.0', 'acquire', 'release']
+    
+    @patch('backend.services.http_session.time.sleep')
+    def test_long_retry_after_returned_without_waiting(self, mock_sleep):
+        """Test a Retry-After beyond the configured maximum gives up instead of sleeping."""
+        throttled = Mock(status_code=429, headers={'Retry-After': '3600'})
+        send = Mock(return_value=throttled)
+        
+        assert send_with_retries(send, MagicMock(), max_retries=3, max_retry_after=30) is throttled
+        assert send.call_count == 1
+        mock_sleep.assert_not_called()
+        throttled.close.assert_not_called()
+    
     def test_client_with_custom_api_key(self):
         """Test client with custom API key."""
         client = GeoAPIfyClient(api_key="test_key")
         assert client.api_key == "test_key"
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_route_success(self, mock_get):
         """Test successful route retrieval."""
         # Mock successful response
@@ -52,7 +97,7 @@ class TestGeoAPIfyClient:
         assert result.coords[0] == (-3.0, 54.0)
         assert result.coords[1] == (-2.9, 54.1)
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_route_failure(self, mock_get):
         """Test route retrieval failure."""
         # Mock failed response
@@ -66,7 +111,7 @@ class TestGeoAPIfyClient:
         
         assert result is None
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_route_no_features(self, mock_get):
         """Test route retrieval with no features."""
         # Mock response with no features
@@ -93,7 +138,7 @@ class TestGeoAPIfyClient:
         result = client.get_route([(54.0, -3.0)])
         assert result is None
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_scenic_points_success(self, mock_get):
         """Test successful scenic points retrieval."""
         # Mock successful response
@@ -137,7 +182,7 @@ class TestGeoAPIfyClient:
         assert result[1]['type'] == 'Viewpoint'
         assert result[1]['coords'] == [-2.9, 54.1]
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_scenic_points_failure(self, mock_get):
         """Test scenic points retrieval failure."""
         # Mock failed response
@@ -153,7 +198,7 @@ class TestGeoAPIfyClient:
         
         assert result == []
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_scenic_points_no_features(self, mock_get):
         """Test scenic points retrieval with no features."""
         # Mock response with no features
@@ -205,3 +250,34 @@ class TestGeoAPIfyClient:
         assert coords[1] == (-2.9, 54.1)
         assert coords[2] == (-2.8, 54.2)
         assert coords[3] == (-2.7, 54.3)
+    
+    @patch('requests.Session.get')
+    def test_get_route_uses_leg_cache(self, mock_get):
+        """Test repeated legs are served from the leg cache."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            'features': [{
+                'properties': {'distance': 1000, 'time': 3600},
+                'geometry': {
+                    'type': 'LineString',
+                    'coordinates': [[-3.0, 54.0], [-2.9, 54.1]]
+                }
+            }]
+        }
+        mock_get.return_value = mock_response
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = GeoAPIfyClient(leg_cache=TieredCache(Path(temp_dir), ttl_hours=1))
+            waypoints = [(54.0, -3.0), (54.1, -2.9)]
+            
+            first = client.get_route(waypoints)
+            # Sub-metre jitter rounds to the same cache key
+            second = client.get_route([(54.0000001, -3.0), (54.1, -2.9)])
+            
+            assert mock_get.call_count == 1
+            assert second.properties == first.properties
+            assert second.coords == first.coords
+            
+            client.get_route(waypoints, mode="walk")
+            assert mock_get.call_count == 2
@@ -0,0 +1,168 @@
+"""
+Unit tests for geometry utilities.
+"""
+import numpy as np
+from geopy.distance import geodesic
+
+from backend.models.waypoint_store import WaypointStore
+from backend.utils.geometry import (
+    calculate_feasible_pairs,
+    calculate_route_overlap,
+    haversine_km,
+    sample_polyline,
+    simplify_polyline,
+)
+
+
+def _feature(name: str, lon: float, lat: float):
+    return {
+        "type": "Feature",
+        "properties": {"name": name},
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+    }
+
+
+class TestHaversine:
+    """Test the vectorized haversine engine."""
+
+    def test_matches_geodesic_within_tolerance(self):
+        """Haversine should stay within 0.5% of the ellipsoidal distance at UK latitudes."""
+        lats = np.array([54.0, 54.1, 53.3])
+        lons = np.array([-3.1, -2.9, -1.7])
+        result = haversine_km(54.4, -3.0, lats, lons)
+
+        for lat, lon, dist in zip(lats, lons, result):
+            expected = geodesic((54.4, -3.0), (lat, lon)).kilometers
+            assert abs(dist - expected) / expected < 0.005
+
+    def test_zero_distance(self):
+        """Identical points should be zero distance apart."""
+        assert float(haversine_km(54.0, -3.0, 54.0, -3.0)) == 0.0
+
+
+class TestCalculateFeasiblePairs:
+    """Test feasible pair calculation."""
+
+    def test_pairs_are_symmetric_and_ordered(self):
+        """Every pair is emitted in both directions, sorted by source then target."""
+        waypoints = [
+            _feature("A", -3.00, 54.00),
+            _feature("B", -3.16, 54.00),
+            _feature("C", -3.00, 54.10),
+            _feature("D", -4.00, 55.00),
+        ]
+
+        store = WaypointStore.from_features(waypoints)
+        pairs = calculate_feasible_pairs(store.keys, store.lons, store.lats, min_distance_km=5.0, max_distance_km=15.0)
+        edges = {(p["from"], p["to"]) for p in pairs}
+
+        assert len(pairs) == len(edges)
+        assert all((to, frm) in edges for frm, to in edges)
+        assert not any("D:" in frm or "D:" in to for frm, to in edges)
+
+        order = [(p["from"], p["to"]) for p in pairs]
+        source_index = {"A": 0, "B": 1, "C": 2}
+        keys = [(source_index[f.split(":")[0]], source_index[t.split(":")[0]]) for f, t in order]
+        assert keys == sorted(keys)
+
+    def test_fewer_than_two_waypoints(self):
+        """No pairs can be formed from a single waypoint."""
+        assert calculate_feasible_pairs(["A"], [-3.0], [54.0], 0, 100) == []
+
+
+class TestCalculateRouteOverlap:
+    """Test tolerance-based route overlap."""
+
+    def test_identical_legs_fully_overlap(self):
+        """A leg retraced exactly scores 1."""
+        leg = [(-3.0, 54.0), (-3.0, 54.01), (-2.99, 54.02)]
+        assert calculate_route_overlap(leg, leg) == 1.0
+        assert calculate_route_overlap(leg, list(reversed(leg))) == 1.0
+
+    def test_near_identical_legs_overlap(self):
+        """Vertices differing at the 6th decimal place still count as shared trail."""
+        leg1 = [(-3.0, 54.0), (-3.0, 54.01)]
+        leg2 = [(-3.000001, 54.000001), (-3.000001, 54.010001)]
+        assert calculate_route_overlap(leg1, leg2) > 0.8
+
+    def test_disjoint_legs_do_not_overlap(self):
+        """Legs kilometres apart share nothing."""
+        leg1 = [(-3.0, 54.0), (-3.0, 54.01)]
+        leg2 = [(-2.9, 54.0), (-2.9, 54.01)]
+        assert calculate_route_overlap(leg1, leg2) == 0
+
+    def test_empty_leg(self):
+        """An empty leg has no overlap."""
+        assert calculate_route_overlap([], [(-3.0, 54.0)]) == 0
+
+
+class TestSamplePolyline:
+    """Test adaptive polyline sampling."""
+
+    def test_samples_by_distance_including_endpoints(self):
+        """A straight 2 km route sampled every 500 m gives 5 samples from start to end."""
+        # 0.0305 degrees of longitude is ~2 km at 54N
+        route = [(-3.0 + i * 0.0305 / 200, 54.0) for i in range(201)]
+        samples = sample_polyline(route, spacing_m=500, min_separation_m=100)
+
+        assert len(samples) == 5
+        assert samples[0] == route[0]
+        assert samples[-1] == route[-1]
+        gaps = haversine_km(
+            [lat for _, lat in samples[:-1]], [lon for lon, _ in samples[:-1]],
+            [lat for _, lat in samples[1:]], [lon for lon, _ in samples[1:]]
+        )
+        assert np.all(gaps >= 0.1)
+
+    def test_adds_sample_at_sharp_bend(self):
+        """A right-angle turn between regular samples gets its own sample."""
+        east = [(-3.0 + i * 0.00004, 54.0) for i in range(150)]
+        north = [(east[-1][0], 54.0 + i * 0.00004) for i in range(1, 150)]
+        samples = sample_polyline(east + north, spacing_m=2000, min_separation_m=100)
+
+        corner = np.array(east[-1])
+        assert min(np.hypot(*(np.array(s) - corner)) for s in samples) < 0.001
+
+    def test_caps_samples_on_switchback_leg(self):
+        """A zigzag leg with a bend every 250 m still returns at most max_samples, endpoints included."""
+        # 120 legs of ~250 m alternating north-east and south-east: ~30 km with ~119 sharp bends
+        route = [(-3.0, 54.0)]
+        for i in range(120):
+            lon, lat = route[-1]
+            route.append((lon + 0.0027, lat + (0.0016 if i % 2 == 0 else -0.0016)))
+
+        uncapped = sample_polyline(route, spacing_m=500, min_separation_m=100)
+        samples = sample_polyline(route, spacing_m=500, min_separation_m=100, max_samples=60)
+
+        assert len(uncapped) > 60
+        assert len(samples) == 60
+        assert samples[0] == route[0]
+        assert samples[-1] == route[-1]
+
+    def test_drops_samples_with_overlapping_buffers(self):
+        """Routes shorter than the minimum separation collapse to a single sample."""
+        route = [(-3.0, 54.0), (-3.0, 54.0003)]
+        assert sample_polyline(route, spacing_m=10, min_separation_m=100) == [route[0]]
+
+
+class TestSimplifyPolyline:
+    """Test Douglas-Peucker simplification."""
+
+    def test_straight_line_collapses_to_endpoints(self):
+        """Collinear vertices are all dropped."""
+        route = [(-3.0 + i * 0.0001, 54.0) for i in range(500)]
+        assert simplify_polyline(route, 5) == [route[0], route[-1]]
+
+    def test_keeps_vertices_beyond_tolerance(self):
+        """A corner further from the chord than the tolerance is kept; small wiggles are not."""
+        # ~1 m jitter on the way out, then a ~1 km excursion north
+        route = [(-3.0 + i * 0.0001, 54.0 + (0.00001 if i % 2 else 0.0)) for i in range(100)]
+        route += [(-2.99, 54.01), (-2.98, 54.0)]
+        simplified = simplify_polyline(route, 10)
+
+        assert simplified == [route[0], route[99], (-2.99, 54.01), (-2.98, 54.0)]
+
+    def test_zero_tolerance_keeps_everything(self):
+        """A tolerance of 0 disables simplification."""
+        route = [(-3.0, 54.0), (-2.99, 54.001), (-2.98, 54.0)]
+        assert simplify_polyline(route, 0) == route
@@ -0,0 +1,83 @@
+"""
+Unit tests for itinerary search over the feasible-pair graph.
+"""
+import random
+
+from backend.utils.itinerary_search import ItinerarySearch, build_adjacency
+
+
+def _pairs(edges):
+    pairs = []
+    for a, b in edges:
+        pairs.append({"from": a, "to": b, "distance": 12.0})
+        pairs.append({"from": b, "to": a, "distance": 12.0})
+    return pairs
+
+
+class TestItinerarySearch:
+    """Test ItinerarySearch."""
+
+    def test_build_adjacency_filters_unknown_ids(self):
+        """Pairs referencing unknown waypoints are dropped."""
+        adjacency = build_adjacency(_pairs([("A", "B"), ("B", "X")]), ["A", "B"])
+        assert adjacency == {"A": ["B"], "B": ["A"]}
+
+    def test_sampled_itineraries_are_complete_simple_paths(self):
+        """Every sample has num_days legs over feasible edges without revisits."""
+        edges = [("A", "B"), ("B", "C"), ("C", "D"), ("D", "E"), ("B", "F"), ("F", "G")]
+        adjacency = build_adjacency(_pairs(edges), "ABCDEFG")
+        search = ItinerarySearch(adjacency, num_days=3)
+        rng = random.Random(1)
+
+        for _ in range(30):
+            path = search.sample(rng)
+            assert len(path) == 4
+            assert len(set(path)) == 4
+            assert all(b in adjacency[a] for a, b in zip(path, path[1:]))
+
+    def test_dead_end_nodes_are_pruned(self):
+        """Nodes that cannot start an itinerary of the requested length are not starts."""
+        # A star: every 2-leg path must pass through the hub, so no 3-leg simple path exists
+        adjacency = build_adjacency(_pairs([("H", "A"), ("H", "B"), ("H", "C")]), "HABC")
+        search = ItinerarySearch(adjacency, num_days=3)
+
+        assert search.sample(random.Random(0)) is None
+        assert list(search.enumerate()) == []
+
+    def test_unreachable_depth_has_no_starts(self):
+        """A graph too short for the requested length has no valid starts."""
+        adjacency = build_adjacency([{"from": "A", "to": "B", "distance": 12.0}], "AB")
+        assert ItinerarySearch(adjacency, num_days=2).starts == []
+
+    def test_sample_excludes_tried_itineraries(self):
+        """Excluded itineraries are not returned again."""
+        adjacency = build_adjacency(_pairs([("A", "B"), ("B", "C")]), "ABC")
+        search = ItinerarySearch(adjacency, num_days=2)
+        tried = set()
+
+        for _ in range(2):
+            path = search.sample(random.Random(0), exclude=tried)
+            tried.add(tuple(path))
+
+        assert tried == {("A", "B", "C"), ("C", "B", "A")}
+        assert search.sample(random.Random(0), exclude=tried) is None
+
+    def test_sample_finds_last_untried_itinerary(self):
+        """Sampling falls back to enumeration when its random tries only find excluded itineraries."""
+        # Ten 2-leg itineraries, all starting at S; only one is left untried
+        ends = [f"M{i}" for i in range(10)]
+        adjacency = {"S": ends, **{m: ["E"] for m in ends}}
+        search = ItinerarySearch(adjacency, num_days=2)
+        tried = {("S", m, "E") for m in ends[1:]}
+
+        for seed in range(20):
+            assert search.sample(random.Random(seed), exclude=tried) == ["S", "M0", "E"]
+
+    def test_enumerate_respects_limit(self):
+        """Enumeration yields distinct itineraries up to the limit."""
+        edges = [("A", "B"), ("B", "C"), ("C", "D"), ("D", "A")]
+        search = ItinerarySearch(build_adjacency(_pairs(edges), "ABCD"), num_days=2)
+
+        paths = list(search.enumerate(limit=5))
+        assert len(paths) == 5
+        assert len({tuple(p) for p in paths}) == 5
@@ -0,0 +1,147 @@
+"""
+Unit tests for OSM client.
+"""
+import tempfile
+from unittest.mock import patch, Mock
+
+from backend.services.osm_client import OSMClient, SurfaceData
+from backend.services.tiered_cache import TieredCache
+
+
+def _way(tags, nodes):
+    return {"type": "way", "tags": tags, "geometry": [{"lat": lat, "lon": lon} for lon, lat in nodes]}
+
+
+class TestOSMClient:
+    """Test OSMClient service."""
+    
+    @patch('requests.Session.post')
+    def test_batched_query_makes_one_request(self, mock_post):
+        """Test the batched mode issues a single Overpass query per leg."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'elements': []}
+        mock_post.return_value = mock_response
+        
+        client = OSMClient(batched=True)
+        coords = [(-3.0 + i * 0.001, 54.0) for i in range(50)]
+        client.get_surface_data(coords, sample_size=10)
+        
+        assert mock_post.call_count == 1
+        query = mock_post.call_args[1]['data']
+        assert query.count('["surface"]') == 10
+        assert 'out tags geom;' in query
+    
+    @patch('requests.Session.post')
+    def test_batched_ways_map_back_to_nearby_samples(self, mock_post):
+        """Test each returned way is attributed only to samples within 50m of it."""
+        # A path running north through the first sample, and a road 500m east at the second
+        path = _way({"highway": "path", "surface": "gravel"}, [(-3.0, 53.999), (-3.0, 54.001)])
+        road = _way({"highway": "tertiary", "surface": "asphalt"}, [(-2.9925, 54.0), (-2.9925, 54.002)])
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'elements': [path, road]}
+        mock_post.return_value = mock_response
+        
+        client = OSMClient(batched=True)
+        result = client.get_surface_data([(-3.0, 54.0), (-2.9928, 54.001)])
+        
+        assert result == [
+            SurfaceData(surface='gravel', highway='path', tracktype='', lat=54.0, lon=-3.0),
+            SurfaceData(surface='asphalt', highway='tertiary', tracktype='', lat=54.001, lon=-2.9928)
+        ]
+    
+    @patch('requests.Session.post')
+    def test_per_point_mode(self, mock_post):
+        """Test the unbatched mode queries each sample separately."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'elements': [{"tags": {"highway": "track", "tracktype": "grade2"}}]}
+        mock_post.return_value = mock_response
+        
+        client = OSMClient(batched=False)
+        result = client.get_surface_data([(-3.0, 54.0), (-2.9, 54.1)], sample_size=10)
+        
+        assert mock_post.call_count == 2
+        assert [d.tracktype for d in result] == ['grade2', 'grade2']
+        assert result[0].surface == 'unknown'
+    
+    @patch('requests.Session.post')
+    def test_batched_query_error_returns_empty(self, mock_post):
+        """Test network errors degrade to no surface data."""
+        mock_post.side_effect = Exception("timeout")
+        
+        client = OSMClient(batched=True)
+        assert client.get_surface_data([(-3.0, 54.0)]) == []
+    
+    @patch('requests.Session.post')
+    def test_surface_cache_serves_repeat_cells_without_network(self, mock_post):
+        """Test a second lookup over the same cells makes no Overpass request, including for empty cells."""
+        path = _way({"highway": "path", "surface": "gravel"}, [(-3.0, 53.999), (-3.0, 54.001)])
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'elements': [path]}
+        mock_post.return_value = mock_response
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = OSMClient(batched=True, surface_cache=TieredCache(temp_dir, ttl_hours=1))
+            coords = [(-3.0, 54.0), (-2.9, 54.1)]
+            first = client.get_surface_data(coords, sample_size=10)
+            # A point a few metres away falls in the same cell
+            second = client.get_surface_data([(-3.00001, 54.00001), (-2.9, 54.1)], sample_size=10)
+        
+        assert mock_post.call_count == 1
+        assert [d.surface for d in first] == ['gravel']
+        assert [d.surface for d in second] == ['gravel']
+        assert (second[0].lon, second[0].lat) == (-3.00001, 54.00001)
+    
+    @patch('requests.Session.post')
+    def test_surface_cache_queries_only_missing_cells(self, mock_post):
+        """Test only samples in uncached cells are sent to Overpass."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'elements': []}
+        mock_post.return_value = mock_response
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = OSMClient(batched=True, surface_cache=TieredCache(temp_dir, ttl_hours=1))
+            client.get_surface_data([(-3.0, 54.0)])
+            client.get_surface_data([(-3.0, 54.0), (-2.9, 54.1)], sample_size=10)
+        
+        second_query = mock_post.call_args_list[1][1]['data']
+        assert second_query.count('["surface"]') == 1
+        assert '54.1,-2.9' in second_query
+    
+    @patch('requests.Session.post')
+    def test_surface_cache_skips_failed_lookups(self, mock_post):
+        """Test network failures are not cached as empty cells."""
+        mock_post.side_effect = Exception("timeout")
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = OSMClient(batched=True, surface_cache=TieredCache(temp_dir, ttl_hours=1))
+            client.get_surface_data([(-3.0, 54.0)])
+            client.get_surface_data([(-3.0, 54.0)])
+        
+        assert mock_post.call_count == 2
+    
+    def test_surface_cell_key_resolution(self):
+        """Test cell keys group points tens of metres apart and separate points further apart."""
+        key = OSMClient.surface_cell_key
+        
+        assert key(-2.99995, 54.0003) == key(-2.9999, 54.0004)
+        assert key(-2.99995, 54.0003) != key(-2.99995, 54.0013)
+        assert key(-2.99995, 54.0003) != key(-3.0008, 54.0003)
+    
+    @patch('requests.Session.post')
+    def test_adaptive_sampling_scales_with_leg_length(self, mock_post):
+        """Test legs are sampled by distance rather than a fixed count."""
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = {'elements': []}
+        
+        client = OSMClient(batched=True)
+        # ~2 km and ~6 km straight legs along a parallel, densely noded
+        client.get_surface_data([(-3.0 + i * 0.0003, 54.0) for i in range(100)])
+        client.get_surface_data([(-3.0 + i * 0.0009, 54.0) for i in range(100)])
+        
+        short_query, long_query = (call[1]['data'] for call in mock_post.call_args_list)
+        assert short_query.count('["surface"]') < long_query.count('["surface"]')
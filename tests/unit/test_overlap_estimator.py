@@ -0,0 +1,36 @@
+"""
+Unit tests for the pre-routing overlap estimator.
+"""
+from backend.utils.overlap_estimator import estimate_itinerary_overlap
+
+
+class TestEstimateItineraryOverlap:
+    """Test estimate_itinerary_overlap."""
+
+    def test_single_leg_scores_zero(self):
+        """A one-day itinerary has nothing to overlap with."""
+        assert estimate_itinerary_overlap([[(-3.0, 54.0), (-2.9, 54.1)]]) == 0.0
+
+    def test_out_and_back_scores_worse_than_onward(self):
+        """Retracing the previous leg scores far higher than carrying on."""
+        leg1 = [(-3.0, 54.0), (-3.0, 54.05), (-3.0, 54.1)]
+        back = [(-3.0, 54.1), (-3.0, 54.05), (-3.0, 54.0)]
+        onward = [(-3.0, 54.1), (-3.0, 54.15), (-3.0, 54.2)]
+
+        out_and_back = estimate_itinerary_overlap([leg1, back])
+        carry_on = estimate_itinerary_overlap([leg1, onward])
+
+        assert out_and_back > 1.0
+        assert carry_on < 0.1
+
+    def test_shared_midpoint_is_penalised(self):
+        """Consecutive legs through the same scenic point are penalised."""
+        leg1 = [(-3.0, 54.0), (-2.95, 54.05), (-3.0, 54.1)]
+        leg2 = [(-3.0, 54.1), (-2.95, 54.05), (-2.8, 54.1)]
+        peak = {'name': 'Peak', 'type': 'Peak', 'coords': [-2.95, 54.05]}
+        other = {'name': 'Other', 'type': 'Peak', 'coords': [-2.9, 54.1]}
+
+        shared = estimate_itinerary_overlap([leg1, leg2], [peak, dict(peak)])
+        distinct = estimate_itinerary_overlap([leg1, leg2], [peak, other])
+
+        assert abs((shared - distinct) - 0.5) < 1e-9
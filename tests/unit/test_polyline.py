@@ -0,0 +1,46 @@
+"""
+Unit tests for the encoded polyline format.
+"""
+from backend.utils.polyline import decode_polyline, encode_feature_collection, encode_polyline
+
+
+class TestEncodedPolyline:
+    """Test polyline encoding and decoding."""
+    
+    def test_matches_reference_encoding(self):
+        """Test the format's published example (points given as lon, lat)."""
+        coords = [(-120.2, 38.5), (-120.95, 40.7), (-126.453, 43.252)]
+        assert encode_polyline(coords) == '_p~iF~ps|U_ulLnnqC_mqNvxq`@'
+    
+    def test_round_trip_to_five_decimals(self):
+        """Test decoding restores coordinates to the encoding precision."""
+        coords = [(-3.0 + i * 0.000137, 54.0 - i * 0.000071) for i in range(200)]
+        decoded = decode_polyline(encode_polyline(coords))
+        
+        assert len(decoded) == len(coords)
+        assert all(abs(a - c) < 1e-5 and abs(b - d) < 1e-5 for (a, b), (c, d) in zip(decoded, coords))
+    
+    def test_empty(self):
+        """Test empty input encodes and decodes to empty."""
+        assert encode_polyline([]) == ""
+        assert decode_polyline("") == []
+    
+    def test_encode_feature_collection_only_touches_linestrings(self):
+        """Test LineStrings are encoded and Points and the input are left unchanged."""
+        geojson = {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "properties": {"day": 1},
+                 "geometry": {"type": "LineString", "coordinates": [[-3.0, 54.0], [-2.9, 54.1]]}},
+                {"type": "Feature", "properties": {"name": "A"},
+                 "geometry": {"type": "Point", "coordinates": [-3.0, 54.0]}}
+            ]
+        }
+        encoded = encode_feature_collection(geojson)
+        
+        line, point = encoded['features']
+        assert decode_polyline(line['geometry']['encoded']) == [[-3.0, 54.0], [-2.9, 54.1]]
+        assert 'coordinates' not in line['geometry']
+        assert line['properties'] == {"day": 1}
+        assert point == geojson['features'][1]
+        assert geojson['features'][0]['geometry']['coordinates'] == [[-3.0, 54.0], [-2.9, 54.1]]
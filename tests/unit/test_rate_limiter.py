@@ -0,0 +1,58 @@
+"""
+Unit tests for the outbound request limiter.
+"""
+import threading
+import time
+
+from backend.services.rate_limiter import RequestLimiter, get_host_limiter
+
+
+class TestRequestLimiter:
+    """Test RequestLimiter."""
+
+    def test_spaces_request_starts(self):
+        """Consecutive requests start at least one interval apart."""
+        limiter = RequestLimiter(rate_per_sec=20, max_concurrency=4)
+        starts = []
+        for _ in range(3):
+            with limiter:
+                starts.append(time.monotonic())
+
+        assert starts[2] - starts[0] >= 2 * 0.05 * 0.9
+
+    def test_caps_concurrency(self):
+        """No more than max_concurrency requests are in flight at once."""
+        limiter = RequestLimiter(rate_per_sec=0, max_concurrency=2)
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def worker():
+            with limiter:
+                with lock:
+                    in_flight.append(1)
+                    peak.append(len(in_flight))
+                time.sleep(0.02)
+                with lock:
+                    in_flight.pop()
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert max(peak) <= 2
+
+
+class TestHostLimiter:
+    """Test the per-host limiter registry."""
+
+    def test_same_host_shares_a_limiter(self):
+        """Clients of the same host share one limiter; other hosts get their own."""
+        first = get_host_limiter("https://overpass.example.org/api/interpreter", 2, 2)
+        second = get_host_limiter("https://overpass.example.org/other", 5, 5)
+        other = get_host_limiter("https://mirror.example.org/api/interpreter", 2, 2)
+
+        assert first is second
+        assert first is not other
@@ -0,0 +1,116 @@
+"""
+Unit tests for the Redis cache tier.
+"""
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from backend.services.cache_service import CacheService
+from backend.services.redis_cache import RedisCache
+from backend.services.tiered_cache import TieredCache
+
+
+@pytest.fixture
+def redis_cache():
+    return RedisCache(fakeredis.FakeRedis(), prefix="test-cache", compress_min_bytes=64)
+
+
+class TestRedisCache:
+    """Test RedisCache."""
+
+    def test_round_trip_with_compression_and_ttl(self, redis_cache):
+        """Test large values are compressed, namespaced and expire."""
+        value = [{"from": "A", "to": "B", "distance": 12.5}] * 20
+        # Already expired when written, so nothing is stored
+        redis_cache.set("region:test_region:feasible_pairs", value, ttl_seconds=3600, written_at=1000.0)
+        assert redis_cache.get("region:test_region:feasible_pairs") is None
+
+        redis_cache.set("region:test_region:feasible_pairs", value, ttl_seconds=3600)
+        redis_cache.set("region:test_region:small", [1], ttl_seconds=3600)
+
+        assert redis_cache.conn.get("test-cache:region:test_region:feasible_pairs")[:1] == b"z"
+        assert redis_cache.conn.get("test-cache:region:test_region:small")[:1] == b"j"
+        stored, _ = redis_cache.get_entry("region:test_region:feasible_pairs")
+        assert stored == value
+        assert 0 < redis_cache.conn.ttl("test-cache:region:test_region:feasible_pairs") <= 3600
+
+        redis_cache.delete_matching("region:test_region:*")
+        assert redis_cache.get("region:test_region:small") is None
+        assert redis_cache.get_stats()["hits"] == 1
+
+
+class TestRedisBackedCaches:
+    """Test CacheService and TieredCache with a Redis tier."""
+
+    def _service(self, cache_dir, redis_cache):
+        with patch('backend.services.cache_service.SCENIC_CACHE_DIR', cache_dir / "scenic_points"), \
+             patch('backend.services.cache_service.FEASIBLE_PAIRS_CACHE_DIR', cache_dir / "feasible_pairs"), \
+             patch('backend.services.cache_service.LEG_STORE_DIR', cache_dir / "leg_store"):
+            return CacheService(redis_cache=redis_cache)
+
+    def test_cold_start_hydrates_from_redis(self, redis_cache):
+        """Test a process with an empty cache directory reads another process's data from Redis."""
+        with tempfile.TemporaryDirectory() as web_dir, tempfile.TemporaryDirectory() as worker_dir:
+            web = self._service(Path(web_dir), redis_cache)
+            worker = self._service(Path(worker_dir), redis_cache)
+            pairs = [{"from": "A", "to": "B", "distance": 12.5}]
+
+            web.set_feasible_pairs("test_region", pairs)
+
+            assert worker.get_feasible_pairs("test_region") == pairs
+            assert worker.get_source_versions("test_region")[1] == web.get_source_versions("test_region")[1]
+            assert worker.get_cache_stats()["memory_cache"]["remote_hits"] == 1
+
+            web.invalidate_region_cache("test_region")
+            assert self._service(Path(web_dir), redis_cache).get_feasible_pairs("test_region") is None
+
+    def test_restarted_host_serves_expired_copy_from_redis(self, redis_cache):
+        """Test Redis keeps entries through the max-stale window and serves them to stale reads only."""
+        with tempfile.TemporaryDirectory() as web_dir, tempfile.TemporaryDirectory() as worker_dir:
+            web = self._service(Path(web_dir), redis_cache)
+            pairs = [{"from": "A", "to": "B", "distance": 12.5}]
+
+            web.set_feasible_pairs("test_region", pairs)
+            redis_ttl = redis_cache.conn.ttl("test-cache:region:test_region:feasible_pairs")
+            assert redis_ttl > web.ttl_hours * 3600
+
+            # Written an hour past its TTL, as a restarted host would find it
+            written_at = time.time() - (web.ttl_hours + 1) * 3600
+            redis_cache.set("region:test_region:feasible_pairs", pairs, ttl_seconds=redis_ttl, written_at=written_at)
+
+            worker = self._service(Path(worker_dir), redis_cache)
+            assert worker.get_feasible_pairs("test_region") is None
+            assert worker.get_feasible_pairs("test_region", allow_stale=True) == pairs
+            assert worker.get_cache_stats()["memory_cache"]["stale_hits"] == 1
+
+    def test_tiered_cache_falls_back_to_redis(self, redis_cache):
+        """Test a TieredCache on a fresh disk is served from the Redis tier."""
+        with tempfile.TemporaryDirectory() as first_dir, tempfile.TemporaryDirectory() as second_dir:
+            TieredCache(Path(first_dir), ttl_hours=1, remote=redis_cache, remote_namespace="route_legs").set("abc", [1, 2])
+
+            cache = TieredCache(Path(second_dir), ttl_hours=1, remote=redis_cache, remote_namespace="route_legs")
+            assert cache.get("abc") == [1, 2]
+            assert cache.get("missing") is None
+
+            cache.clear()
+            assert redis_cache.get("route_legs:abc") is None
+
+    def test_tiered_cache_bounds_what_it_writes_to_redis(self, redis_cache):
+        """Test oversized entries stay local and Redis copies expire at the remote TTL."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = TieredCache(
+                Path(cache_dir), ttl_hours=24 * 7, remote=redis_cache, remote_namespace="route_legs",
+                remote_max_bytes=256, remote_ttl_hours=1
+            )
+            cache.set("small", [1, 2])
+            cache.set("large", [str(i) for i in range(1000)])
+
+            assert redis_cache.get("route_legs:large") is None
+            assert redis_cache.get_stats()["oversized"] == 1
+            assert cache.get("large") is not None
+            assert 0 < redis_cache.conn.ttl("test-cache:route_legs:small") <= 3600
@@ -1,6 +1,7 @@
 """
 Unit tests for region registry.
 """
+import os
 import pytest
 import tempfile
 import json
@@ -122,6 +123,29 @@ class TestRegionRegistry:
             with pytest.raises(ValueError):
                 registry.load_waypoints("nonexistent")
     
+    def test_load_waypoints_reuses_parse_until_file_changes(self):
+        """Test waypoints are parsed once and re-read only after the file's mtime changes."""
+        with tempfile.TemporaryDirectory() as temp_dir, \
+             patch('backend.regions.registry.REGIONS_DIR') as mock_dir:
+            
+            mock_dir.exists.return_value = True
+            mock_dir.glob.return_value = []
+            waypoints_file = Path(temp_dir) / "waypoints.json"
+            waypoints_file.write_text(json.dumps([{"properties": {"name": "A"}}]))
+            
+            registry = RegionRegistry()
+            with patch.object(registry, 'get_waypoints_file_path', return_value=waypoints_file):
+                first = registry.load_waypoints("test_region")
+                assert registry.load_waypoints("test_region") is first
+                
+                waypoints_file.write_text(json.dumps([{"properties": {"name": "B"}}]))
+                os.utime(waypoints_file, (0, waypoints_file.stat().st_mtime + 10))
+                assert registry.load_waypoints("test_region")[0]["properties"]["name"] == "B"
+                
+                reloaded = registry.load_waypoints("test_region")
+                registry.reload_waypoints("test_region")
+                assert registry.load_waypoints("test_region") is not reloaded
+    
     def test_to_api_format(self):
         """Test converting regions to API format."""
         with patch('backend.regions.registry.REGIONS_DIR') as mock_dir:
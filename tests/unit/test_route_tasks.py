@@ -0,0 +1,55 @@
+"""
+Unit tests for RQ route tasks.
+"""
+from unittest.mock import patch, Mock
+
+import pytest
+
+from backend.tasks import route_tasks
+
+
+class TestRegionCacheRefreshTasks:
+    """Test how worker jobs refresh expired region caches."""
+
+    def test_worker_planner_refreshes_on_the_queue(self):
+        """Test jobs never refresh in a thread, which would die with their work-horse."""
+        with patch.object(route_tasks, '_route_planner', None), \
+             patch.object(route_tasks, 'CACHE_REFRESH_MODE', "thread"):
+            assert route_tasks.get_route_planner().refresh_mode == "rq"
+
+        with patch.object(route_tasks, '_route_planner', None), \
+             patch.object(route_tasks, 'CACHE_REFRESH_MODE', "off"):
+            assert route_tasks.get_route_planner().refresh_mode == "off"
+
+    def test_refresh_enqueued_once_until_it_finishes(self):
+        """Test repeat requests are dropped while a refresh is queued, and allowed again once it ran."""
+        markers = set()
+        conn = Mock()
+        conn.set.side_effect = lambda key, value, nx, ex: None if key in markers else markers.add(key) or True
+        conn.delete.side_effect = markers.discard
+        planner = Mock()
+        planner.refresh_region_cache.return_value = True
+
+        with patch.object(route_tasks, 'conn', conn), \
+             patch.object(route_tasks, 'route_queue') as mock_queue, \
+             patch.object(route_tasks, 'get_route_planner', return_value=planner):
+            assert route_tasks.enqueue_region_cache_refresh("scenic_points", "lake_district") is True
+            assert route_tasks.enqueue_region_cache_refresh("scenic_points", "lake_district") is False
+            assert mock_queue.enqueue.call_count == 1
+
+            assert route_tasks.refresh_region_cache_task("scenic_points", "lake_district") is True
+            assert route_tasks.enqueue_region_cache_refresh("scenic_points", "lake_district") is True
+            assert mock_queue.enqueue.call_count == 2
+
+    def test_marker_released_if_enqueue_fails(self):
+        """Test a failed enqueue does not block later refreshes."""
+        conn = Mock()
+        conn.set.return_value = True
+
+        with patch.object(route_tasks, 'conn', conn), \
+             patch.object(route_tasks, 'route_queue') as mock_queue:
+            mock_queue.enqueue.side_effect = ConnectionError("redis down")
+            with pytest.raises(ConnectionError):
+                route_tasks.enqueue_region_cache_refresh("feasible_pairs", "lake_district")
+
+        conn.delete.assert_called_once_with("region_cache_refresh:feasible_pairs:lake_district")
@@ -0,0 +1,73 @@
+"""
+Unit tests for the scenic point spatial index.
+"""
+import random
+
+from backend.utils.geometry import find_best_scenic_midpoint, haversine_km
+from backend.utils.spatial_index import ScenicPointIndex
+
+
+def _brute_force_nearest(points, lat, lon):
+    return min(points, key=lambda p: float(haversine_km(lat, lon, p['coords'][1], p['coords'][0])))
+
+
+class TestScenicPointIndex:
+    """Test ScenicPointIndex."""
+
+    def test_nearest_matches_brute_force(self):
+        """Grid lookups agree with a linear scan."""
+        rng = random.Random(42)
+        points = [
+            {'name': f'P{i}', 'type': 'Peak', 'coords': [rng.uniform(-3.3, -2.7), rng.uniform(54.2, 54.6)]}
+            for i in range(200)
+        ]
+        index = ScenicPointIndex(points, cell_size_km=2.0)
+
+        for _ in range(50):
+            lat, lon = rng.uniform(54.0, 54.8), rng.uniform(-3.6, -2.4)
+            point, distance = index.nearest(lat, lon)
+            assert point is _brute_force_nearest(points, lat, lon)
+            assert distance >= 0
+
+    def test_nearest_exact_over_wide_latitude_span(self):
+        """Ring pruning stays exact where the projection overstates distances far from the mean latitude."""
+        rng = random.Random(0)
+        points = [
+            {'name': f'P{i}', 'type': 'Peak', 'coords': [rng.uniform(-10, 10), rng.uniform(40, 75)]}
+            for i in range(300)
+        ]
+        index = ScenicPointIndex(points, cell_size_km=5.0)
+
+        for _ in range(100):
+            lat, lon = rng.uniform(40, 75), rng.uniform(-10, 10)
+            point, _ = index.nearest(lat, lon)
+            assert point is _brute_force_nearest(points, lat, lon)
+
+    def test_query_far_outside_grid(self):
+        """Queries far from every cell still find the nearest point."""
+        points = [
+            {'name': 'Near', 'type': 'Peak', 'coords': [-3.0, 54.0]},
+            {'name': 'Far', 'type': 'Peak', 'coords': [-2.0, 55.0]}
+        ]
+        index = ScenicPointIndex(points, cell_size_km=1.0)
+
+        point, distance = index.nearest(53.0, -3.0)
+        assert point['name'] == 'Near'
+        assert 100 < distance < 120
+
+    def test_empty_index(self):
+        """An empty index returns no point."""
+        point, distance = ScenicPointIndex([]).nearest(54.0, -3.0)
+        assert point is None
+        assert distance == float('inf')
+
+    def test_find_best_scenic_midpoint_uses_index(self, sample_scenic_points):
+        """find_best_scenic_midpoint returns the same point with or without a prebuilt index."""
+        index = ScenicPointIndex(sample_scenic_points)
+        start, end = (54.0, -3.0), (54.1, -2.9)
+
+        with_index = find_best_scenic_midpoint(start, end, sample_scenic_points, 10, index=index)
+        without_index = find_best_scenic_midpoint(start, end, sample_scenic_points, 10)
+
+        assert with_index is without_index
+        assert with_index['name'] == 'Test Peak'
@@ -0,0 +1,93 @@
+"""
+Unit tests for the local surface index.
+"""
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from backend.models.region import BoundingBox
+from backend.services.osm_client import OSMClient
+from backend.utils.surface_index import SurfaceIndex, build_surface_index, read_overpass_json
+
+
+WAYS = [
+    ({"highway": "path", "surface": "gravel"}, [(-3.0, 53.999), (-3.0, 54.001)]),
+    ({"highway": "tertiary", "surface": "asphalt"}, [(-2.9925, 54.0), (-2.9925, 54.002)]),
+    ({"name": "Untagged"}, [(-3.0, 54.0), (-2.99, 54.0)]),
+]
+
+
+class TestSurfaceIndex:
+    """Test SurfaceIndex queries and persistence."""
+    
+    def test_query_finds_ways_within_radius(self):
+        """Test only ways passing within the radius are returned."""
+        index = SurfaceIndex.from_ways(WAYS)
+        
+        assert index.query(54.0, -3.0, 50) == [("gravel", "path", "")]
+        assert index.query(54.001, -2.9928, 50) == [("asphalt", "tertiary", "")]
+        assert index.query(54.1, -2.9, 50) == []
+    
+    def test_query_matches_long_segments_between_nodes(self):
+        """Test a segment spanning several grid cells is found mid-way between its nodes."""
+        index = SurfaceIndex.from_ways([({"highway": "track"}, [(-3.0, 54.0), (-3.0, 54.02)])])
+        
+        assert index.query(54.01, -3.0003, 50) == [("", "track", "")]
+    
+    def test_bbox_drops_ways_outside_region(self):
+        """Test ways with no node inside the bounding box are excluded."""
+        bbox = BoundingBox(west=-3.001, south=53.99, east=-2.995, north=54.01)
+        index = SurfaceIndex.from_ways(WAYS, bbox=bbox)
+        
+        assert len(index) == 1
+    
+    def test_build_from_overpass_json_and_reload(self):
+        """Test building from an Overpass dump, saving, and loading give the same answers."""
+        dump = {"elements": [
+            {"type": "node", "id": 1, "lat": 53.999, "lon": -3.0},
+            {"type": "node", "id": 2, "lat": 54.001, "lon": -3.0},
+            {"type": "way", "id": 10, "nodes": [1, 2], "tags": {"highway": "path", "surface": "grass"}},
+        ]}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = Path(temp_dir) / "extract.json"
+            source.write_text(json.dumps(dump))
+            assert list(read_overpass_json(source)) == [
+                ({"highway": "path", "surface": "grass"}, [(-3.0, 53.999), (-3.0, 54.001)])
+            ]
+            
+            output = Path(temp_dir) / "lake_district.npz"
+            bbox = BoundingBox(west=-3.1, south=53.9, east=-2.9, north=54.1)
+            build_surface_index(source, bbox, output)
+            loaded = SurfaceIndex.load(output)
+            
+            assert loaded.query(54.0, -3.0, 50) == [("grass", "path", "")]
+
+
+class TestOSMClientLocalIndex:
+    """Test OSMClient answers from a local surface index without network calls."""
+    
+    @patch('requests.Session.post')
+    def test_local_index_used_for_region(self, mock_post):
+        """Test a built region index replaces Overpass queries."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = OSMClient(surface_index_dir=temp_dir)
+            SurfaceIndex.from_ways(WAYS).save(client.surface_index_path("test_region"))
+            
+            result = client.get_surface_data([(-3.0, 54.0), (-2.9, 54.1)], region_id="test_region")
+            
+            mock_post.assert_not_called()
+            assert len(result) == 1
+            assert result[0].surface == "gravel"
+            assert (result[0].lon, result[0].lat) == (-3.0, 54.0)
+    
+    @patch('requests.Session.post')
+    def test_falls_back_to_overpass_without_index(self, mock_post):
+        """Test regions without an index still query Overpass."""
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = {'elements': []}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = OSMClient(surface_index_dir=temp_dir)
+            client.get_surface_data([(-3.0, 54.0)], region_id="test_region")
+        
+        assert mock_post.call_count == 1
@@ -0,0 +1,66 @@
+"""
+Unit tests for the two-tier key/value cache.
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from backend.services.tiered_cache import TieredCache
+
+
+class TestTieredCache:
+    """Test TieredCache."""
+
+    def test_set_and_get(self):
+        """Values round-trip through the memory tier."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = TieredCache(Path(temp_dir), ttl_hours=1)
+            cache.set("abc", {"value": 1})
+
+            assert cache.get("abc") == {"value": 1}
+            assert cache.get("missing") is None
+            assert cache.get_stats()["hits"] == 1
+            assert cache.get_stats()["misses"] == 1
+
+    def test_disk_tier_survives_new_instance(self):
+        """A fresh instance reads entries written by another one."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            TieredCache(Path(temp_dir), ttl_hours=1).set("abc", [1, 2, 3])
+
+            assert TieredCache(Path(temp_dir), ttl_hours=1).get("abc") == [1, 2, 3]
+
+    def test_memory_tier_is_bounded(self):
+        """The LRU tier evicts the least recently used key."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = TieredCache(Path(temp_dir), ttl_hours=1, max_memory_entries=2)
+            cache.set("a", 1)
+            cache.set("b", 2)
+            cache.get("a")
+            cache.set("c", 3)
+
+            assert cache.get_stats()["memory_entries"] == 2
+            assert "b" not in cache._memory
+
+    def test_expired_disk_entry_is_a_miss(self):
+        """Files older than the TTL are ignored."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            TieredCache(Path(temp_dir), ttl_hours=1).set("old", 1)
+            old = time.time() - 7200
+            os.utime(Path(temp_dir) / "old.json", (old, old))
+
+            assert TieredCache(Path(temp_dir), ttl_hours=1).get("old") is None
+
+    def test_sweep_enforces_disk_budget(self):
+        """Sweeping removes the oldest files until the directory fits the budget."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = TieredCache(Path(temp_dir), ttl_hours=1, max_disk_bytes=15, sweep_interval=1000)
+            for i, key in enumerate(["a", "b", "c"]):
+                cache.set(key, "x" * 10)
+                stamp = time.time() - 100 + i
+                os.utime(Path(temp_dir) / f"{key}.json", (stamp, stamp))
+
+            cache.sweep()
+
+            remaining = sorted(p.stem for p in Path(temp_dir).glob("*.json"))
+            assert remaining == ["c"]
@@ -0,0 +1,51 @@
+"""
+Unit tests for the compact waypoint store.
+"""
+import numpy as np
+
+from backend.models.waypoint_store import WaypointStore, waypoint_key
+
+
+def _feature(props, lon, lat):
+    return {"type": "Feature", "properties": props, "geometry": {"type": "Point", "coordinates": [lon, lat]}}
+
+
+class TestWaypointStore:
+    """Test WaypointStore construction and lookups."""
+    
+    def test_waypoint_key_prefers_explicit_ids(self):
+        """Test explicit IDs win and unnamed IDs fall back to name plus rounded coordinates."""
+        assert waypoint_key(_feature({"id": 7, "name": "Inn"}, -3.0, 54.0)) == "7"
+        assert waypoint_key(_feature({"name": "Inn"}, -3.123456, 54.654321)) == "Inn:54.65432,-3.12346"
+        assert waypoint_key({"properties": {"name": "Nowhere"}, "geometry": {}}) is None
+    
+    def test_from_features_keeps_only_planning_fields(self):
+        """Test coordinates land in arrays, names in slim records, and exact duplicates are dropped."""
+        features = [
+            _feature({"id": "A", "name": "Alpha", "postcode": "LA22"}, -3.0, 54.0),
+            _feature({"id": "B", "name": "Bravo"}, -2.9, 54.1),
+            _feature({"id": "A", "name": "Alpha"}, -3.0, 54.0)
+        ]
+        store = WaypointStore.from_features(features)
+        
+        assert len(store) == 2
+        assert store.keys == ["A", "B"]
+        np.testing.assert_array_equal(store.lats, [54.0, 54.1])
+        assert store.coords("B") == [-2.9, 54.1]
+        assert store.name("A") == "Alpha"
+        assert store.name("missing") == "missing"
+        assert store.index_of("B") == 1
+        assert store.indices_of(["B", "A"]).tolist() == [1, 0]
+        assert store.coords_at(1) == [-2.9, 54.1]
+        assert "A" in store and "C" not in store
+        assert not hasattr(store.records[0], "__dict__")
+    
+    def test_distinct_points_sharing_a_key_are_kept(self):
+        """Test points with one ID but different coordinates both stay, and lookups resolve to the last."""
+        store = WaypointStore.from_features([
+            _feature({"id": "A", "name": "First"}, -3.0, 54.0),
+            _feature({"id": "A", "name": "Second"}, -2.9, 54.1)
+        ])
+        
+        assert len(store) == 2
+        assert store.coords("A") == [-2.9, 54.1]